@@ -0,0 +1,142 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from executor import ServiceOverloadedError, estimate_retry_after
+
+
+class MicroBatcher:
+    """Agrupa peticiones individuales en lotes para un pipeline de transformers.
+
+    Cada elemento se encola con `submit` y un hilo de fondo despacha la cola como
+    un único lote cuando se alcanzan `max_batch_size` elementos o cuando el más
+    antiguo lleva `max_wait_ms` milisegundos esperando. `process_batch` recibe la
+    lista de elementos y debe devolver una lista de resultados en el mismo orden.
+    Si se indica `max_pending`, `submit` lanza `ServiceOverloadedError` cuando ya
+    hay ese número de elementos esperando.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=5.0, name="batcher", max_pending=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size debe ser al menos 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms no puede ser negativo")
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.max_pending = max_pending
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats_lock = threading.Lock()
+        self._flushes = 0
+        self._items = 0
+        self._max_batch = 0
+        self._flush_reasons = {"size": 0, "wait": 0}
+        self._batch_sizes = {}
+        self._queue_wait_total = 0.0
+        self._process_total = 0.0
+        self._errors = 0
+        self._rejected = 0
+
+    def submit(self, item):
+        """Encola un elemento y devuelve un `concurrent.futures.Future` con su resultado."""
+        if self.max_pending is not None and self._queue.qsize() >= self.max_pending:
+            with self._stats_lock:
+                self._rejected += 1
+                avg_seconds = self._process_total / self._flushes if self._flushes else 1.0
+            raise ServiceOverloadedError(estimate_retry_after(self._queue.qsize() / self.max_batch_size, avg_seconds, 1))
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    async def run(self, item):
+        """Versión asíncrona de `submit` para usar desde los endpoints."""
+        return await asyncio.wrap_future(self.submit(item))
+
+    def stats(self):
+        with self._stats_lock:
+            flushes = self._flushes
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "flushes": flushes,
+                "items": self._items,
+                "errors": self._errors,
+                "rejected": self._rejected,
+                "pending": self._queue.qsize(),
+                "avg_batch_size": self._items / flushes if flushes else 0.0,
+                "max_observed_batch_size": self._max_batch,
+                "flush_reasons": dict(self._flush_reasons),
+                "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "avg_queue_wait_ms": self._queue_wait_total / self._items * 1000 if self._items else 0.0,
+                "avg_process_ms": self._process_total / flushes * 1000 if flushes else 0.0,
+            }
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        # Se arranca al primer uso, no al crear el objeto, por los forks (ver `cache.ProcessLocal`)
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_forever, name=f"{self.name}-batcher", daemon=True)
+                self._worker.start()
+
+    def _run_forever(self):
+        while True:
+            batch, reason = self._collect()
+            self._flush(batch, reason)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # El plazo ya venció (por ejemplo, mientras se procesaba el lote anterior):
+                    # se despachan sin esperar los elementos que ya están en la cola
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch, "wait"
+        return batch, "size"
+
+    def _flush(self, batch, reason):
+        # Descarta los elementos cuyo solicitante ya canceló la espera
+        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+        queue_wait = sum(started - enqueued for _, _, enqueued in batch)
+        failed = False
+        try:
+            results = self.process_batch(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: se esperaban {len(items)} resultados y se obtuvieron {len(results)}")
+        except Exception as exc:
+            failed = True
+            for _, future, _ in batch:
+                future.set_exception(exc)
+        else:
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            size = len(batch)
+            self._flushes += 1
+            self._items += size
+            self._max_batch = max(self._max_batch, size)
+            self._flush_reasons[reason] += 1
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._queue_wait_total += queue_wait
+            self._process_total += elapsed
+            if failed:
+                self._errors += 1
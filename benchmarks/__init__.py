@@ -0,0 +1,6 @@
+"""Benchmarks reproducibles sin conexión: servidor falso de OpenAI, traductor falso,
+micro-benchmarks por etapa y una ejecución de extremo a extremo contra todos los endpoints.
+
+Uso:
+    python -m benchmarks --help
+"""
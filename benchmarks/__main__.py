@@ -0,0 +1,108 @@
+"""Ejecuta los benchmarks sin conexión y compara los resultados con una referencia guardada.
+
+Uso:
+    python -m benchmarks [--suite all|stages|e2e] [--output resultados.json]
+                         [--baseline benchmarks/baseline.json] [--update-baseline | --no-baseline]
+
+Termina con código 1 si alguna métrica empeora más de `--tolerance` respecto a la referencia
+y con código 2 si la referencia no existe (salvo con `--update-baseline` o `--no-baseline`).
+La referencia depende de la máquina, así que no se incluye en el repositorio: se genera con
+`--update-baseline` en la máquina donde se comparan los resultados.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+from benchmarks.e2e import endpoint_requests, run_e2e
+from benchmarks.fake_openai import start_fake_openai
+from benchmarks.fake_translator import fake_translator_factory
+from benchmarks.results import compare, environment, load, rss_mb, save
+from benchmarks.stages import run_stages
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def use_offline_upstreams(app, llm_base_url, translator_latency_ms, translator_jitter_ms, seed):
+    # La API usa el servidor falso de OpenAI y el traductor falso en lugar de los servicios reales
+    app.llm_client.base_url = llm_base_url
+    app.llm_client.api_key = "sk-benchmark"
+    app.translation_cache.translator_factory = fake_translator_factory(translator_latency_ms, translator_jitter_ms, seed)
+
+
+def print_summary(results):
+    for stage, stats in results.get("stages", {}).items():
+        print(f"{stage:<32} p50 {stats['p50_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms")
+    for endpoint, stats in results.get("endpoints", {}).items():
+        latency = stats["latency"]
+        print(
+            f"{endpoint:<32} p50 {latency['p50_ms']:>8.1f} ms   p95 {latency['p95_ms']:>8.1f} ms   "
+            f"p99 {latency['p99_ms']:>8.1f} ms   {stats['rps']:>8.1f} req/s   errores {stats['errors']}"
+        )
+    print(f"RSS: {results['rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de la API sin conexión a servicios externos.")
+    parser.add_argument("--suite", choices=("all", "stages", "e2e"), default="all")
+    parser.add_argument("--endpoints", help=f"Endpoints a medir, separados por comas. Opciones: {', '.join(endpoint_requests(0))}.")
+    parser.add_argument("--requests", type=int, default=200, help="Peticiones medidas por endpoint.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Clientes concurrentes por endpoint.")
+    parser.add_argument("--warmup", type=int, default=5, help="Peticiones de calentamiento por endpoint (no se miden).")
+    parser.add_argument("--repeats", type=int, default=50, help="Repeticiones de cada micro-benchmark.")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Latencia media del servidor falso de OpenAI.")
+    parser.add_argument("--llm-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--translator-latency-ms", type=float, default=20.0, help="Latencia media del traductor falso.")
+    parser.add_argument("--translator-jitter-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark-results.json", help="Archivo JSON donde guardar los resultados.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Resultados de referencia con los que comparar.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Empeoramiento máximo admitido (proporción).")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="Diferencia de latencia mínima para considerar una regresión.")
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda estos resultados como nueva referencia.")
+    parser.add_argument("--no-baseline", action="store_true", help="Solo mide, sin comparar con la referencia.")
+    args = parser.parse_args()
+
+    fake_openai = start_fake_openai(latency_ms=args.llm_latency_ms, jitter_ms=args.llm_jitter_ms, seed=args.seed)
+    # Los trabajos de /jobs del benchmark se guardan en un directorio temporal y no en el directorio actual
+    os.environ.setdefault("JOBS_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+    import main as app
+
+    use_offline_upstreams(app, fake_openai.base_url, args.translator_latency_ms, args.translator_jitter_ms, args.seed)
+
+    results = {"environment": environment(), "config": vars(args)}
+    if args.suite in ("all", "stages"):
+        results["stages"] = run_stages(app, args.repeats, args.translator_latency_ms)
+    if args.suite in ("all", "e2e"):
+        endpoints = [name.strip() for name in args.endpoints.split(",")] if args.endpoints else None
+        results["endpoints"] = run_e2e(app.app, endpoints, args.requests, args.concurrency, args.warmup)
+    results["rss_mb"] = round(rss_mb(), 1)
+    fake_openai.shutdown()
+
+    regressions = []
+    missing_baseline = False
+    if args.update_baseline:
+        save(results, args.baseline)
+    elif os.path.exists(args.baseline):
+        regressions = compare(results, load(args.baseline), args.tolerance, args.min_delta_ms)
+    elif not args.no_baseline:
+        missing_baseline = True
+    results["regressions"] = regressions
+
+    save(results, args.output)
+    print_summary(results)
+    for regression in regressions:
+        print(f"REGRESIÓN {regression['metric']}: {regression['baseline']} -> {regression['current']} ({regression['change']:+.0%})", file=sys.stderr)
+    if missing_baseline:
+        # Sin referencia no se puede detectar ninguna regresión: no se da la ejecución por buena en silencio
+        print(
+            f"No existe la referencia {args.baseline}: genérala con --update-baseline en esta máquina "
+            "o usa --no-baseline para medir sin comparar.",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
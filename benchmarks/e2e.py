@@ -0,0 +1,150 @@
+"""Ejecución de extremo a extremo: arranca la API en este proceso y mide cada endpoint por HTTP."""
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from benchmarks.results import rss_mb, summarize
+from benchmarks.stages import texts
+
+# Textos por petición de los endpoints de lotes, líneas por petición de /analyze/stream y oraciones por documento de /document
+BATCH_ITEMS = 16
+STREAM_LINES = 16
+DOCUMENT_SENTENCES = 16
+# Endpoints asíncronos: la petición solo encola el trabajo, así que se mide hasta que termina
+JOB_ENDPOINTS = {"POST /jobs"}
+JOB_POLL_INTERVAL = 0.02
+
+
+def endpoint_requests(index):
+    """Peticiones de ejemplo para cada endpoint: (método, ruta, argumentos de httpx, elementos procesados)."""
+    text = texts(1, index)[0]
+    batch = texts(BATCH_ITEMS, index * BATCH_ITEMS)
+    stream_body = "".join(json.dumps({"texto": line}, ensure_ascii=False) + "\n" for line in texts(STREAM_LINES, index * STREAM_LINES))
+    # Oraciones nuevas en cada petición (mide el análisis completo, no los aciertos de la caché por oración),
+    # con la marca delante para que cada texto siga siendo una sola oración
+    document = " ".join(" ".join(reversed(line.rsplit(" ", 1))) for line in texts(DOCUMENT_SENTENCES, index * DOCUMENT_SENTENCES))
+    return {
+        "GET /": ("GET", "/", {}, 1),
+        "GET /health/ready": ("GET", "/health/ready", {}, 1),
+        "GET /stats": ("GET", "/stats", {}, 1),
+        "GET /metrics": ("GET", "/metrics", {}, 1),
+        "POST /sentiment": ("POST", "/sentiment", {"json": {"text": text}}, 1),
+        "POST /sentiment/batch": ("POST", "/sentiment/batch", {"json": {"texts": batch}}, BATCH_ITEMS),
+        "POST /emotions": ("POST", "/emotions", {"json": {"texto": text}}, 1),
+        "POST /emotions/batch": ("POST", "/emotions/batch", {"json": {"textos": batch}}, BATCH_ITEMS),
+        "POST /document": ("POST", "/document", {"json": {"texto": document}}, DOCUMENT_SENTENCES),
+        "POST /analyze": ("POST", "/analyze", {"json": {"texto": text}}, 1),
+        "POST /analyze/stream": ("POST", "/analyze/stream", {"content": stream_body.encode("utf-8")}, STREAM_LINES),
+        "POST /classify": ("POST", "/classify", {"json": {"texto": text}}, 1),
+        "POST /desacuerdos": ("POST", "/desacuerdos", {"json": {"texto": text}}, 1),
+        "POST /compromiso": ("POST", "/compromiso", {"json": {"texto": text}}, 1),
+        "POST /redactar-compromiso": ("POST", "/redactar-compromiso", {"json": {"texto": text}}, 1),
+        # La latencia incluye la respuesta completa, hasta el evento "fin"
+        "POST /redactar-compromiso/stream": ("POST", "/redactar-compromiso/stream", {"json": {"texto": text}}, 1),
+        # Solo análisis locales: con el modelo de lenguaje se mediría sobre todo el límite JOB_LLM_RATE
+        "POST /jobs": ("POST", "/jobs", {"json": {"textos": batch, "analisis": ["sentiment", "emotions"]}}, BATCH_ITEMS),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, ready_timeout=600):
+    """Arranca uvicorn en un hilo y espera a que los modelos estén listos."""
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="benchmark-server", daemon=True).start()
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/ready").status_code == 200:
+                return server, base_url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    server.should_exit = True
+    raise TimeoutError("La API no estuvo lista a tiempo")
+
+
+async def wait_for_job(client, location):
+    """Consulta el trabajo hasta que termina y devuelve su código de estado (500 si el trabajo falló)."""
+    while True:
+        response = await client.get(location)
+        if response.status_code != 200:
+            return response.status_code
+        status = response.json()["estado"]
+        if status in ("completed", "failed"):
+            return 500 if status == "failed" else 200
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+async def send(client, name, index):
+    """Envía la petición `index` del endpoint y devuelve su código de estado y los elementos procesados."""
+    method, path, kwargs, count = endpoint_requests(index)[name]
+    response = await client.request(method, path, **kwargs)
+    if name in JOB_ENDPOINTS and response.status_code == 202:
+        return await wait_for_job(client, response.headers["Location"]), count
+    return response.status_code, count
+
+
+async def load_endpoint(client, name, requests, concurrency, warmup, offset):
+    """Envía `requests` peticiones con `concurrency` clientes concurrentes y mide latencias y rendimiento."""
+    counter = iter(range(offset, offset + warmup + requests))
+    latencies = []
+    statuses = {}
+    items = 0
+
+    async def worker():
+        nonlocal items
+        for index in counter:
+            started = time.perf_counter()
+            status, count = await send(client, name, index)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            items += count
+
+    # Calentamiento secuencial (no se mide) y medición concurrente
+    for _ in range(warmup):
+        await send(client, name, next(counter))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "latency": summarize(latencies),
+        "rps": round(len(latencies) / elapsed, 2),
+        "items_per_second": round(items / elapsed, 2),
+        "errors": errors,
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+async def run_endpoints(base_url, endpoints, requests, concurrency, warmup):
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        for offset, name in enumerate(endpoints):
+            # Cada endpoint usa textos distintos para que las cachés no se compartan entre mediciones
+            results[name] = await load_endpoint(client, name, requests, concurrency, warmup, offset * 100000)
+    return results
+
+
+def run_e2e(app, endpoints=None, requests=200, concurrency=8, warmup=5):
+    endpoints = endpoints or list(endpoint_requests(0))
+    server, base_url = start_server(app)
+    try:
+        return asyncio.run(run_endpoints(base_url, endpoints, requests, concurrency, warmup))
+    finally:
+        server.should_exit = True
@@ -0,0 +1,165 @@
+"""Servidor local compatible con el endpoint chat/completions de OpenAI, con latencia configurable.
+
+Reconoce los prompts de sistema de la API por su comienzo y devuelve una respuesta
+con el formato que espera cada endpoint, de modo que el procesado de las respuestas
+se ejercita igual que con el modelo real.
+
+Con `"stream": true` la respuesta se envía palabra a palabra como Server-Sent Events,
+con `token_latency_ms` de espera entre fragmentos.
+
+Uso:
+    python -m benchmarks.fake_openai --port 8001 --latency-ms 300 --jitter-ms 100 --token-latency-ms 20
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Respuestas según el comienzo del prompt de sistema
+RESPONSES = [
+    ("Analiza el siguiente texto y responde únicamente con un objeto JSON", json.dumps({
+        "clasificacion": {"compromiso": 70, "duda": 0, "acuerdo": 10, "desacuerdo": 10, "texto libre": 10},
+        "desacuerdo": {"postura1": "La tierra es plana", "postura2": "La tierra es redonda"},
+        "compromiso": {"quién": "Juan", "qué": "va a enviar el informe", "cuándo": "mañana", "dónde": "la oficina"},
+    }, ensure_ascii=False)),
+    ("Dado el siguiente texto", "compromiso: 10%, duda: 20%, acuerdo: 50%, desacuerdo: 10%, texto libre: 10%"),
+    ("Indica cuales son las dos posturas", json.dumps({"postura1": "La tierra es plana", "postura2": "La tierra es redonda"}, ensure_ascii=False)),
+    ("Voy a proporcionarte una frase de compromiso", json.dumps({"quién": "Juan", "qué": "va a enviar el informe", "cuándo": "mañana", "dónde": "la oficina"}, ensure_ascii=False)),
+    ("Redacta el siguiente texto", "Juan va a enviar el informe antes del 21 de agosto del 2024 en la oficina."),
+]
+
+
+def fake_reply(messages):
+    system_prompt = next((message["content"] for message in messages if message["role"] == "system"), "")
+    for prefix, response in RESPONSES:
+        if system_prompt.startswith(prefix):
+            return response
+    # Prompt desconocido: devuelve el texto del usuario
+    return messages[-1]["content"] if messages else ""
+
+
+def completion(model, content):
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def completion_chunk(model, content=None, finish_reason=None):
+    delta = {"content": content} if content is not None else {}
+    return {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0, token_latency_ms=0.0):
+        super().__init__(address, FakeOpenAIHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.token_latency_ms = token_latency_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        # Respuestas en streaming que el cliente cerró antes de recibirlas completas
+        self.streams_cancelled = 0
+
+    def next_delay(self):
+        # Latencia y errores pseudoaleatorios con semilla fija, para que las ejecuciones sean reproducibles
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            failed = self._random.random() < self.error_rate
+        return delay, failed
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "Not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        delay, failed = self.server.next_delay()
+        time.sleep(delay)
+        if failed:
+            self.send_json(500, {"error": {"message": "Error simulado", "type": "server_error"}})
+            return
+        model, content = body.get("model", "fake"), fake_reply(body.get("messages", []))
+        if body.get("stream"):
+            self.send_stream(model, content)
+        else:
+            self.send_json(200, completion(model, content))
+
+    def send_stream(self, model, content):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        chunks = [completion_chunk(model, piece) for piece in re.findall(r"\s*\S+", content)]
+        chunks.append(completion_chunk(model, finish_reason="stop"))
+        try:
+            for chunk in chunks:
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                time.sleep(self.server.token_latency_ms / 1000)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server._lock:
+                self.server.streams_cancelled += 1
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_openai(host="127.0.0.1", port=0, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0, token_latency_ms=0.0):
+    """Arranca el servidor en un hilo de fondo y lo devuelve; `server.base_url` es la URL para `OPENAI_BASE_URL`."""
+    server = FakeOpenAIServer((host, port), latency_ms, jitter_ms, error_rate, seed, token_latency_ms)
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso de OpenAI para pruebas de carga sin conexión.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0, help="Espera entre fragmentos de las respuestas en streaming.")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer((args.host, args.port), args.latency_ms, args.jitter_ms, args.error_rate, args.seed, args.token_latency_ms)
+    print(f"Servidor falso de OpenAI en {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import random
+import threading
+import time
+
+
+class FakeTranslator:
+    """Sustituto de `GoogleTranslator` con latencia configurable y traducción determinista.
+
+    Devuelve el mismo texto (los modelos de emociones aceptan cualquier entrada), así
+    que los resultados son reproducibles y solo cambia el tiempo que tarda cada llamada.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def translate(self, text):
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        time.sleep(delay)
+        return text
+
+
+def fake_translator_factory(latency_ms=0.0, jitter_ms=0.0, seed=0):
+    # Todas las llamadas comparten un traductor, como la caché de traducciones comparte su fábrica
+    translator = FakeTranslator(latency_ms, jitter_ms, seed)
+    return lambda *args, **kwargs: translator
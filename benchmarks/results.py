@@ -0,0 +1,93 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+
+def rss_mb():
+    # Memoria residente actual del proceso en MB (Linux); en otros sistemas, el máximo alcanzado
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(latencies_ms):
+    """Resumen de una lista de latencias en milisegundos."""
+    if not latencies_ms:
+        return {"n": 0}
+    return {
+        "n": len(latencies_ms),
+        "mean_ms": round(statistics.mean(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance=0.2, min_delta_ms=0.1):
+    """Devuelve la lista de regresiones de `results` respecto a `baseline`.
+
+    Se compara la mediana de cada micro-benchmark y el p95 y las peticiones por
+    segundo de cada endpoint; una métrica empeora si lo hace en más de `tolerance`
+    (proporción) respecto a la referencia. Las diferencias de latencia menores que
+    `min_delta_ms` se ignoran, ya que en las etapas de microsegundos son ruido.
+    """
+    regressions = []
+
+    def check(name, current, reference, higher_is_better=False):
+        if current is None or not reference:
+            return
+        if not higher_is_better and abs(current - reference) < min_delta_ms:
+            return
+        change = (current - reference) / reference
+        if (change < -tolerance) if higher_is_better else (change > tolerance):
+            regressions.append({"metric": name, "baseline": reference, "current": current, "change": round(change, 3)})
+
+    for stage, stats in baseline.get("stages", {}).items():
+        check(f"stages.{stage}.p50_ms", results.get("stages", {}).get(stage, {}).get("p50_ms"), stats.get("p50_ms"))
+    for endpoint, stats in baseline.get("endpoints", {}).items():
+        current = results.get("endpoints", {}).get(endpoint, {})
+        check(f"endpoints.{endpoint}.p95_ms", current.get("latency", {}).get("p95_ms"), stats.get("latency", {}).get("p95_ms"))
+        check(f"endpoints.{endpoint}.rps", current.get("rps"), stats.get("rps"), higher_is_better=True)
+    return regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as results_file:
+        return json.load(results_file)
+
+
+def save(results, path):
+    with open(path, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2, ensure_ascii=False)
+        results_file.write("\n")
@@ -0,0 +1,113 @@
+"""Micro-benchmarks de cada etapa del análisis, medidos de forma aislada."""
+import asyncio
+import json
+import time
+
+from benchmarks.fake_translator import fake_translator_factory
+from benchmarks.results import summarize
+from cache import hash_key, normalize_text
+from translation import TranslationCache
+
+SAMPLE_TEXTS = [
+    "Estoy muy feliz con el resultado de la reunión.",
+    "No creo que eso funcione.",
+    "Voy a enviar el informe mañana.",
+    "¿Estás seguro de esto?",
+    "Me siento un poco triste por la noticia.",
+    "Tengo miedo de que no lleguemos a tiempo.",
+    "Estoy de acuerdo con lo que dijiste.",
+    "El clima hoy es agradable.",
+    "Juan va a hacer cambio en la base de datos mañana en la oficina.",
+    "Creo que la tierra es plana y otros dicen que es redonda.",
+    "Leí tu mensaje.",
+    "Vale Puente, voy a pasear a mi perrita antes del 2024-08-21 en la calle.",
+]
+
+BATCH_SIZES = (1, 8, 16)
+
+
+def texts(count, offset=0):
+    # Textos distintos entre sí para que ninguna caché los resuelva
+    return [f"{SAMPLE_TEXTS[(offset + index) % len(SAMPLE_TEXTS)]} #{offset + index}" for index in range(count)]
+
+
+def measure(fn, repeats, warmup=3):
+    """Ejecuta `fn(i)` `repeats` veces tras `warmup` ejecuciones y resume las latencias."""
+    for index in range(warmup):
+        fn(index)
+    latencies = []
+    for index in range(warmup, warmup + repeats):
+        started = time.perf_counter()
+        fn(index)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize(latencies)
+
+
+async def measure_async(fn, repeats, warmup=3):
+    for index in range(warmup):
+        await fn(index)
+    latencies = []
+    for index in range(warmup, warmup + repeats):
+        started = time.perf_counter()
+        await fn(index)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize(latencies)
+
+
+def run_stages(app, repeats=50, translator_latency_ms=0.0, models=("sentiment", "emotions")):
+    """Mide cada etapa por separado usando los componentes de `main` (`app`).
+
+    El traductor y el modelo de lenguaje deben apuntar a los sustitutos locales.
+    """
+    results = {}
+    text = SAMPLE_TEXTS[8]
+
+    results["normalize_text"] = measure(lambda i: normalize_text(f"  {text}  #{i} "), repeats)
+    results["llm_cache_key"] = measure(lambda i: app.llm_cache_key("classify", app.CLASSIFY_PROMPT, f"{text} #{i}"), repeats)
+    results["hash_key"] = measure(lambda i: hash_key("auto", "en", f"{text} #{i}"), repeats)
+
+    # Traducción: fallo de caché, acierto y lote agrupado en una sola llamada
+    cache = TranslationCache(fake_translator_factory(translator_latency_ms))
+    results["translate_miss"] = measure(lambda i: cache.translate(texts(1, i)[0]), repeats)
+    results["translate_hit"] = measure(lambda i: cache.translate(texts(1, 0)[0]), repeats)
+    results["translate_batch_16"] = measure(lambda i: cache.translate_batch(texts(16, 1000 + i * 16)), repeats)
+
+    for name in models:
+        if not app.models.is_enabled(name):
+            continue
+        model = app.models.get(name)
+        predict = app.predict_sentiment_batch if name == "sentiment" else app.predict_emotions_batch
+        tokenizer = getattr(model, "tokenizer", None)
+        if tokenizer is not None:
+            results[f"{name}.tokenize"] = measure(lambda i: tokenizer(texts(1, i)[0], truncation=True), repeats)
+        for size in BATCH_SIZES:
+            results[f"{name}.predict_batch_{size}"] = measure(lambda i: predict(texts(size, i * size)), max(1, repeats // size))
+        # Lote de longitudes mezcladas (agrupado por longitud) y un documento más largo que el límite del modelo
+        mixed = [text * (1 + index % 4 * 6) for index, text in enumerate(texts(16))]
+        results[f"{name}.predict_mixed_16"] = measure(lambda i: predict(mixed), max(1, repeats // 16))
+        document = " ".join(texts(200))
+        results[f"{name}.split_long_document"] = measure(lambda i: app.split_windows(name, [document]), repeats)
+
+    # Llamada al modelo de lenguaje (servidor falso) y procesado de cada tipo de respuesta
+    async def llm_calls():
+        stats = await measure_async(lambda i: app.ask_gpt(app.CLASSIFY_PROMPT, f"{text} #{i}"), repeats)
+        await app.llm_client.aclose()
+        return stats
+
+    results["llm_call"] = asyncio.run(llm_calls())
+    classification = "compromiso: 10%, duda: 20%, acuerdo: 50%, desacuerdo: 10%, texto libre: 10%"
+    disagreement = '{"postura1": "La tierra es plana", "postura2": "La tierra es redonda"}'
+    commitment = '{"quién": "Juan", "qué": "va a enviar el informe", "cuándo": "mañana", "dónde": ""}'
+    results["parse_classification"] = measure(lambda i: app.parse_classification(classification), repeats)
+    results["parse_disagreement"] = measure(lambda i: app.parse_disagreement(disagreement), repeats)
+    results["parse_commitment"] = measure(lambda i: app.format_commitment(app.parse_commitment(commitment)), repeats)
+    multitask = json.dumps({
+        "clasificacion": {"compromiso": 70, "duda": 0, "acuerdo": 10, "desacuerdo": 10, "texto libre": 10},
+        "desacuerdo": {"postura1": "", "postura2": ""},
+        "compromiso": {"quién": "Juan", "qué": "va a enviar el informe", "cuándo": "mañana", "dónde": ""},
+    })
+    results["parse_multitask"] = measure(lambda i: app.parse_multitask(multitask), repeats)
+    results["format_emotions"] = measure(
+        lambda i: app.format_emotions([{"label": label, "score": 0.1} for label in app.emotion_translation]), repeats
+    )
+    return results
@@ -0,0 +1,294 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    # Normaliza la representación Unicode y los espacios para que textos equivalentes compartan clave
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def hash_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Caché en memoria acotada por número de entradas, con caducidad opcional en segundos."""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        if max_entries < 1:
+            raise ValueError("max_entries debe ser al menos 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ProcessLocal:
+    """Recurso que se crea al usarse por primera vez y de nuevo en cada proceso.
+
+    Tras un fork (por ejemplo, los workers de un servidor con varios procesos) el
+    hijo hereda las conexiones SQLite del padre, que no pueden compartirse entre
+    procesos, y ninguno de sus hilos. Por eso las conexiones y los hilos de este
+    proyecto no se crean al importar los módulos sino al primer uso, y se vuelven a
+    crear si cambia el pid. No es seguro entre hilos: quien lo usa lo protege con su
+    propio lock.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._pid = None
+        self._value = None
+
+    def get(self):
+        if self._pid != os.getpid():
+            self._value = self.factory()
+            self._pid = os.getpid()
+        return self._value
+
+    def pop(self):
+        """Olvida el recurso y lo devuelve si se creó en este proceso (si no, None)."""
+        value = self._value if self._pid == os.getpid() else None
+        self._value = None
+        self._pid = None
+        return value
+
+
+class SQLiteStore:
+    """Almacén clave-valor persistente en SQLite; los valores se guardan como JSON."""
+
+    def __init__(self, path, table="cache", ttl=None):
+        if not table.isidentifier():
+            raise ValueError(f"Nombre de tabla inválido: {table}")
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = ProcessLocal(lambda: sqlite3.connect(self.path, check_same_thread=False))
+        with self._lock, self._connection.get() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._connection.get().execute(f"SELECT value, expires FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        value, expires = row
+        if expires is not None and expires <= time.time():
+            self.delete(key)
+            return default
+        return json.loads(value)
+
+    def set(self, key, value):
+        expires = time.time() + self.ttl if self.ttl else None
+        with self._lock, self._connection.get() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires),
+            )
+
+    def delete(self, key):
+        with self._lock, self._connection.get() as connection:
+            connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.get().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            connection = self._connection.pop()
+            if connection is not None:
+                connection.close()
+
+
+class TieredCache:
+    """Caché de dos niveles: LRU en memoria y, opcionalmente, un almacén persistente.
+
+    Los aciertos del almacén persistente se promocionan a memoria.
+    """
+
+    def __init__(self, memory, store=None):
+        self.memory = memory
+        self.store = store
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def get(self, key, count_miss=True):
+        # Con count_miss=False un fallo no se cuenta, para comprobar la caché antes de otra consulta que sí lo cuenta
+        value = self.memory.get(key)
+        if value is not None:
+            self._count("memory_hits")
+            return value
+        if self.store is not None:
+            value = self.store.get(key)
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("store_hits")
+                return value
+        if count_miss:
+            self._count("misses")
+        return None
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.store is not None:
+            self.store.set(key, value)
+
+    async def first_async(self, keys, count_miss=True):
+        """Devuelve `(clave, valor)` de la primera de `keys` que está en caché, o `(None, None)`.
+
+        Versión para el bucle de eventos: se consulta la memoria para todas las claves
+        y, solo si ninguna está, el almacén persistente en un único hilo aparte, de modo
+        que un disco lento no detiene al resto de peticiones.
+        """
+        for key in keys:
+            value = self.memory.get(key)
+            if value is not None:
+                self._count("memory_hits")
+                return key, value
+        if self.store is not None:
+            key, value = await asyncio.to_thread(self._first_in_store, keys)
+            if value is not None:
+                self.memory.set(key, value)
+                self._count("store_hits")
+                return key, value
+        if count_miss:
+            self._count("misses")
+        return None, None
+
+    async def get_async(self, key, count_miss=True):
+        return (await self.first_async([key], count_miss))[1]
+
+    async def set_async(self, key, value):
+        # La escritura en el almacén persistente (con su commit) se hace en un hilo aparte, como las lecturas
+        self.memory.set(key, value)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, value)
+
+    def _first_in_store(self, keys):
+        for key in keys:
+            value = self.store.get(key)
+            if value is not None:
+                return key, value
+        return None, None
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.store_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_max_entries": self.memory.max_entries,
+                "evictions": self.memory.evictions,
+                "persistent": self.store is not None,
+            }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class SingleFlight:
+    """Agrupa las llamadas asíncronas concurrentes con la misma clave en una sola ejecución.
+
+    La ejecución compartida corre en su propia tarea, de modo que si el primer
+    solicitante se cancela el resto sigue recibiendo el resultado.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.coalesced = 0
+
+    async def do(self, key, factory):
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Evita avisos de excepción no recuperada si todos los solicitantes se cancelaron
+        if not task.cancelled():
+            task.exception()
+
+
+class ResponseCache:
+    """Caché de resultados asíncronos con TTL, tamaño acotado y coalescencia de peticiones en curso."""
+
+    def __init__(self, max_entries=5000, ttl=None, store=None):
+        self.cache = TieredCache(LRUCache(max_entries, ttl), store)
+        self.flights = SingleFlight()
+
+    async def get_or_compute(self, key, factory):
+        value = await self.cache.get_async(key)
+        if value is not None:
+            return value
+
+        async def compute():
+            result = await factory()
+            await self.cache.set_async(key, result)
+            return result
+
+        return await self.flights.do(key, compute)
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats["coalesced"] = self.flights.coalesced
+        stats["in_flight"] = self.flights.in_flight()
+        return stats
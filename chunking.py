@@ -0,0 +1,110 @@
+import re
+from typing import NamedTuple
+
+# Límite de tokens de los modelos cuyo tokenizer no declara uno razonable (model_max_length enorme)
+DEFAULT_MAX_TOKENS = 512
+
+
+class TextChunker:
+    """Divide los textos más largos que el límite del modelo en ventanas solapadas de tokens.
+
+    Las ventanas se cortan por los offsets de carácter del tokenizer, así que cada
+    una es un fragmento literal del texto original y cabe en el modelo junto con
+    sus tokens especiales. Dos ventanas consecutivas comparten `stride` tokens para
+    no perder el contexto en los cortes. El coste es lineal en la longitud del texto.
+    """
+
+    def __init__(self, tokenizer, max_tokens=None, stride=64):
+        limit = max_tokens or getattr(tokenizer, "model_max_length", DEFAULT_MAX_TOKENS)
+        if limit > 100_000:
+            limit = DEFAULT_MAX_TOKENS
+        self.tokenizer = tokenizer
+        self.max_tokens = limit - tokenizer.num_special_tokens_to_add()
+        if not 0 <= stride < self.max_tokens:
+            raise ValueError(f"stride debe estar entre 0 y {self.max_tokens - 1}")
+        self.stride = stride
+
+    def is_short(self, text):
+        # Cota conservadora sin tokenizar: un texto no produce más de dos tokens por carácter
+        return len(text) * 2 <= self.max_tokens
+
+    def split(self, text):
+        if self.is_short(text):
+            return [text]
+        offsets = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        if len(offsets) <= self.max_tokens:
+            return [text]
+
+        windows = []
+        step = self.max_tokens - self.stride
+        for start in range(0, len(offsets), step):
+            end = min(start + self.max_tokens, len(offsets))
+            windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+            if end == len(offsets):
+                break
+        return windows
+
+
+def aggregate_scores(predictions, weights):
+    """Combina las puntuaciones de las ventanas de un texto en una sola predicción.
+
+    Cada predicción es la lista de `{"label", "score"}` de todas las etiquetas; la
+    puntuación de cada etiqueta es la media ponderada por el peso de cada ventana
+    (su longitud). El resultado se ordena de mayor a menor puntuación.
+    """
+    if len(predictions) == 1:
+        return predictions[0]
+    total = sum(weights)
+    scores = {}
+    for prediction, weight in zip(predictions, weights):
+        for item in prediction:
+            scores[item["label"]] = scores.get(item["label"], 0.0) + item["score"] * weight / total
+    return [{"label": label, "score": score} for label, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)]
+
+
+def length_buckets(lengths, max_batch_size, max_padding=0.3, min_length=64):
+    """Agrupa los índices de `lengths` en lotes de longitud parecida.
+
+    Los textos se ordenan por longitud y se abre un lote nuevo cuando el relleno
+    (padding) necesario para igualarlos superaría `max_padding` del lote o cuando
+    se alcanza `max_batch_size`. Las longitudes menores que `min_length` cuentan
+    como `min_length`: en textos cortos el relleno es barato y compensa un único lote.
+    """
+    buckets = []
+    current, real = [], 0
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        length = max(lengths[index], min_length)
+        # Al estar ordenados, el último texto añadido es el más largo del lote
+        padded = (len(current) + 1) * length
+        if current and (len(current) == max_batch_size or padded - (real + length) > max_padding * padded):
+            buckets.append(current)
+            current, real = [], 0
+        current.append(index)
+        real += length
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+# Oración: desde el primer carácter visible hasta la puntuación final (con comillas o paréntesis de cierre)
+# seguida de un espacio, hasta un salto de línea o hasta el final del texto
+SENTENCE = re.compile(r"\S.*?(?:[.!?…]+[\"'»”)\]]*(?=\s|$)|(?=\n)|$)", re.DOTALL)
+
+
+class Sentence(NamedTuple):
+    text: str
+    start: int
+    end: int
+
+
+def split_sentences(text):
+    """Divide un texto en oraciones con su posición (inicio y fin) en el texto original.
+
+    La división es local: editar una oración no cambia cómo se dividen las demás,
+    de modo que sus resultados pueden reutilizarse.
+    """
+    sentences = []
+    for match in SENTENCE.finditer(text):
+        sentence = match.group().rstrip()
+        sentences.append(Sentence(sentence, match.start(), match.start() + len(sentence)))
+    return sentences
@@ -0,0 +1,194 @@
+import re
+from typing import NamedTuple
+
+from cache import normalize_text
+
+QUIEN = "quién"
+QUE = "qué"
+CUANDO = "cuándo"
+DONDE = "dónde"
+SLOTS = (QUIEN, QUE, CUANDO, DONDE)
+
+WEEKDAYS = r"lunes|martes|miércoles|jueves|viernes|sábado|domingo"
+MONTHS = r"enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|setiembre|octubre|noviembre|diciembre"
+NUMBERS = r"\d+|un|una|dos|tres|cuatro|cinco|seis|siete|ocho|nueve|diez|quince|veinte|treinta"
+UNITS = r"minutos?|horas?|días?|semanas?|mes|meses|años?"
+
+# Verbo que introduce el compromiso, con pronombres átonos y negación opcionales delante
+COMMITMENT_VERB = re.compile(
+    r"\b(?:no\s+)?(?:(?:me|te|se|nos|os|le|les|lo|la|los|las)\s+)?"
+    r"(?P<verb>voy|vas|va|vamos|vais|van|iré|irás|irá|iremos|irán)\s+a\s+"
+    r"|\b(?P<pledge>me comprometo|nos comprometemos|se compromete|se comprometen|prometo|prometemos|promete|prometen|quedo en|quedamos en)\b",
+    re.IGNORECASE,
+)
+
+# Sujeto implícito de las formas en primera persona
+IMPLICIT_SUBJECTS = {
+    "voy": "Yo", "iré": "Yo", "me comprometo": "Yo", "prometo": "Yo", "quedo en": "Yo",
+    "vamos": "Nosotros", "iremos": "Nosotros", "nos comprometemos": "Nosotros", "prometemos": "Nosotros", "quedamos en": "Nosotros",
+}
+
+TIME_OF_DAY = r"(?:\s+a\s+las?\s+\d{1,2}(?::\d{2})?(?:\s*(?:h|horas|de la (?:mañana|tarde|noche)))?)?"
+WHEN = re.compile(
+    r"(?:\b(?:antes|después)\s+del?\s+|\bpara\s+(?:el\s+|la\s+)?|\ba más tardar\s+(?:el\s+)?|\bhasta\s+(?:el\s+)?)*"
+    r"(?P<when>"
+    r"(?:\bel\s+)?\b\d{4}-\d{1,2}-\d{1,2}\b" + TIME_OF_DAY
+    + r"|(?:\bel\s+)?\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b" + TIME_OF_DAY
+    + r"|\b(?:el\s+)?(?:(?:" + WEEKDAYS + r")\s+)?\d{1,2}\s+de\s+(?:" + MONTHS + r")(?:\s+del?\s+\d{4})?" + TIME_OF_DAY
+    + r"|\bpasado mañana\b" + TIME_OF_DAY
+    + r"|\bmañana(?:\s+por la (?:mañana|tarde|noche))?\b" + TIME_OF_DAY
+    + r"|\bhoy(?:\s+mismo)?\b" + TIME_OF_DAY
+    + r"|\besta\s+(?:mañana|tarde|noche|semana)\b" + TIME_OF_DAY
+    + r"|\beste\s+(?:mes|año|fin de semana|" + WEEKDAYS + r")\b" + TIME_OF_DAY
+    + r"|\b(?:la\s+|el\s+)?(?:próxima|próximo|siguiente)\s+(?:semana|mes|año|" + WEEKDAYS + r")\b" + TIME_OF_DAY
+    + r"|\b(?:el\s+)?(?:" + WEEKDAYS + r")(?:\s+que viene|\s+próximo)?\b" + TIME_OF_DAY
+    + r"|\b(?:el\s+)?fin de semana\b"
+    + r"|\b(?:todos los (?:días|lunes|martes|miércoles|jueves|viernes|sábados|domingos|meses)|todas las (?:semanas|mañanas|tardes|noches)"
+    + r"|cada\s+(?:día|semana|mes|año|" + WEEKDAYS + r"))\b" + TIME_OF_DAY
+    + r"|\b(?:dentro de|en)\s+(?:" + NUMBERS + r")\s+(?:" + UNITS + r")\b"
+    + r"|\ba\s+las?\s+\d{1,2}(?::\d{2})?(?:\s*(?:h|horas|de la (?:mañana|tarde|noche)))?"
+    + r")",
+    re.IGNORECASE,
+)
+# Restos que indican una fecha que las reglas no han sabido interpretar
+DATE_CUES = re.compile(r"\d|\b(?:" + WEEKDAYS + r"|" + MONTHS + r")\b", re.IGNORECASE)
+
+# Lugar: último complemento "en ..." al final de la frase
+WHERE = re.compile(r"\b(?:en\s+)+(?P<where>(?:(?!\ben\b)[^,;])+?)\s*$", re.IGNORECASE)
+DETERMINERS = {"el", "la", "los", "las", "un", "una", "mi", "mis", "tu", "tus", "su", "sus", "este", "esta",
+               "nuestro", "nuestra", "nuestros", "nuestras"}
+PLACE_NOUNS = {
+    "oficina", "oficinas", "sala", "salón", "casa", "calle", "despacho", "edificio", "planta", "piso", "aula",
+    "almacén", "tienda", "sede", "escuela", "colegio", "universidad", "hospital", "parque", "restaurante",
+    "cafetería", "bar", "hotel", "aeropuerto", "estación", "reunión", "laboratorio", "fábrica", "biblioteca",
+    "centro", "ciudad", "pueblo", "barrio", "plaza", "local", "nave", "obra", "campus", "auditorio",
+    "gimnasio", "banco", "mercado", "supermercado", "cliente", "recepción", "entrada", "puerta", "cocina",
+}
+
+# Sujetos de más palabras suelen indicar una frase compleja que es mejor dejar al modelo de lenguaje
+MAX_SUBJECT_WORDS = 6
+# Palabras que indican que lo que precede al verbo es otra oración ("Creo que", "Si llueve", "Dice que Ana")
+# y no el sujeto del compromiso: conjunciones y verbos conjugados habituales en esa posición
+CLAUSE_MARKERS = {
+    "que", "si", "porque", "aunque", "cuando", "como", "donde", "mientras", "ojalá", "quizá", "quizás", "tal", "igual",
+    "creo", "crees", "cree", "creemos", "creen", "pienso", "piensa", "pensamos", "piensan", "dice", "dicen", "digo",
+    "dijo", "dijeron", "parece", "parecen", "espero", "esperamos", "supongo", "imagino", "dudo", "temo", "opino",
+    "sé", "sabe", "sabemos", "saben", "es", "son", "era", "fue", "está", "están", "estoy", "hay", "ha", "han", "he",
+    "hemos", "había", "puede", "pueden", "debe", "deben",
+}
+
+
+class Extraction(NamedTuple):
+    slots: dict
+    unresolved: frozenset
+
+
+def clean(text):
+    return " ".join(text.replace(" ,", ",").split()).strip(" ,;:.").strip()
+
+
+class CommitmentExtractor:
+    """Extrae quién, qué, cuándo y dónde de un compromiso con reglas para las frases habituales.
+
+    Devuelve también las partes que no ha podido resolver con seguridad, para que
+    solo esas se pidan al modelo de lenguaje. Con `ner` (una función que recibe una
+    lista de textos y devuelve sus entidades, ver `load_spacy`) se completan las
+    personas y lugares que las reglas no reconocen.
+    """
+
+    def extract(self, text, ner=None):
+        text = normalize_text(text).rstrip(".!?¡¿ ")
+        slots = dict.fromkeys(SLOTS, "")
+        verb = COMMITMENT_VERB.search(text)
+        if verb is None:
+            return Extraction(slots, frozenset(SLOTS))
+        unresolved = set()
+
+        # Cuándo: la primera expresión temporal, en cualquier parte de la frase
+        when = WHEN.search(text)
+        if when is not None:
+            slots[CUANDO] = re.sub(r"^(?:el|la)\s+", "", when.group("when"), flags=re.IGNORECASE)
+            before, after = text[:when.start()], text[when.end():]
+            if when.start() < verb.start():
+                subject, action = before + after[:verb.start() - when.end()], after[verb.start() - when.end():]
+            else:
+                subject, action = text[:verb.start()], text[verb.start():when.start()] + after
+        else:
+            subject, action = text[:verb.start()], text[verb.start():]
+        if DATE_CUES.search(subject + " " + action):
+            unresolved.add(CUANDO)
+
+        # Dónde: el último complemento "en ..." si su núcleo es un lugar conocido o un nombre propio
+        where = WHERE.search(action)
+        place = None
+        if where is not None:
+            place = clean(where.group("where"))
+            if is_place(place):
+                slots[DONDE] = place
+                action = action[:where.start()]
+            else:
+                unresolved.add(DONDE)
+
+        # Quién: lo que precede al verbo (sin muletillas ni comas) o el sujeto implícito de la primera persona.
+        # Si eso parece otra oración, se deja al modelo de lenguaje (tampoco lo completa el NER)
+        subject = clean(subject)
+        if is_clause(subject):
+            unresolved.add(QUIEN)
+            subject = ""
+        elif subject:
+            if len(subject.split()) > MAX_SUBJECT_WORDS:
+                unresolved.add(QUIEN)
+            else:
+                slots[QUIEN] = subject
+        else:
+            form = (verb.group("verb") or verb.group("pledge")).lower()
+            if form in IMPLICIT_SUBJECTS:
+                slots[QUIEN] = IMPLICIT_SUBJECTS[form]
+            else:
+                unresolved.add(QUIEN)
+
+        if ner is not None and unresolved & {QUIEN, DONDE}:
+            for entity, label in ner([text])[0]:
+                if label == "PER" and QUIEN in unresolved and entity in subject:
+                    slots[QUIEN] = subject
+                    unresolved.discard(QUIEN)
+                elif label == "LOC" and DONDE in unresolved and entity in place:
+                    # El complemento de lugar que las reglas no reconocían contiene un lugar
+                    slots[DONDE] = place
+                    action = action[:where.start()]
+                    unresolved.discard(DONDE)
+
+        # Qué: la acción desde el verbo, sin la fecha ni el lugar
+        slots[QUE] = clean(re.sub(r"\s+(?:y|e)\s*$", "", clean(action)))
+        if not re.search(r"\w+\s+\w+", slots[QUE]):
+            unresolved.add(QUE)
+
+        for slot in unresolved:
+            slots[slot] = ""
+        return Extraction(slots, frozenset(unresolved))
+
+
+def is_clause(subject):
+    return any(word in CLAUSE_MARKERS for word in re.findall(r"\w+", subject.lower()))
+
+
+def is_place(place):
+    # El núcleo del complemento es un lugar conocido o un nombre propio sin determinante ("en Madrid")
+    words = place.split()
+    head = next((word for word in words if word.lower() not in DETERMINERS), "")
+    return head.lower() in PLACE_NOUNS or (head[:1].isupper() and words[0].lower() not in DETERMINERS)
+
+
+def load_spacy(model_name):
+    """Carga un pipeline de spaCy y devuelve una función que obtiene las entidades de una lista de textos."""
+    # spaCy y su modelo en español son dependencias opcionales (requirements-ner.txt)
+    import spacy
+
+    nlp = spacy.load(model_name)
+    # Solo se necesita el reconocimiento de entidades
+    nlp.select_pipes(disable=[name for name in nlp.pipe_names if name not in ("tok2vec", "ner")])
+
+    def entities(texts):
+        return [[(entity.text, entity.label_) for entity in doc.ents] for doc in nlp.pipe(texts)]
+
+    return entities
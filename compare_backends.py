@@ -0,0 +1,133 @@
+"""Compara los backends de inferencia de los modelos locales (PyTorch frente a ONNX Runtime).
+
+Para cada modelo mide el tiempo de carga, la memoria residente añadida, la latencia
+de un texto, el rendimiento en lotes y la deriva de etiquetas y puntuaciones del
+backend ONNX respecto a PyTorch. Termina con código 1 si la deriva supera la tolerancia.
+
+Uso:
+    python compare_backends.py [--quantize] [--texts textos.txt] [--tolerance 0.05] [--output resultados.json]
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+
+from benchmarks.results import percentile, rss_mb
+from inference_backends import ONNX, PYTORCH, load_pipeline
+from main import EMOTION_MODEL, ONNX_CACHE_DIR, SENTIMENT_MODEL, TORCH_THREADS
+
+MODELS = {
+    "sentiment": ("sentiment-analysis", SENTIMENT_MODEL),
+    "emotions": ("text-classification", EMOTION_MODEL),
+}
+
+SAMPLE_TEXTS = [
+    "Estoy muy feliz con el resultado de la reunión.",
+    "No creo que eso funcione.",
+    "Voy a enviar el informe mañana.",
+    "¿Estás seguro de esto?",
+    "Me siento un poco triste por la noticia.",
+    "Tengo miedo de que no lleguemos a tiempo.",
+    "Estoy de acuerdo con lo que dijiste.",
+    "El clima hoy es agradable.",
+    "I love this!",
+    "This is the worst meeting we have ever had.",
+    "I am surprised that nobody noticed the error.",
+    "We are really angry about the delay.",
+    "12345",
+    "Juan va a hacer cambio en la base de datos mañana en la oficina.",
+    "Creo que la tierra es plana y otros dicen que es redonda.",
+    "Leí tu mensaje.",
+]
+
+
+def measure(task, model_id, backend, quantize, texts, batch_size, repeats):
+    gc.collect()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    model = load_pipeline(task, model_id, backend, quantize, ONNX_CACHE_DIR, TORCH_THREADS, top_k=None)
+    load_seconds = time.perf_counter() - started
+    model(texts[:1])
+
+    latencies = []
+    for _ in range(repeats):
+        for text in texts:
+            started = time.perf_counter()
+            model(text)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        predictions = model(texts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - started
+
+    metrics = {
+        "load_seconds": round(load_seconds, 3),
+        "rss_mb": round(rss_mb() - rss_before, 1),
+        "latency_ms_p50": round(statistics.median(latencies), 2),
+        "latency_ms_p95": round(percentile(latencies, 0.95), 2),
+        "throughput_texts_per_second": round(len(texts) * repeats / batch_seconds, 1),
+    }
+    del model
+    return metrics, predictions
+
+
+def drift(reference, candidate):
+    # Compara, texto a texto, la etiqueta principal y la puntuación de cada etiqueta
+    agreements = 0
+    differences = []
+    for expected, actual in zip(reference, candidate):
+        expected_scores = {item["label"]: item["score"] for item in expected}
+        actual_scores = {item["label"]: item["score"] for item in actual}
+        if max(expected_scores, key=expected_scores.get) == max(actual_scores, key=actual_scores.get):
+            agreements += 1
+        differences.extend(abs(score - actual_scores.get(label, 0.0)) for label, score in expected_scores.items())
+    return {
+        "label_agreement": agreements / len(reference),
+        "max_score_diff": max(differences),
+        "mean_score_diff": statistics.mean(differences),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los backends PyTorch y ONNX Runtime de los modelos locales.")
+    parser.add_argument("--models", default="sentiment,emotions", help="Modelos a comparar, separados por comas.")
+    parser.add_argument("--quantize", action="store_true", help="Cuantiza dinámicamente a int8 el modelo ONNX.")
+    parser.add_argument("--texts", help="Archivo con un texto por línea (por defecto, una muestra incluida).")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Diferencia máxima admitida en las puntuaciones.")
+    parser.add_argument("--min-agreement", type=float, default=0.95, help="Proporción mínima de etiquetas principales coincidentes.")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as texts_file:
+            texts = [line.strip() for line in texts_file if line.strip()]
+
+    report = {"quantized": args.quantize, "texts": len(texts), "models": {}}
+    passed = True
+    for name in args.models.split(","):
+        task, model_id = MODELS[name.strip()]
+        pytorch_metrics, reference = measure(task, model_id, PYTORCH, False, texts, args.batch_size, args.repeats)
+        onnx_metrics, candidate = measure(task, model_id, ONNX, args.quantize, texts, args.batch_size, args.repeats)
+        model_drift = drift(reference, candidate)
+        model_drift["within_tolerance"] = (
+            model_drift["max_score_diff"] <= args.tolerance and model_drift["label_agreement"] >= args.min_agreement
+        )
+        passed = passed and model_drift["within_tolerance"]
+        report["models"][name] = {PYTORCH: pytorch_metrics, ONNX: onnx_metrics, "drift": model_drift}
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
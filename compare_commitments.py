@@ -0,0 +1,117 @@
+"""Compara la extracción local de /compromiso (reglas y, opcionalmente, NER) con la del modelo de lenguaje.
+
+Para cada parte del compromiso (quién, qué, cuándo, dónde) mide la fracción de
+textos que las reglas resuelven y, de esas, cuántas coinciden con la respuesta
+del modelo de lenguaje. Incluye también la fracción de textos que se resolverían
+sin llamar al modelo de lenguaje y la latencia de ambos caminos.
+
+Uso:
+    python compare_commitments.py [--texts textos.txt] [--ner es_core_news_sm] [--output resultados.json]
+
+Las llamadas al modelo de lenguaje usan la configuración del servicio (`OPENAI_API_KEY`,
+`OPENAI_BASE_URL`, `LLM_MULTITASK`), así que puede ejecutarse contra el servidor falso de
+`benchmarks.fake_openai` para probar el script sin conexión.
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import time
+
+from benchmarks.results import percentile
+from commitment_extractor import SLOTS, CommitmentExtractor, load_spacy
+from main import commitment_with_llm, llm_client
+
+SAMPLE_TEXTS = [
+    "Juan va a hacer cambio en la base de datos mañana en la oficina.",
+    "Vale Puente, voy a pasear a mi perrita antes del 2024-08-21 en la calle.",
+    "Voy a enviar el informe mañana.",
+    "María se compromete a revisar el contrato el viernes en la sede.",
+    "Vamos a preparar la presentación para el 15 de marzo en la sala de reuniones.",
+    "Me comprometo a llamar al cliente esta tarde.",
+    "El equipo de ventas va a cerrar el trimestre antes del 30/06.",
+    "Pedro va a arreglar la impresora en la planta dos el lunes que viene.",
+    "Prometo estudiar al menos dos horas todos los días.",
+    "Ana y Luis van a organizar la reunión la próxima semana en Madrid.",
+    "Quedamos en revisar los presupuestos a las 10 en el despacho de Marta.",
+    "Va a mandar las facturas en dos días.",
+    "La directora irá a firmar el acuerdo el 3 de abril en la notaría.",
+    "Estudiar al menos dos horas todos los días.",
+]
+
+
+def normalize(value):
+    # Comparación laxa: sin mayúsculas, puntuación ni artículo inicial
+    value = re.sub(r"[^\w\s/:-]", "", value.lower()).strip()
+    return re.sub(r"^(?:el|la|los|las)\s+", "", " ".join(value.split()))
+
+
+async def extract_with_llm(texts):
+    slots, latencies = [], []
+    try:
+        for text in texts:
+            started = time.perf_counter()
+            slots.append(await commitment_with_llm(text))
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        await llm_client.aclose()
+    return slots, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara la extracción local de compromisos con la del modelo de lenguaje.")
+    parser.add_argument("--texts", help="Archivo con un texto por línea (por defecto, una muestra incluida).")
+    parser.add_argument("--ner", help="Pipeline de spaCy con el que completar personas y lugares (por ejemplo, es_core_news_sm).")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as texts_file:
+            texts = [line.strip() for line in texts_file if line.strip()]
+
+    extractor = CommitmentExtractor()
+    ner = load_spacy(args.ner) if args.ner else None
+    extractions, local_latencies = [], []
+    for text in texts:
+        started = time.perf_counter()
+        extractions.append(extractor.extract(text, ner))
+        local_latencies.append((time.perf_counter() - started) * 1000)
+
+    llm_slots, llm_latencies = asyncio.run(extract_with_llm(texts))
+
+    slots_report = {}
+    for slot in SLOTS:
+        resolved = [(extraction.slots[slot], expected[slot]) for extraction, expected in zip(extractions, llm_slots) if slot not in extraction.unresolved]
+        agreements = sum(normalize(actual) == normalize(expected) for actual, expected in resolved)
+        slots_report[slot] = {
+            "resolved_fraction": len(resolved) / len(texts),
+            "agreement": agreements / len(resolved) if resolved else None,
+        }
+
+    report = {
+        "texts": len(texts),
+        "ner": args.ner,
+        "fully_local_fraction": sum(not extraction.unresolved for extraction in extractions) / len(texts),
+        "slots": slots_report,
+        "latency_ms": {
+            "local": {"p50": round(statistics.median(local_latencies), 3), "p95": round(percentile(local_latencies, 0.95), 3)},
+            "llm": {"p50": round(statistics.median(llm_latencies), 1), "p95": round(percentile(llm_latencies, 0.95), 1)},
+        },
+        "disagreements": [
+            {"texto": text, "local": extraction.slots, "llm": expected}
+            for text, extraction, expected in zip(texts, extractions, llm_slots)
+            if any(slot not in extraction.unresolved and normalize(extraction.slots[slot]) != normalize(expected[slot]) for slot in SLOTS)
+        ],
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+
+
+if __name__ == "__main__":
+    main()
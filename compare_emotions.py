@@ -0,0 +1,118 @@
+"""Compara los dos modos de /emotions: traducción al inglés (`translate`) frente al modelo en español (`native`).
+
+Para cada texto mide la latencia de ambos caminos (en `translate`, traducción más
+inferencia) y si coinciden en la emoción principal, ya en el vocabulario de la API.
+Incluye también cuántos textos detecta como inglés el detector de idioma y, por
+tanto, no pasan por el traductor.
+
+Uso:
+    python compare_emotions.py [--texts textos.txt] [--native-model pysentimiento/robertuito-emotion-analysis] [--output resultados.json]
+
+El modo `translate` llama al traductor (Google Translate), así que necesita conexión.
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.results import percentile
+from inference_backends import load_pipeline
+from language import detect_language
+from main import (
+    EMOTION_MODEL, EMOTION_NATIVE_MODEL, INFERENCE_BACKEND, NATIVE_EMOTION_LABELS, ONNX_CACHE_DIR, ONNX_QUANTIZE,
+    TORCH_THREADS, emotion_translation, map_emotion_labels,
+)
+from translation import TranslationCache, make_translator
+
+SAMPLE_TEXTS = [
+    "Estoy muy feliz con el resultado de la reunión.",
+    "Me siento un poco triste por la noticia.",
+    "Tengo miedo de que no lleguemos a tiempo.",
+    "Estoy harto de que siempre llegues tarde.",
+    "¡No me lo puedo creer, han aprobado el proyecto!",
+    "Te quiero mucho, gracias por estar siempre ahí.",
+    "Qué asco me da esta situación.",
+    "Me preocupa mucho la salud de mi madre.",
+    "Hoy ha sido un día maravilloso con mis amigos.",
+    "Estoy furioso con la decisión del comité.",
+    "Me sorprendió que nadie se diera cuenta del error.",
+    "Echo de menos a mi familia.",
+    "El clima hoy es agradable.",
+    "I love this!",
+    "We are really angry about the delay.",
+    "I am surprised that nobody noticed the error.",
+]
+
+
+def main_emotion(prediction):
+    return emotion_translation[max(prediction, key=lambda emotion: emotion["score"])["label"]]
+
+
+def summary(latencies):
+    return {"p50": round(statistics.median(latencies), 1), "p95": round(percentile(latencies, 0.95), 1)}
+
+
+def run_translate(texts):
+    # Sin caché persistente: cada texto se traduce una vez, como la primera petición al servicio
+    model = load_pipeline("text-classification", EMOTION_MODEL, INFERENCE_BACKEND, ONNX_QUANTIZE, ONNX_CACHE_DIR, TORCH_THREADS, top_k=None)
+    translations = TranslationCache(make_translator, detect_language=detect_language)
+    model(texts[:1])
+    predictions, latencies = [], []
+    for text in texts:
+        started = time.perf_counter()
+        predictions.append(model(translations.translate(text), truncation=True))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return predictions, latencies, translations.stats()
+
+
+def run_native(texts, model_id):
+    model = load_pipeline("text-classification", model_id, INFERENCE_BACKEND, ONNX_QUANTIZE, ONNX_CACHE_DIR, TORCH_THREADS, top_k=None)
+    model(texts[:1])
+    predictions, latencies = [], []
+    for text in texts:
+        started = time.perf_counter()
+        predictions.append(map_emotion_labels(model(text, truncation=True), NATIVE_EMOTION_LABELS))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return predictions, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara el análisis de emociones con traducción frente al modelo nativo en español.")
+    parser.add_argument("--texts", help="Archivo con un texto por línea (por defecto, una muestra incluida).")
+    parser.add_argument("--native-model", default=EMOTION_NATIVE_MODEL, help="Modelo de emociones en español o multilingüe.")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados.")
+    args = parser.parse_args()
+
+    texts = SAMPLE_TEXTS
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as texts_file:
+            texts = [line.strip() for line in texts_file if line.strip()]
+
+    translate_predictions, translate_latencies, translation_stats = run_translate(texts)
+    native_predictions, native_latencies = run_native(texts, args.native_model)
+    translate_labels = [main_emotion(prediction) for prediction in translate_predictions]
+    native_labels = [main_emotion(prediction) for prediction in native_predictions]
+
+    report = {
+        "texts": len(texts),
+        "models": {"translate": EMOTION_MODEL, "native": args.native_model},
+        "english_detected": sum(detect_language(text) == "en" for text in texts),
+        "translator_calls": translation_stats["translator_calls"],
+        "agreement": sum(a == b for a, b in zip(translate_labels, native_labels)) / len(texts),
+        "latency_ms": {"translate": summary(translate_latencies), "native": summary(native_latencies)},
+        "disagreements": [
+            {"texto": text, "translate": translate_label, "native": native_label}
+            for text, translate_label, native_label in zip(texts, translate_labels, native_labels)
+            if translate_label != native_label
+        ],
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+
+
+if __name__ == "__main__":
+    main()
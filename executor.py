@@ -0,0 +1,132 @@
+import asyncio
+import itertools
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Carriles de prioridad: el tráfico interactivo siempre se atiende antes que el de lotes
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+
+class ServiceOverloadedError(Exception):
+    """Se lanza cuando una cola de inferencia está llena; `retry_after` está en segundos."""
+
+    def __init__(self, retry_after=1):
+        super().__init__(f"Servicio saturado, reintentar en {retry_after} s")
+        self.retry_after = retry_after
+
+
+def estimate_retry_after(pending, avg_seconds, workers):
+    # Tiempo aproximado hasta que se libere la cola, redondeado hacia arriba
+    return max(1, math.ceil(pending * avg_seconds / max(1, workers)))
+
+
+class InferenceExecutor:
+    """Pool de hilos dedicado a la inferencia con colas acotadas por carril.
+
+    A diferencia del executor por defecto de asyncio, el número de hilos es fijo
+    y cada carril admite como máximo `max_queue` tareas en espera; por encima de
+    ese límite `submit` lanza `ServiceOverloadedError` en lugar de encolar.
+    """
+
+    def __init__(self, workers=2, max_queue=64, name="inference"):
+        if workers < 1:
+            raise ValueError("workers debe ser al menos 1")
+        if max_queue < 1:
+            raise ValueError("max_queue debe ser al menos 1")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.name = name
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pending = {lane: 0 for lane in LANE_NAMES}
+        self._completed = {lane: 0 for lane in LANE_NAMES}
+        self._rejected = {lane: 0 for lane in LANE_NAMES}
+        self._wait_total = {lane: 0.0 for lane in LANE_NAMES}
+        self._run_total = 0.0
+        self._running = 0
+
+    def submit(self, fn, *args, lane=INTERACTIVE, **kwargs):
+        """Encola `fn(*args, **kwargs)` en el carril indicado y devuelve un `Future`."""
+        if lane not in LANE_NAMES:
+            raise ValueError(f"Carril desconocido: {lane}")
+        self._ensure_workers()
+        future = Future()
+        with self._lock:
+            if self._pending[lane] >= self.max_queue:
+                self._rejected[lane] += 1
+                raise ServiceOverloadedError(self._retry_after_locked())
+            self._pending[lane] += 1
+        self._queue.put((lane, next(self._sequence), time.perf_counter(), fn, args, kwargs, future))
+        return future
+
+    async def run(self, fn, *args, lane=INTERACTIVE, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, lane=lane, **kwargs))
+
+    def retry_after(self):
+        with self._lock:
+            return self._retry_after_locked()
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(self._pending.values())
+
+    def stats(self):
+        with self._lock:
+            completed = sum(self._completed.values())
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "avg_run_ms": self._run_total / completed * 1000 if completed else 0.0,
+                "lanes": {
+                    name: {
+                        "pending": self._pending[lane],
+                        "completed": self._completed[lane],
+                        "rejected": self._rejected[lane],
+                        "avg_wait_ms": self._wait_total[lane] / self._completed[lane] * 1000 if self._completed[lane] else 0.0,
+                    }
+                    for lane, name in LANE_NAMES.items()
+                },
+            }
+
+    def _retry_after_locked(self):
+        completed = sum(self._completed.values())
+        avg_seconds = self._run_total / completed if completed else 1.0
+        return estimate_retry_after(sum(self._pending.values()) + self._running, avg_seconds, self.workers)
+
+    def _ensure_workers(self):
+        if len(self._threads) == self.workers and all(thread.is_alive() for thread in self._threads):
+            return
+        # Se crean al primer uso, no al crear el objeto, por los forks (ver `cache.ProcessLocal`)
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"{self.name}-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            lane, _, enqueued, fn, args, kwargs, future = self._queue.get()
+            started = time.perf_counter()
+            with self._lock:
+                self._pending[lane] -= 1
+                self._running += 1
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as exc:
+                    future.set_exception(exc)
+            finished = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self._completed[lane] += 1
+                self._wait_total[lane] += started - enqueued
+                self._run_total += finished - started
@@ -0,0 +1,42 @@
+# Configuración de gunicorn para el modo de producción con varios workers.
+# Se ejecuta con: gunicorn -c gunicorn.conf.py main:app
+import gc
+import os
+
+from dotenv import load_dotenv
+
+# Cargar variables de entorno desde el archivo .env
+load_dotenv()
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 8000)}"
+workers = int(os.getenv("WORKERS", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+graceful_timeout = 30
+
+# La aplicación se importa en el proceso maestro antes de crear los workers. Los pesos de los
+# modelos se cargan ahí una sola vez y los workers los comparten mediante copy-on-write.
+preload_app = True
+
+
+def when_ready(server):
+    import main
+
+    # Solo se cargan los pesos: ejecutar inferencia en el maestro arrancaría los hilos de torch,
+    # que no sobreviven a un fork. El calentamiento lo hace cada worker al arrancar.
+    main.models.load_all(warmup=False)
+    server.log.info("Modelos cargados en el proceso maestro: %s", main.models.status())
+
+
+def pre_fork(server, worker):
+    # Mueve los objetos existentes a una generación permanente para que el recolector de basura
+    # de cada worker no escriba en sus páginas y rompa el copy-on-write
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import torch
+
+    import main
+
+    torch.set_num_threads(main.TORCH_THREADS)
@@ -0,0 +1,68 @@
+import os
+import platform
+
+from transformers import AutoTokenizer, pipeline
+
+PYTORCH = "pytorch"
+ONNX = "onnx"
+BACKENDS = (PYTORCH, ONNX)
+
+# Nombre del archivo que genera el cuantizador dinámico de optimum
+QUANTIZED_FILE_NAME = "model_quantized.onnx"
+
+
+def load_pipeline(task, model_id, backend=PYTORCH, quantize=False, cache_dir=".onnx", threads=None, **pipeline_kwargs):
+    """Crea un pipeline de transformers para `model_id` con el backend de inferencia indicado.
+
+    Con el backend `onnx` el modelo se exporta a ONNX la primera vez (y, si se pide,
+    se cuantiza dinámicamente a int8) y se guarda en `cache_dir`; el pipeline
+    resultante devuelve las mismas etiquetas y la misma estructura que el de PyTorch.
+    """
+    if backend == PYTORCH:
+        return pipeline(task, model=model_id, **pipeline_kwargs)
+    if backend == ONNX:
+        model, tokenizer = load_onnx_model(model_id, quantize, cache_dir, threads)
+        return pipeline(task, model=model, tokenizer=tokenizer, **pipeline_kwargs)
+    raise ValueError(f"Backend de inferencia desconocido: {backend}. Opciones: {', '.join(BACKENDS)}")
+
+
+def load_onnx_model(model_id, quantize=False, cache_dir=".onnx", threads=None):
+    # optimum y onnxruntime son dependencias opcionales (requirements-onnx.txt)
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    export_dir = os.path.join(cache_dir, model_id.replace("/", "--"))
+    if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+        ORTModelForSequenceClassification.from_pretrained(model_id, export=True).save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_id).save_pretrained(export_dir)
+
+    model_dir, file_name = export_dir, "model.onnx"
+    if quantize:
+        model_dir, file_name = quantize_onnx_model(export_dir), QUANTIZED_FILE_NAME
+
+    session_options = onnxruntime.SessionOptions()
+    if threads:
+        session_options.intra_op_num_threads = threads
+        session_options.inter_op_num_threads = 1
+    model = ORTModelForSequenceClassification.from_pretrained(
+        model_dir,
+        file_name=file_name,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+    )
+    return model, AutoTokenizer.from_pretrained(export_dir)
+
+
+def quantize_onnx_model(export_dir):
+    """Cuantiza dinámicamente a int8 el modelo exportado y devuelve el directorio resultante."""
+    from optimum.onnxruntime import ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    quantized_dir = f"{export_dir}-int8"
+    if not os.path.exists(os.path.join(quantized_dir, QUANTIZED_FILE_NAME)):
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            config = AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        else:
+            config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(export_dir).quantize(save_dir=quantized_dir, quantization_config=config)
+    return quantized_dir
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from cache import ProcessLocal
+
+# Estados de un trabajo
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+# Estados de cada texto de un trabajo
+PENDING = "pending"
+DONE = "done"
+
+
+class Claim(NamedTuple):
+    job_id: str
+    analyses: list
+    positions: list
+    texts: list
+    attempts: list
+
+
+class JobStore:
+    """Trabajos de análisis persistidos en SQLite: sus textos, su estado y sus resultados.
+
+    Los workers reclaman los textos pendientes por fragmentos y los reservan durante
+    `lease_seconds`. Si el proceso se detiene antes de guardar los resultados, la
+    reserva caduca y otro worker (del mismo proceso tras reiniciarlo o de otro
+    proceso) vuelve a reclamar esos textos: los trabajos se reanudan sin repetir los
+    resultados ya guardados. Las reservas se hacen en transacciones `IMMEDIATE`, así
+    que varios procesos pueden compartir el mismo archivo. El archivo se abre (y se
+    crea si no existe) la primera vez que se usa, no al crear el objeto.
+    """
+
+    def __init__(self, path, lease_seconds=300.0, clock=time.time):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection = ProcessLocal(self._open)
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, analyses TEXT NOT NULL, "
+            "total INTEGER NOT NULL, completed INTEGER NOT NULL DEFAULT 0, created REAL NOT NULL, updated REAL NOT NULL, error TEXT)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS job_items (job_id TEXT NOT NULL, position INTEGER NOT NULL, text TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, lease_until REAL NOT NULL DEFAULT 0, result TEXT, "
+            "PRIMARY KEY (job_id, position))"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS job_items_pending ON job_items (status, job_id, lease_until)")
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            connection = self._connection.get()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def create(self, texts, analyses):
+        """Guarda un trabajo nuevo en la cola y devuelve su identificador."""
+        job_id = uuid.uuid4().hex
+        now = self.clock()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO jobs (id, status, analyses, total, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(analyses), len(texts), now, now),
+            )
+            connection.executemany(
+                "INSERT INTO job_items (job_id, position, text, status) VALUES (?, ?, ?, ?)",
+                ((job_id, position, text, PENDING) for position, text in enumerate(texts)),
+            )
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connection.get().execute(
+                "SELECT id, status, analyses, total, completed, created, updated, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job_id, status, analyses, total, completed, created, updated, error = row
+        return {
+            "id": job_id,
+            "status": status,
+            "analyses": json.loads(analyses),
+            "total": total,
+            "completed": completed,
+            "created": created,
+            "updated": updated,
+            "error": error,
+        }
+
+    def results(self, job_id, offset=0, limit=100):
+        """Resultados de los textos en las posiciones [offset, offset + limit); None en los que siguen pendientes."""
+        with self._lock:
+            rows = self._connection.get().execute(
+                "SELECT position, result FROM job_items WHERE job_id = ? AND position >= ? AND position < ? ORDER BY position",
+                (job_id, offset, offset + limit),
+            ).fetchall()
+        return [(position, json.loads(result) if result is not None else None) for position, result in rows]
+
+    def claim(self, limit):
+        """Reserva hasta `limit` textos pendientes del trabajo más antiguo, o devuelve None si no hay ninguno."""
+        now = self.clock()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT j.id, j.analyses FROM jobs j WHERE j.status IN (?, ?) AND EXISTS ("
+                "SELECT 1 FROM job_items i WHERE i.job_id = j.id AND i.status = ? AND i.lease_until <= ?) "
+                "ORDER BY j.created LIMIT 1",
+                (QUEUED, RUNNING, PENDING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, analyses = row
+            items = connection.execute(
+                "SELECT position, text, attempts FROM job_items WHERE job_id = ? AND status = ? AND lease_until <= ? "
+                "ORDER BY position LIMIT ?",
+                (job_id, PENDING, now, limit),
+            ).fetchall()
+            connection.executemany(
+                "UPDATE job_items SET lease_until = ?, attempts = attempts + 1 WHERE job_id = ? AND position = ?",
+                ((now + self.lease_seconds, job_id, position) for position, _, _ in items),
+            )
+            connection.execute("UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status = ?", (RUNNING, now, job_id, QUEUED))
+        return Claim(
+            job_id,
+            json.loads(analyses),
+            [position for position, _, _ in items],
+            [text for _, text, _ in items],
+            [attempts + 1 for _, _, attempts in items],
+        )
+
+    def complete(self, job_id, results):
+        """Guarda los resultados (`{posición: resultado}`) y marca el trabajo como completado si no quedan textos."""
+        now = self.clock()
+        with self._transaction() as connection:
+            saved = 0
+            for position, result in results.items():
+                # Un texto cuya reserva caducó puede terminarse dos veces: solo cuenta la primera
+                saved += connection.execute(
+                    "UPDATE job_items SET status = ?, result = ? WHERE job_id = ? AND position = ? AND status = ?",
+                    (DONE, json.dumps(result, ensure_ascii=False), job_id, position, PENDING),
+                ).rowcount
+            connection.execute(
+                "UPDATE jobs SET completed = completed + ?, updated = ?, "
+                "status = CASE WHEN completed + ? >= total AND status = ? THEN ? ELSE status END WHERE id = ?",
+                (saved, now, saved, RUNNING, COMPLETED, job_id),
+            )
+
+    def release(self, job_id, positions, delay=0.0):
+        """Devuelve a la cola los textos reservados para que se reintenten pasados `delay` segundos."""
+        with self._transaction() as connection:
+            connection.executemany(
+                "UPDATE job_items SET lease_until = ? WHERE job_id = ? AND position = ? AND status = ?",
+                ((self.clock() + delay, job_id, position, PENDING) for position in positions),
+            )
+
+    def fail(self, job_id, error):
+        with self._transaction() as connection:
+            connection.execute("UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?", (FAILED, error, self.clock(), job_id))
+
+    def stats(self):
+        with self._lock:
+            connection = self._connection.get()
+            jobs = dict(connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            pending = connection.execute(
+                "SELECT COUNT(*) FROM job_items i JOIN jobs j ON j.id = i.job_id WHERE i.status = ? AND j.status IN (?, ?)",
+                (PENDING, QUEUED, RUNNING),
+            ).fetchone()[0]
+        return {"jobs": {status: jobs.get(status, 0) for status in (QUEUED, RUNNING, COMPLETED, FAILED)}, "pending_texts": pending}
+
+    def close(self):
+        with self._lock:
+            connection = self._connection.pop()
+            if connection is not None:
+                connection.close()
+
+
+class JobRunner:
+    """Pool de workers asíncronos que procesa los textos pendientes de un `JobStore`.
+
+    `process(texts, analyses)` es una corrutina que devuelve, para cada texto, una
+    tupla `(resultado, reintentar)`. Los textos con un error transitorio (`reintentar`)
+    vuelven a la cola tras `retry_delay` segundos hasta agotar `max_attempts`
+    intentos; después se guarda el último resultado con su error. Los workers se
+    despiertan con `notify` al crear un trabajo y, si no, cada `poll_interval` segundos.
+    """
+
+    def __init__(self, store, process, workers=2, chunk_size=16, poll_interval=1.0, max_attempts=3, retry_delay=5.0):
+        if workers < 1:
+            raise ValueError("workers debe ser al menos 1")
+        self.store = store
+        self.process = process
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._tasks = []
+        self._wakeup = None
+        self.processed = 0
+        self.retried = 0
+        self.failed_jobs = 0
+
+    def start(self):
+        """Arranca los workers en el event loop actual (si no están ya en marcha)."""
+        loop = asyncio.get_running_loop()
+        if any(not task.done() and task.get_loop() is loop for task in self._tasks):
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_once(self):
+        """Procesa un fragmento de textos pendientes; devuelve False si no había ninguno."""
+        claim = await asyncio.to_thread(self.store.claim, self.chunk_size)
+        if claim is None:
+            return False
+        try:
+            outcomes = await self.process(claim.texts, claim.analyses)
+        except asyncio.CancelledError:
+            # Al apagar el servidor los textos reservados vuelven a la cola de inmediato
+            self.store.release(claim.job_id, claim.positions)
+            raise
+        except Exception as exc:
+            await asyncio.to_thread(self.store.fail, claim.job_id, repr(exc))
+            self.failed_jobs += 1
+            return True
+
+        results, retry = {}, []
+        for position, attempts, (result, retryable) in zip(claim.positions, claim.attempts, outcomes):
+            if retryable and attempts < self.max_attempts:
+                retry.append(position)
+            else:
+                results[position] = result
+        if retry:
+            self.retried += len(retry)
+            await asyncio.to_thread(self.store.release, claim.job_id, retry, self.retry_delay)
+        await asyncio.to_thread(self.store.complete, claim.job_id, results)
+        self.processed += len(results)
+        return True
+
+    def stats(self):
+        return {
+            "workers": sum(not task.done() for task in self._tasks),
+            "processed": self.processed,
+            "retried": self.retried,
+            "failed_jobs": self.failed_jobs,
+            **self.store.stats(),
+        }
+
+    async def _work(self):
+        while True:
+            # Se limpia antes de reclamar para no perder un aviso que llegue mientras tanto
+            self._wakeup.clear()
+            if await self.run_once():
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,42 @@
+import re
+
+# Palabras vacías frecuentes de cada idioma. Se excluyen las que existen en ambos ("a", "no", "me", "he"...)
+STOPWORDS = {
+    "en": frozenset(
+        "the and is are was were be been to of in on for with that this it you i we they my your our "
+        "not do does did have has had will would can could should what which who when where why how "
+        "there their them he she his her an at by from or but if so about just very really all am "
+        "it's i'm don't can't".split()
+    ),
+    "es": frozenset(
+        "el la los las y es son fue ser estar está están de del en por para con que este esta esto "
+        "eso yo tú nosotros ellos mi tu su nuestro pero si muy más ya también cuando donde porque "
+        "como qué cómo un una unos unas lo le les se nos hay todo todos mañana hoy".split()
+    ),
+}
+# Caracteres que solo aparecen en español
+SPANISH_CHARACTERS = re.compile(r"[ñáéíóú¿¡]")
+WORD = re.compile(r"[a-zñáéíóúü']+")
+
+
+def detect_language(text, min_hits=2):
+    """Detecta si un texto está en inglés o en español contando sus palabras vacías.
+
+    Devuelve "en", "es" o None si no hay pruebas suficientes (menos de `min_hits`
+    palabras vacías, o un idioma no domina claramente al otro). Es deliberadamente
+    conservadora con el inglés: basta un carácter propio del español para descartarlo.
+    """
+    lowered = text.lower()
+    hits = dict.fromkeys(STOPWORDS, 0)
+    for word in WORD.findall(lowered):
+        for language, stopwords in STOPWORDS.items():
+            if word in stopwords:
+                hits[language] += 1
+    if SPANISH_CHARACTERS.search(lowered):
+        hits["en"] = 0
+        hits["es"] += 1
+    language = max(hits, key=hits.get)
+    others = sum(count for other, count in hits.items() if other != language)
+    if hits[language] < min_hits or hits[language] <= 3 * others:
+        return None
+    return language
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+import httpx
+from openai import AsyncOpenAI
+
+
+class LLMClient:
+    """Cliente asíncrono de OpenAI compartido por todos los endpoints.
+
+    Mantiene un único pool de conexiones keep-alive y limita el número de
+    peticiones simultáneas al modelo. El cliente se crea de forma perezosa en el
+    event loop que lo usa por primera vez; si el loop cambia (por ejemplo, en el
+    `TestClient` de las pruebas) se crea uno nuevo para ese loop.
+    """
+
+    def __init__(self, api_key, model, base_url=None, timeout=30.0, max_connections=20,
+                 max_keepalive_connections=10, max_concurrency=16, max_retries=2, transport=None):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url or None
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        # Transporte httpx alternativo, útil para pruebas sin conexión
+        self.transport = transport
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.streams_cancelled = 0
+
+    def client(self):
+        """Devuelve el cliente de OpenAI asociado al event loop actual."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+                timeout=self.timeout,
+                transport=self.transport,
+            )
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=http_client,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._client
+
+    async def chat(self, messages, timeout=None, **kwargs):
+        """Envía una conversación al modelo y devuelve el texto de la respuesta."""
+        completion = await self.create(messages, timeout=timeout, **kwargs)
+        return completion.choices[0].message.content
+
+    async def create(self, messages, timeout=None, **kwargs):
+        client = self.client()
+        async with self._semaphore:
+            self._count(in_flight=1, requests=1)
+            try:
+                return await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    timeout=timeout or self.timeout,
+                    **kwargs,
+                )
+            except Exception:
+                self._count(errors=1)
+                raise
+            finally:
+                self._count(in_flight=-1)
+
+    async def stream(self, messages, timeout=None, **kwargs):
+        """Envía una conversación en modo streaming y devuelve, según llegan, los fragmentos de texto de la respuesta.
+
+        Si quien consume el generador lo cierra o se cancela (por ejemplo, porque el
+        cliente HTTP se desconecta), se cierra también la respuesta de OpenAI y deja
+        de generarse el resto del texto.
+        """
+        client = self.client()
+        async with self._semaphore:
+            self._count(in_flight=1, requests=1)
+            stream = None
+            try:
+                stream = await client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    timeout=timeout or self.timeout,
+                    stream=True,
+                    **kwargs,
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except (asyncio.CancelledError, GeneratorExit):
+                self._count(streams_cancelled=1)
+                raise
+            except Exception:
+                self._count(errors=1)
+                raise
+            finally:
+                if stream is not None:
+                    await stream.close()
+                self._count(in_flight=-1)
+
+    async def aclose(self):
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.close()
+        self._client = None
+        self._loop = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "model": self.model,
+                "base_url": self.base_url,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "errors": self.errors,
+                "streams_cancelled": self.streams_cancelled,
+            }
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
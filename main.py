@@ -1,28 +1,124 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from deep_translator import GoogleTranslator
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi import Query
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from transformers import pipeline
+from inference_backends import load_pipeline
 import asyncio
 import os
+import sys
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import APIError, APIStatusError, APITimeoutError
 import json
 from fastapi.responses import JSONResponse
 import argparse
 import re
+from batching import MicroBatcher
+from chunking import TextChunker, aggregate_scores, length_buckets, split_sentences
+from executor import InferenceExecutor, ServiceOverloadedError, INTERACTIVE, BULK
+from translation import make_translator, TranslationCache
+from language import detect_language
+from cache import LRUCache, SQLiteStore, ResponseCache, TieredCache, hash_key, normalize_text
+from llm_client import LLMClient
+from model_registry import ModelRegistry, ModelDisabledError
+from routing import ConfidenceRouter
+from resilience import CircuitBreaker, CircuitOpenError, RateLimiter, Upstream, UpstreamTimeoutError
+from jobs import JobRunner, JobStore
+from commitment_extractor import CommitmentExtractor, load_spacy
+from semantic_cache import SemanticCache, load_embedder
+from metrics import MetricsRegistry, MetricsMiddleware, CONTENT_TYPE, instrument_pipeline, stage_timer
+from contextlib import asynccontextmanager
+from typing import List, Literal
+import time
+import torch
 
 # Cargar variables de entorno desde el archivo .env
 load_dotenv()
 
-app = FastAPI(title="TextEdit API", description="API para análisis de sentimientos y emociones en texto.")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Carga y calienta los modelos en segundo plano para que el servidor acepte conexiones de inmediato
+    if MODEL_PRELOAD:
+        models.start_background_loading()
+    # Reanuda los trabajos de /jobs que quedaron pendientes antes de reiniciar
+    job_runner.start()
+    yield
+    await job_runner.stop()
+    # Cierra el pool de conexiones del cliente de OpenAI al apagar el servidor
+    await llm_client.aclose()
+
+app = FastAPI(title="TextEdit API", description="API para análisis de sentimientos y emociones en texto.", lifespan=lifespan)
+
+# Modelos locales habilitados (separados por comas) y carga en segundo plano al arrancar.
+# Si MODEL_PRELOAD está desactivado, cada modelo se carga la primera vez que se usa.
+ENABLED_MODELS = [name.strip() for name in os.getenv("ENABLED_MODELS", "sentiment,emotions").split(",") if name.strip()]
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") == "1"
+WARMUP_TEXT = "Texto de calentamiento"
+
+SENTIMENT_MODEL = "cardiffnlp/twitter-xlm-roberta-base-sentiment"
+EMOTION_MODEL = "bhadresh-savani/bert-base-uncased-emotion"
+# Modo del análisis de emociones: "translate" traduce el texto al inglés para EMOTION_MODEL y
+# "native" analiza el texto en español directamente con EMOTION_NATIVE_MODEL, sin pasar por el traductor
+TRANSLATE, NATIVE = "translate", "native"
+EMOTION_MODE = os.getenv("EMOTION_MODE", TRANSLATE)
+if EMOTION_MODE not in (TRANSLATE, NATIVE):
+    raise ValueError(f"EMOTION_MODE desconocido: {EMOTION_MODE}. Opciones: {TRANSLATE}, {NATIVE}")
+EMOTION_NATIVE_MODEL = os.getenv("EMOTION_NATIVE_MODEL", "pysentimiento/robertuito-emotion-analysis")
+EMOTION_MODEL_ID = EMOTION_NATIVE_MODEL if EMOTION_MODE == NATIVE else EMOTION_MODEL
+# Modelo NLI multilingüe para la clasificación local (zero-shot) de /classify
+CLASSIFY_MODEL = os.getenv("CLASSIFY_MODEL", "MoritzLaurer/mDeBERTa-v3-base-mnli-xnli")
+# Pipeline de spaCy cuyo NER completa las personas y lugares de /compromiso que no resuelven las reglas
+NER_MODEL = os.getenv("NER_MODEL", "es_core_news_sm")
+# Modelo de embeddings de frases de la caché semántica de las respuestas del modelo de lenguaje
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+
+# Backend de inferencia de los modelos locales: "pytorch" o "onnx" (ONNX Runtime, opcionalmente cuantizado a int8)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch")
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "0") == "1"
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", ".onnx")
+
+def load_model(name, task, model_id, **kwargs):
+    model = load_pipeline(task, model_id, INFERENCE_BACKEND, ONNX_QUANTIZE, ONNX_CACHE_DIR, TORCH_THREADS, **kwargs)
+    # Mide por separado la tokenización, el forward pass y el post-procesado de cada lote
+    return instrument_pipeline(model, name, stage_duration)
 
+models = ModelRegistry(ENABLED_MODELS)
 # Cargar el pipeline de transformers para análisis de sentimientos
-sentiment_pipeline = pipeline("sentiment-analysis", model="cardiffnlp/twitter-xlm-roberta-base-sentiment")
-# Carga del modelo para análisis de emociones
-classifier = pipeline("text-classification", model="bhadresh-savani/bert-base-uncased-emotion", top_k=None)
+# (con las puntuaciones de todas las etiquetas, para poder combinar las ventanas de los textos largos)
+models.register("sentiment", lambda: load_model("sentiment", "sentiment-analysis", SENTIMENT_MODEL, top_k=None), WARMUP_TEXT)
+# Carga del modelo para análisis de emociones (el inglés o el nativo en español, según EMOTION_MODE)
+models.register("emotions", lambda: load_model("emotions", "text-classification", EMOTION_MODEL_ID, top_k=None), WARMUP_TEXT)
+# Hipótesis del clasificador zero-shot para cada categoría de /classify, en el orden de la respuesta
+CLASSIFY_HYPOTHESES = {
+    "compromiso": "una promesa o un compromiso de hacer algo",
+    "duda": "una duda o una pregunta",
+    "acuerdo": "una muestra de acuerdo",
+    "desacuerdo": "una muestra de desacuerdo",
+    "texto libre": "un comentario sin promesas, dudas, acuerdos ni desacuerdos",
+}
+CLASSIFY_HYPOTHESIS_TEMPLATE = "Este texto es {}."
+# Clasificador local de /classify; solo se usa si "classify" está en ENABLED_MODELS.
+# Las hipótesis se fijan al crear el pipeline, así cada llamada (también el calentamiento) las usa
+models.register(
+    "classify",
+    lambda: load_model(
+        "classify",
+        "zero-shot-classification",
+        CLASSIFY_MODEL,
+        candidate_labels=list(CLASSIFY_HYPOTHESES.values()),
+        hypothesis_template=CLASSIFY_HYPOTHESIS_TEMPLATE,
+    ),
+    WARMUP_TEXT,
+)
+# Confianza mínima (probabilidad de la categoría principal) para responder sin llamar al modelo de lenguaje
+CLASSIFY_LOCAL_THRESHOLD = float(os.getenv("CLASSIFY_LOCAL_THRESHOLD", 0.7))
+# NER opcional para la extracción local de /compromiso; solo se usa si "ner" está en ENABLED_MODELS
+models.register("ner", lambda: load_spacy(NER_MODEL), WARMUP_TEXT)
+# Embeddings para la caché semántica de /classify y /desacuerdos; solo se usa si "embeddings" está en ENABLED_MODELS
+models.register("embeddings", lambda: load_embedder(EMBEDDING_MODEL), WARMUP_TEXT)
+# Extracción por reglas de las partes de /compromiso; el modelo de lenguaje solo completa las que quedan sin resolver
+COMMITMENT_LOCAL = os.getenv("COMMITMENT_LOCAL", "1") == "1"
 
 # Define el diccionario de traducción de emociones
 emotion_translation = {
@@ -34,6 +130,176 @@ emotion_translation = {
     'surprise': 'sorpresa'
 }
 
+# Etiquetas del modelo nativo en el vocabulario de EMOTION_MODEL (las claves de emotion_translation):
+# el asco se agrupa con el enfado y "others" (ninguna emoción) se descarta
+NATIVE_EMOTION_LABELS = {
+    'joy': 'joy',
+    'sadness': 'sadness',
+    'anger': 'anger',
+    'disgust': 'anger',
+    'fear': 'fear',
+    'surprise': 'surprise',
+    'others': None,
+}
+
+def map_emotion_labels(prediction, mapping):
+    # Suma las puntuaciones de las etiquetas que se agrupan y descarta las que no tienen equivalente
+    scores = {}
+    for emotion in prediction:
+        label = mapping.get(emotion['label'].lower())
+        if label in emotion_translation:
+            scores[label] = scores.get(label, 0.0) + emotion['score']
+    return [{'label': label, 'score': score} for label, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)]
+
+# Configuración del executor de inferencia: hilos fijos y colas acotadas por carril
+WORKERS = int(os.getenv("WORKERS", 1))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 2))
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", 64))
+# Los hilos intra-op de torch se reparten entre los procesos y sus workers de inferencia para no competir por los núcleos
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", max(1, (os.cpu_count() or 1) // (WORKERS * INFERENCE_WORKERS))))
+torch.set_num_threads(TORCH_THREADS)
+
+inference_executor = InferenceExecutor(INFERENCE_WORKERS, INFERENCE_MAX_QUEUE)
+
+# Configuración del micro-batching de los pipelines de transformers
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 16))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", 5))
+# Fracción máxima de relleno (padding) de cada forward pass; por encima, el lote se divide por longitudes
+BATCH_MAX_PADDING = float(os.getenv("BATCH_MAX_PADDING", 0.3))
+# Tokens que comparten dos ventanas consecutivas de los textos más largos que el límite del modelo
+CHUNK_STRIDE = int(os.getenv("CHUNK_STRIDE", 64))
+
+def predict_in_buckets(model, texts, batch_size=None):
+    # Un forward pass por grupo de textos de longitud parecida, para que el padding se ajuste a cada grupo
+    results = [None] * len(texts)
+    for bucket in length_buckets([len(text) for text in texts], batch_size or len(texts), BATCH_MAX_PADDING):
+        predictions = model([texts[index] for index in bucket], batch_size=len(bucket), truncation=True)
+        for index, prediction in zip(bucket, predictions):
+            results[index] = prediction
+    return results
+
+def predict_sentiment_batch(texts, batch_size=None):
+    return predict_in_buckets(models.get("sentiment"), texts, batch_size)
+
+def predict_emotions_batch(texts, batch_size=None):
+    predictions = predict_in_buckets(models.get("emotions"), texts, batch_size)
+    if EMOTION_MODE == NATIVE:
+        predictions = [map_emotion_labels(prediction, NATIVE_EMOTION_LABELS) for prediction in predictions]
+    return predictions
+
+def predict_classify_batch(texts, batch_size=None):
+    # Cada texto se compara con todas las hipótesis en un único lote de pares (texto, hipótesis)
+    return models.get("classify")(texts, batch_size=batch_size or len(texts) * len(CLASSIFY_HYPOTHESES))
+
+def in_lane(predict, lane):
+    # Los lotes del micro-batching se ejecutan en el carril indicado del executor
+    return lambda texts: inference_executor.submit(predict, texts, lane=lane).result()
+
+sentiment_batcher = MicroBatcher(in_lane(predict_sentiment_batch, INTERACTIVE), BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="sentiment", max_pending=INFERENCE_MAX_QUEUE)
+emotion_batcher = MicroBatcher(in_lane(predict_emotions_batch, INTERACTIVE), BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="emotions", max_pending=INFERENCE_MAX_QUEUE)
+# Variantes para el tráfico masivo (streaming), que se ejecutan en el carril de lotes
+bulk_sentiment_batcher = MicroBatcher(in_lane(predict_sentiment_batch, BULK), BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="sentiment-bulk", max_pending=INFERENCE_MAX_QUEUE)
+bulk_emotion_batcher = MicroBatcher(in_lane(predict_emotions_batch, BULK), BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="emotions-bulk", max_pending=INFERENCE_MAX_QUEUE)
+classify_batcher = MicroBatcher(in_lane(predict_classify_batch, INTERACTIVE), BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="classify", max_pending=INFERENCE_MAX_QUEUE)
+bulk_classify_batcher = MicroBatcher(in_lane(predict_classify_batch, BULK), BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="classify-bulk", max_pending=INFERENCE_MAX_QUEUE)
+
+classify_router = ConfidenceRouter(CLASSIFY_LOCAL_THRESHOLD, name="classify")
+
+# Divisores en ventanas de cada modelo, creados con su tokenizer la primera vez que se necesitan
+chunkers = {}
+
+def split_windows(name, texts):
+    chunker = chunkers.get(name)
+    if chunker is None:
+        chunker = chunkers.setdefault(name, TextChunker(models.get(name).tokenizer, stride=CHUNK_STRIDE))
+    return [chunker.split(text) for text in texts]
+
+async def predict_documents(name, predict, texts, lane=BULK):
+    # Divide los textos largos en ventanas, las predice en lotes agrupados por longitud y combina las puntuaciones
+    documents = await asyncio.to_thread(split_windows, name, texts)
+    windows = [window for document in documents for window in document]
+    predictions = await inference_executor.run(predict, windows, BATCH_MAX_SIZE, lane=lane)
+    results, position = [], 0
+    for document in documents:
+        results.append(aggregate_scores(predictions[position:position + len(document)], [len(window) for window in document]))
+        position += len(document)
+    return results
+
+async def predict_text(name, batcher, predict, text, lane=INTERACTIVE):
+    # Los textos que caben en el modelo se agrupan con otras peticiones; los largos se dividen en ventanas
+    chunker = chunkers.get(name)
+    if chunker is not None and chunker.is_short(text):
+        return await batcher.run(text)
+    windows = (await asyncio.to_thread(split_windows, name, [text]))[0]
+    if len(windows) == 1:
+        return await batcher.run(text)
+    predictions = await inference_executor.run(predict, windows, BATCH_MAX_SIZE, lane=lane)
+    return aggregate_scores(predictions, [len(window) for window in windows])
+
+commitment_extractor = CommitmentExtractor()
+# Las reglas solo evitan la llamada al modelo de lenguaje si resuelven las cuatro partes del compromiso
+commitment_router = ConfidenceRouter(1.0, name="commitment")
+
+# Resiliencia frente a los servicios externos: plazo total por llamada (reintentos incluidos), petición duplicada
+# cuando la primera tarda más que el percentil 95 (como mucho HEDGE_MAX_RATIO de las llamadas) y circuit breaker
+UPSTREAM_HEDGE = os.getenv("UPSTREAM_HEDGE", "1") == "1"
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", 0.1))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_RECOVERY_SECONDS = float(os.getenv("CIRCUIT_RECOVERY_SECONDS", 30))
+TRANSLATION_DEADLINE = float(os.getenv("TRANSLATION_DEADLINE", 10))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", os.getenv("LLM_TIMEOUT", 30)))
+
+def make_upstream(name, deadline, is_failure=lambda exc: True):
+    breaker = CircuitBreaker(name, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RECOVERY_SECONDS)
+    return Upstream(name, deadline, hedge=UPSTREAM_HEDGE, max_hedge_ratio=HEDGE_MAX_RATIO, breaker=breaker, is_failure=is_failure)
+
+def is_llm_failure(exc):
+    # Los errores de la petición (400, 401, 404...) no indican que OpenAI esté degradado
+    if isinstance(exc, APIStatusError):
+        return exc.status_code >= 500 or exc.status_code in (408, 409, 429)
+    return True
+
+translator_upstream = make_upstream("translator", TRANSLATION_DEADLINE)
+llm_upstream = make_upstream("openai", LLM_DEADLINE, is_llm_failure)
+upstreams = (translator_upstream, llm_upstream)
+# Errores ante los que /classify y /compromiso devuelven el resultado local en lugar de fallar
+UPSTREAM_ERRORS = (CircuitOpenError, UpstreamTimeoutError, APIError)
+
+# Configuración de la caché de traducciones (memoria y, opcionalmente, SQLite)
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", 10000))
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "")
+
+translation_cache = TranslationCache(
+    make_translator,
+    TRANSLATION_CACHE_SIZE,
+    SQLiteStore(TRANSLATION_CACHE_PATH, "translations") if TRANSLATION_CACHE_PATH else None,
+    upstream=translator_upstream,
+    # Los textos que ya están en inglés no pasan por el traductor
+    detect_language=detect_language,
+)
+# Agrupa las traducciones del tráfico masivo en una sola llamada al traductor
+translation_batcher = MicroBatcher(translation_cache.translate_batch, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="translation", max_pending=INFERENCE_MAX_QUEUE)
+
+# Caché de resultados por oración de /document: tras editar un documento solo se analizan las oraciones nuevas o cambiadas
+SENTENCE_CACHE_SIZE = int(os.getenv("SENTENCE_CACHE_SIZE", 50000))
+sentence_cache = TieredCache(LRUCache(SENTENCE_CACHE_SIZE))
+
+# Configuración del streaming NDJSON: textos en proceso a la vez y llamadas simultáneas a GPT por conexión
+STREAM_MAX_IN_FLIGHT = int(os.getenv("STREAM_MAX_IN_FLIGHT", 64))
+STREAM_LLM_CONCURRENCY = int(os.getenv("STREAM_LLM_CONCURRENCY", 4))
+# Tamaño máximo de cada línea NDJSON: las líneas más largas no se acumulan en memoria y se responden con un error
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", 1024 * 1024))
+
+# Configuración de los trabajos asíncronos de /jobs: archivo SQLite, workers, textos por fragmento,
+# llamadas por segundo al modelo de lenguaje y segundos de reserva de un fragmento antes de reintentarlo
+JOBS_PATH = os.getenv("JOBS_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", 16))
+JOB_LLM_RATE = float(os.getenv("JOB_LLM_RATE", 5))
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_MAX_ITEMS = int(os.getenv("JOB_MAX_ITEMS", 100000))
+JOB_PAGE_MAX = 1000
+
 # Configuración del cliente de OpenAI
 api_key = os.getenv("OPENAI_API_KEY")
 
@@ -63,6 +329,26 @@ app.add_middleware(
 # Define la constante para el mensaje de error
 EMPTY_TEXT_ERROR = "El texto no puede estar vacío"
 
+# Número máximo de textos aceptados por los endpoints de lotes
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 500))
+BULK_TOO_LARGE_ERROR = f"No se pueden analizar más de {BULK_MAX_ITEMS} textos por petición"
+JOB_TOO_LARGE_ERROR = f"Un trabajo no puede tener más de {JOB_MAX_ITEMS} textos"
+JOB_EMPTY_ERROR = "El trabajo debe incluir al menos un texto"
+JOB_NOT_FOUND_ERROR = "El trabajo no existe"
+
+# Define la constante para el mensaje de error inesperado al analizar un texto
+INTERNAL_ERROR = "Error interno al analizar el texto"
+
+# Define la constante para el mensaje de servicio saturado
+OVERLOADED_ERROR = "El servicio está saturado, inténtalo de nuevo más tarde"
+
+# Define la constante para el mensaje de modelo no habilitado
+MODEL_DISABLED_ERROR = "El modelo necesario para este endpoint no está habilitado"
+
+# Define la constante para el mensaje de línea NDJSON inválida
+NDJSON_LINE_ERROR = "La línea no es un JSON válido con la clave 'texto'"
+NDJSON_LINE_TOO_LONG_ERROR = f"La línea supera el tamaño máximo de {STREAM_MAX_LINE_BYTES} bytes"
+
 # Define la constante para el mensaje de error json
 JSON_ERROR = "La respuesta del modelo no es un JSON válido"
 # Modelo de GPT-3.5-turbo
@@ -73,6 +359,179 @@ KEY_QUE = "qué"
 KEY_CUANDO = "cuándo"
 KEY_DONDE = "dónde"
 
+# Define las constantes para los errores del modelo de lenguaje
+LLM_TIMEOUT_ERROR = "El modelo de lenguaje no respondió a tiempo"
+LLM_UPSTREAM_ERROR = "Error al comunicarse con el modelo de lenguaje"
+TRANSLATION_TIMEOUT_ERROR = "El servicio de traducción no respondió a tiempo"
+UPSTREAM_UNAVAILABLE_ERROR = "El servicio externo no está disponible temporalmente, inténtalo de nuevo más tarde"
+
+# Configuración del cliente de OpenAI compartido: pool de conexiones, concurrencia y timeouts.
+# OPENAI_BASE_URL permite apuntar a un servidor local compatible para pruebas de carga sin conexión.
+llm_client = LLMClient(
+    api_key=api_key,
+    model=GPT_MODEL,
+    base_url=os.getenv("OPENAI_BASE_URL"),
+    timeout=float(os.getenv("LLM_TIMEOUT", 30)),
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 20)),
+    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 10)),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 16)),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", 2)),
+)
+
+# Modo multitarea: /classify, /desacuerdos y /compromiso comparten una sola llamada en modo JSON
+# cuya respuesta se valida con un esquema; con 0 cada endpoint hace su propia llamada
+LLM_MULTITASK = os.getenv("LLM_MULTITASK", "1") == "1"
+
+# Configuración de la caché de respuestas del modelo de lenguaje (TTL en segundos, 0 = sin caducidad)
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", 5000))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 86400)) or None
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "")
+
+llm_cache = ResponseCache(
+    LLM_CACHE_SIZE,
+    LLM_CACHE_TTL,
+    SQLiteStore(LLM_CACHE_PATH, "llm_responses", LLM_CACHE_TTL) if LLM_CACHE_PATH else None,
+)
+
+# Caché semántica de /classify y /desacuerdos: reutiliza el resultado de un texto casi idéntico (similitud coseno
+# de sus embeddings por encima del umbral). No se usa en /compromiso, cuyas partes dependen de los detalles del texto
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", 10000))
+SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", 0.05))
+
+semantic_cache = SemanticCache(
+    lambda texts: models.get("embeddings")(texts),
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_AUDIT_RATE,
+    ttl=LLM_CACHE_TTL,
+)
+
+# Métricas de Prometheus expuestas en /metrics. Con SERVER_TIMING=1 cada respuesta incluye
+# la cabecera Server-Timing con el tiempo de cada etapa de la petición.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+metrics = MetricsRegistry()
+request_duration = metrics.histogram(
+    "textedit_request_duration_seconds", "Duración de las peticiones HTTP por endpoint.", ("endpoint", "method", "status")
+)
+requests_in_progress = metrics.gauge("textedit_requests_in_progress", "Peticiones HTTP en curso por endpoint.", ("endpoint",))
+# Etapas: translate, model (cola + lote de inferencia), preprocess, inference y postprocess (por lote), llm y parse
+stage_duration = metrics.histogram(
+    "textedit_stage_duration_seconds", "Duración de cada etapa del análisis.", ("stage", "component")
+)
+upstream_errors = metrics.counter(
+    "textedit_upstream_errors_total", "Errores de los servicios externos (OpenAI y traductor).", ("upstream", "kind")
+)
+commitment_unresolved = metrics.counter(
+    "textedit_commitment_unresolved_slots_total", "Partes de /compromiso que la extracción local no resolvió y se pidieron al modelo de lenguaje.", ("slot",)
+)
+multitask_fallbacks = metrics.counter(
+    "textedit_llm_multitask_fallbacks_total", "Respuestas multitarea que no cumplían el esquema y se resolvieron con la llamada individual.", ("task",)
+)
+
+metered_batchers = (
+    sentiment_batcher, emotion_batcher, bulk_sentiment_batcher, bulk_emotion_batcher,
+    classify_batcher, bulk_classify_batcher, translation_batcher,
+)
+
+def cache_counts(counter):
+    return {
+        ("llm",): llm_cache.stats()[counter],
+        ("translation",): translation_cache.stats()[counter],
+        ("sentence",): sentence_cache.stats()[counter],
+    }
+
+def queue_depths():
+    depths = {(f"executor-{lane}",): stats["pending"] for lane, stats in inference_executor.stats()["lanes"].items()}
+    for batcher in metered_batchers:
+        depths[(f"batcher-{batcher.name}",)] = batcher.stats()["pending"]
+    return depths
+
+def rejected_counts():
+    rejected = {(f"executor-{lane}",): stats["rejected"] for lane, stats in inference_executor.stats()["lanes"].items()}
+    for batcher in metered_batchers:
+        rejected[(f"batcher-{batcher.name}",)] = batcher.stats()["rejected"]
+    return rejected
+
+metrics.callback("textedit_cache_memory_hits_total", "Aciertos de la caché en memoria.", ("cache",), lambda: cache_counts("memory_hits"), "counter")
+metrics.callback("textedit_cache_store_hits_total", "Aciertos de la caché persistente.", ("cache",), lambda: cache_counts("store_hits"), "counter")
+metrics.callback("textedit_cache_misses_total", "Fallos de caché.", ("cache",), lambda: cache_counts("misses"), "counter")
+metrics.callback(
+    "textedit_semantic_cache_lookups_total", "Consultas a la caché semántica de las respuestas de GPT, por resultado.", ("result",),
+    lambda: {("hit",): semantic_cache.hits, ("miss",): semantic_cache.lookups - semantic_cache.hits}, "counter",
+)
+metrics.callback("textedit_llm_coalesced_total", "Peticiones a GPT resueltas con una llamada idéntica ya en curso.", (), lambda: {(): llm_cache.stats()["coalesced"]}, "counter")
+metrics.callback("textedit_llm_in_flight", "Llamadas a OpenAI en curso.", (), lambda: {(): llm_client.stats()["in_flight"]})
+metrics.callback("textedit_queue_depth", "Elementos esperando en las colas de inferencia y traducción.", ("queue",), queue_depths)
+metrics.callback("textedit_rejected_total", "Peticiones rechazadas por cola llena.", ("queue",), rejected_counts, "counter")
+metrics.callback(
+    "textedit_classify_routed_total", "Peticiones de /classify resueltas por el modelo local o por el modelo de lenguaje.", ("backend",),
+    lambda: {("local",): classify_router.stats()["local"], ("llm",): classify_router.stats()["remote"]}, "counter",
+)
+metrics.callback(
+    "textedit_commitment_routed_total", "Peticiones de /compromiso resueltas solo con reglas o completadas por el modelo de lenguaje.", ("backend",),
+    lambda: {("local",): commitment_router.stats()["local"], ("llm",): commitment_router.stats()["remote"]}, "counter",
+)
+metrics.callback(
+    "textedit_router_fallbacks_total", "Peticiones resueltas con el resultado local porque el modelo de lenguaje no estaba disponible.", ("router",),
+    lambda: {(router.name,): router.stats()["fallbacks"] for router in (classify_router, commitment_router)}, "counter",
+)
+metrics.callback(
+    "textedit_upstream_circuit_open", "1 si el circuit breaker del servicio externo está abierto o semiabierto.", ("upstream",),
+    lambda: {(upstream.name,): int(upstream.breaker.state != "closed") for upstream in upstreams},
+)
+metrics.callback(
+    "textedit_upstream_hedges_total", "Peticiones duplicadas a los servicios externos por superar el percentil 95.", ("upstream",),
+    lambda: {(upstream.name,): upstream.stats()["hedges"] for upstream in upstreams}, "counter",
+)
+metrics.callback(
+    "textedit_jobs", "Trabajos de /jobs por estado.", ("status",),
+    lambda: {(status,): count for status, count in job_store.stats()["jobs"].items()},
+)
+metrics.callback("textedit_job_pending_texts", "Textos de /jobs pendientes de analizar.", (), lambda: {(): job_store.stats()["pending_texts"]})
+metrics.callback(
+    "textedit_model_ready", "1 si el modelo está cargado y calentado.", ("model",),
+    lambda: {(name,): int(status["state"] == "ready") for name, status in models.status().items()},
+)
+
+app.add_middleware(MetricsMiddleware, duration=request_duration, in_progress=requests_in_progress, server_timing=SERVER_TIMING)
+
+# Prompts de sistema de los endpoints basados en GPT
+CLASSIFY_PROMPT = "Dado el siguiente texto, clasifícalo en una de las siguientes categorías: 'Compromiso', 'Duda', 'Acuerdo', 'Desacuerdo', o 'Texto Libre' y dime con porcentajes cuánto corresponde a cada categoría en el formato 'compromiso: 0%, duda: 0%, acuerdo: 0%, desacuerdo: 0%, texto libre: 0%'.\n\n1. Compromiso: Indica una promesa o una declaración de intención.\n2. Duda: Expresa incertidumbre o pregunta sobre algo.\n3. Acuerdo: Muestra conformidad o aceptación de una idea.\n4. Desacuerdo: Manifiesta una opinión contraria a una idea.\n5. Texto Libre: Cualquier texto que no se clasifique en las categorías anteriores.\n\nEjemplos:\n\nTexto: 'Voy a enviar el informe mañana.'\nCategoría: Compromiso\n\nTexto: '¿Estás seguro de esto?'\nCategoría: Duda\n\nTexto: 'Estoy de acuerdo con lo que dijiste.'\nCategoría: Acuerdo\n\nTexto: 'No creo que eso funcione.'\nCategoría: Desacuerdo\n\nTexto: 'El clima hoy es agradable.'\nCategoría: Texto Libre\n\nTexto: 'Leí tu mensaje.'\nCategoría: Texto Libre"
+
+DISAGREEMENT_PROMPT = "Indica cuales son las dos posturas en desacuerdo en formato JSON  con las claves 'postura1' y 'postura2'. Ejemplo: {'postura1': 'La tierra es plana', 'postura2': 'La tierra es redonda'}"
+
+COMMITMENT_PROMPT = (
+    "Voy a proporcionarte una frase de compromiso y quiero que la descompongas en un formato JSON con las claves: "
+    "'quién', 'qué', 'cuándo', y 'dónde'. Si alguna parte falta, déjala como una cadena vacía. "
+    "Ejemplo de entrada: 'Juan va a hacer cambio en la base de datos mañana en la oficina'. "
+    "Ejemplo de salida: {\"quién\": \"Juan\", \"qué\": \"va a hacer cambio en la base de datos\", \"cuándo\": \"mañana\", \"dónde\": \"la oficina\"}."
+)
+
+REDACT_COMMITMENT_PROMPT = (
+    "Redacta el siguiente texto en el formato '[persona] va a [hacer algo] antes de la fecha [fecha] en [lugar]'. "
+    "Por ejemplo, si el texto es 'Vale Puente, voy a pasear a mi perrita antes del antes del 2024-08-21 en en la calle', "
+    "Vale Puente, va a pasear a su perrita antes del 21 de agosto del 2024 en la calle'."
+)
+
+MULTITASK_PROMPT = (
+    "Analiza el siguiente texto y responde únicamente con un objeto JSON con esta estructura:\n"
+    "{\"clasificacion\": {\"compromiso\": 0, \"duda\": 0, \"acuerdo\": 0, \"desacuerdo\": 0, \"texto libre\": 0}, "
+    "\"desacuerdo\": {\"postura1\": \"\", \"postura2\": \"\"}, "
+    "\"compromiso\": {\"quién\": \"\", \"qué\": \"\", \"cuándo\": \"\", \"dónde\": \"\"}}\n\n"
+    "1. clasificacion: porcentaje entero (0 a 100, suman 100) en que el texto corresponde a cada categoría. "
+    "Compromiso: una promesa o una declaración de intención. Duda: incertidumbre o una pregunta. "
+    "Acuerdo: conformidad o aceptación de una idea. Desacuerdo: una opinión contraria a una idea. "
+    "Texto libre: cualquier otro texto.\n"
+    "2. desacuerdo: las dos posturas en desacuerdo que aparecen en el texto; cadenas vacías si no las hay.\n"
+    "3. compromiso: quién se compromete, qué va a hacer, cuándo y dónde; cadena vacía para cada parte que falte.\n\n"
+    "Ejemplo: 'Juan va a hacer cambio en la base de datos mañana en la oficina' -> "
+    "{\"clasificacion\": {\"compromiso\": 90, \"duda\": 0, \"acuerdo\": 0, \"desacuerdo\": 0, \"texto libre\": 10}, "
+    "\"desacuerdo\": {\"postura1\": \"\", \"postura2\": \"\"}, "
+    "\"compromiso\": {\"quién\": \"Juan\", \"qué\": \"va a hacer cambio en la base de datos\", \"cuándo\": \"mañana\", \"dónde\": \"la oficina\"}}"
+)
+
 
 # Modelos para la entrada de datos
 class SentimentRequest(BaseModel):
@@ -81,32 +540,87 @@ class SentimentRequest(BaseModel):
 class EmotionRequest(BaseModel):
     texto: str
 
+class SentimentBatchRequest(BaseModel):
+    texts: List[str]
+
+class EmotionBatchRequest(BaseModel):
+    textos: List[str]
+
 class ClassificationRequest(BaseModel):
     texto: str
 
 class ElementInfoRequest(BaseModel):
     texto: str
 
+# Análisis disponibles en /document
+DOCUMENT_ANALYSES = ("sentiment", "emotions")
 
-@app.get("/", summary="Saludo y Enlace a la Documentación", description="Proporciona un enlace directo a la documentación de la API para obtener más información sobre los endpoints disponibles y su uso.")
-def read_root(request: Request):
-    base_url = str(request.base_url)
-    documentation_url = f"{base_url}docs"
-    return JSONResponse(
-        content={"message": "Para ver la documentación de la API, visita el siguiente enlace:", "documentation_url": documentation_url},
-        status_code=200,
-    )
+class DocumentRequest(BaseModel):
+    texto: str
+    analisis: List[Literal[DOCUMENT_ANALYSES]] = ["sentiment", "emotions"]
 
-@app.post("/sentiment", summary="Analizar Sentimiento", description="Analiza el sentimiento del texto proporcionado.")
-async def analyze_sentiment(request: SentimentRequest):
-    text = request.text.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+# Análisis disponibles en /analyze, con el mismo nombre que su endpoint individual
+ANALYSES = ("sentiment", "emotions", "classify", "desacuerdos", "compromiso", "redactar-compromiso")
+
+class AnalysisRequest(BaseModel):
+    texto: str
+    analisis: List[Literal[ANALYSES]] = ["sentiment", "emotions", "classify"]
+
+class JobRequest(BaseModel):
+    textos: List[str]
+    analisis: List[Literal[ANALYSES]] = ["sentiment", "emotions", "classify"]
+
+# Esquema de la respuesta del modo multitarea
+Percentage = Field(0, ge=0, le=100)
+
+class MultitaskClassification(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    compromiso: int = Percentage
+    duda: int = Percentage
+    acuerdo: int = Percentage
+    desacuerdo: int = Percentage
+    texto_libre: int = Field(0, ge=0, le=100, alias="texto libre")
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def strip_percent(cls, value):
+        # Acepta también porcentajes escritos como texto ("40%")
+        return value.strip().rstrip("%") if isinstance(value, str) else value
 
-    # Uso del modelo para predecir el sentimiento de manera asíncrona
-    result = await asyncio.get_event_loop().run_in_executor(None, lambda: sentiment_pipeline(text))
-    sentiment = result[0]['label']
-    score = result[0]['score']
+class MultitaskDisagreement(BaseModel):
+    postura1: str = ""
+    postura2: str = ""
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def empty_if_null(cls, value):
+        return "" if value is None else value
+
+class MultitaskCommitment(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    quien: str = Field("", alias=KEY_QUIEN)
+    que: str = Field("", alias=KEY_QUE)
+    cuando: str = Field("", alias=KEY_CUANDO)
+    donde: str = Field("", alias=KEY_DONDE)
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def empty_if_null(cls, value):
+        return "" if value is None else value
+
+class MultitaskAnalysis(BaseModel):
+    clasificacion: MultitaskClassification
+    desacuerdo: MultitaskDisagreement = MultitaskDisagreement()
+    compromiso: MultitaskCommitment = MultitaskCommitment()
+
+
+def format_sentiment(prediction):
+    # La predicción incluye todas las etiquetas: se devuelve la de mayor puntuación
+    result = max(prediction, key=lambda x: x['score'])
+    sentiment = result['label']
+    score = result['score']
 
     # Mapear las etiquetas del modelo a términos más claros
     if sentiment == "negative":
@@ -116,61 +630,100 @@ async def analyze_sentiment(request: SentimentRequest):
 
     return {"sentiment": sentiment, "score": score}
 
-# Define el endpoint para analizar emociones
-@app.post("/emotions", summary="Analizar Emociones", description="Analiza las emociones en un texto en español.")
-async def analyze_emotions(request: EmotionRequest):
-    text = request.texto.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
-
-    # Traduce el texto de español a inglés
-    translated_text = GoogleTranslator(source='auto', target='en').translate(text)
-
-    # Realiza la predicción de emociones en el texto traducido
-    prediction = classifier(translated_text)
-    
-    # Simplifica la estructura de la respuesta
-    simplified_prediction = prediction[0]  # Elimina el primer nivel de la lista
+def format_classification(prediction):
+    # Convierte las probabilidades del clasificador zero-shot en porcentajes enteros que suman 100
+    scores = dict(zip(prediction["labels"], prediction["scores"]))
+    raw = {category: scores[hypothesis] * 100 for category, hypothesis in CLASSIFY_HYPOTHESES.items()}
+    percentages = {category: int(value) for category, value in raw.items()}
+    leftover = 100 - sum(percentages.values())
+    for category in sorted(raw, key=lambda category: raw[category] - percentages[category], reverse=True)[:leftover]:
+        percentages[category] += 1
+    return percentages, max(prediction["scores"])
 
+def format_emotions(prediction):
     # Traduce las etiquetas de emoción al español
-    translated_prediction = [{**emotion, 'label': emotion_translation[emotion['label']]} for emotion in simplified_prediction]
-    
+    translated_prediction = [{**emotion, 'label': emotion_translation[emotion['label']]} for emotion in prediction]
+
     # Encuentra la emoción con el mayor puntaje
     max_emotion = max(translated_prediction, key=lambda x: x['score'])
-    
+
     return {"emoción_principal": max_emotion}
-    
 
-@app.post("/classify", summary="Clasificar Texto", description="Clasifica el texto proporcionado en compromiso, duda, acuerdo o desacuerdo con porcentajes.")
-async def classify_text(request: ClassificationRequest):
-    text = request.texto.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+def require_model(name):
+    # Falla antes de encolar trabajo si el modelo no está habilitado en este despliegue
+    if not models.is_enabled(name):
+        raise ModelDisabledError(name)
 
-    # Crear una instancia del cliente de OpenAI
-    openai_client = OpenAI(api_key=api_key)
+def split_bulk_texts(texts):
+    # Separa los textos válidos (con su posición) de los vacíos
+    if len(texts) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=BULK_TOO_LARGE_ERROR)
+    stripped = [text.strip() for text in texts]
+    valid = [(index, text) for index, text in enumerate(stripped) if text]
+    return stripped, valid
 
 
-    # Crear el mensaje para enviar al ChatBot
-    message = [
-        {
-            "role": "system",
-            "content": "Dado el siguiente texto, clasifícalo en una de las siguientes categorías: 'Compromiso', 'Duda', 'Acuerdo', 'Desacuerdo', o 'Texto Libre' y dime con porcentajes cuánto corresponde a cada categoría en el formato 'compromiso: 0%, duda: 0%, acuerdo: 0%, desacuerdo: 0%, texto libre: 0%'.\n\n1. Compromiso: Indica una promesa o una declaración de intención.\n2. Duda: Expresa incertidumbre o pregunta sobre algo.\n3. Acuerdo: Muestra conformidad o aceptación de una idea.\n4. Desacuerdo: Manifiesta una opinión contraria a una idea.\n5. Texto Libre: Cualquier texto que no se clasifique en las categorías anteriores.\n\nEjemplos:\n\nTexto: 'Voy a enviar el informe mañana.'\nCategoría: Compromiso\n\nTexto: '¿Estás seguro de esto?'\nCategoría: Duda\n\nTexto: 'Estoy de acuerdo con lo que dijiste.'\nCategoría: Acuerdo\n\nTexto: 'No creo que eso funcione.'\nCategoría: Desacuerdo\n\nTexto: 'El clima hoy es agradable.'\nCategoría: Texto Libre\n\nTexto: 'Leí tu mensaje.'\nCategoría: Texto Libre"
-        }
-    ]
+@app.exception_handler(ServiceOverloadedError)
+async def service_overloaded_handler(request: Request, exc: ServiceOverloadedError):
+    # Rechazo rápido cuando la cola de inferencia está llena
+    return JSONResponse(
+        content={"detail": OVERLOADED_ERROR},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(ModelDisabledError)
+async def model_disabled_handler(request: Request, exc: ModelDisabledError):
+    return JSONResponse(content={"detail": MODEL_DISABLED_ERROR, "model": exc.name}, status_code=503)
+
+@app.exception_handler(APITimeoutError)
+async def llm_timeout_handler(request: Request, exc: APITimeoutError):
+    return JSONResponse(content={"detail": LLM_TIMEOUT_ERROR}, status_code=504)
 
-    # Agregar la entrada del usuario al mensaje
-    message.append({"role": "user", "content": text})
+@app.exception_handler(UpstreamTimeoutError)
+async def upstream_timeout_handler(request: Request, exc: UpstreamTimeoutError):
+    return JSONResponse(content={"detail": error_detail(exc)}, status_code=504)
 
-    # Obtener la respuesta del ChatBot
-    completion = openai_client.chat.completions.create(
-        model=GPT_MODEL,
-        messages=message
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    # Rechazo rápido mientras el servicio externo se recupera
+    return JSONResponse(
+        content={"detail": UPSTREAM_UNAVAILABLE_ERROR, "upstream": exc.upstream},
+        status_code=503,
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))},
     )
 
-    # Obtener la respuesta del ChatBot
-    assistant_response = completion.choices[0].message.content
+@app.exception_handler(APIError)
+async def llm_error_handler(request: Request, exc: APIError):
+    return JSONResponse(content={"detail": LLM_UPSTREAM_ERROR}, status_code=502)
+
+def count_upstream_error(upstream, exc):
+    if isinstance(exc, (APITimeoutError, UpstreamTimeoutError)):
+        kind = "timeout"
+    elif isinstance(exc, CircuitOpenError):
+        kind = "circuit_open"
+    elif isinstance(exc, APIError):
+        kind = "api"
+    else:
+        kind = "error"
+    upstream_errors.inc(upstream=upstream, kind=kind)
 
+async def ask_gpt(system_prompt, text, component="gpt", **kwargs):
+    # Crear el mensaje para enviar al ChatBot con la entrada del usuario
+    message = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": text},
+    ]
+
+    # Obtener la respuesta del ChatBot a través del cliente compartido, con plazo, hedging y circuit breaker
+    with stage_timer(stage_duration, "llm", component):
+        try:
+            return await llm_upstream.call(lambda: llm_client.chat(message, **kwargs))
+        except Exception as exc:
+            count_upstream_error("openai", exc)
+            raise
+
+def parse_classification(assistant_response):
     # Separar la respuesta en categorías y porcentajes
     response_parts = assistant_response.split(', ')
     categories = []
@@ -182,40 +735,9 @@ async def classify_text(request: ClassificationRequest):
         percentages.append(int(percentage.strip('%')))
 
     # Crear un diccionario con las categorías y porcentajes
-    result = dict(zip(categories, percentages))
-
-    return result
+    return dict(zip(categories, percentages))
 
-# Define el endpoint para analilar dos posturas en desacuerdos
-@app.post("/desacuerdos", summary="Analizar Desacuerdo", description="Analiza dos posturas en un desacuerdo y determina si son opuestas o no.")
-async def analyze_disagreement(request: ClassificationRequest):
-    text = request.texto.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
-
-    # Crear una instancia del cliente de OpenAI
-    openai_client = OpenAI(api_key=api_key)
-
-    # Crear el mensaje para enviar al ChatBot
-    message = [
-        {
-            "role": "system",
-            "content": "Indica cuales son las dos posturas en desacuerdo en formato JSON  con las claves 'postura1' y 'postura2'. Ejemplo: {'postura1': 'La tierra es plana', 'postura2': 'La tierra es redonda'}"
-        }
-    ]
-
-    # Agregar la entrada del usuario al mensaje
-    message.append({"role": "user", "content": text})
-
-    # Obtener la respuesta del ChatBot
-    completion = openai_client.chat.completions.create(
-        model=GPT_MODEL,
-        messages=message
-    )
-
-    # Obtener la respuesta del ChatBot
-    assistant_response = completion.choices[0].message.content
-    print(assistant_response)
+def parse_disagreement(assistant_response):
     # Parsear la respuesta como JSON
     try:
         data = json.loads(assistant_response)
@@ -223,54 +745,18 @@ async def analyze_disagreement(request: ClassificationRequest):
         postura2 = data.get("postura2", "[[postura2]]")
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail=JSON_ERROR )
-    
+
     # Verificar y asignar valores predeterminados si los campos están vacíos
     postura1 = "" if not postura1 else postura1
     postura2 = "" if not postura2 else postura2
 
-    # Retornar las posturas
     return {"postura1": postura1, "postura2": postura2}
 
-# Define el endpoint para analilar y crear un compromiso
-@app.post("/compromiso", summary="Crear Compromiso", description="Crea un compromiso a partir de las condiciones de sasticfacción")
-async def create_commitment(request: ClassificationRequest):
-    text = request.texto.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
-
-    # Crear una instancia del cliente de OpenAI
-    openai_client = OpenAI(api_key=api_key)
-
-    # Crear el mensaje para enviar al ChatBot
-    message = [
-        {
-            "role": "system",
-            "content": (
-                "Voy a proporcionarte una frase de compromiso y quiero que la descompongas en un formato JSON con las claves: "
-                "'quién', 'qué', 'cuándo', y 'dónde'. Si alguna parte falta, déjala como una cadena vacía. "
-                "Ejemplo de entrada: 'Juan va a hacer cambio en la base de datos mañana en la oficina'. "
-                "Ejemplo de salida: {\"quién\": \"Juan\", \"qué\": \"va a hacer cambio en la base de datos\", \"cuándo\": \"mañana\", \"dónde\": \"la oficina\"}."
-            )
-        }
-    ]
-
-    # Agregar la entrada del usuario al mensaje
-    message.append({"role": "user", "content": text})
-
-    # Obtener la respuesta del ChatBot
-    completion = openai_client.chat.completions.create(
-        model=GPT_MODEL,
-        messages=message
-    )
-
-    # Obtener la respuesta del ChatBot
-    assistant_response = completion.choices[0].message.content
-    print(assistant_response)
-
+def parse_commitment(assistant_response):
     # Parsear la respuesta como JSON
     try:
         data = json.loads(assistant_response)
-        compromiso = {
+        return {
             KEY_QUIEN: data.get(KEY_QUIEN, ""),
             KEY_QUE: data.get(KEY_QUE, ""),
             KEY_CUANDO: data.get(KEY_CUANDO, ""),
@@ -279,7 +765,12 @@ async def create_commitment(request: ClassificationRequest):
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail=JSON_ERROR )
 
-   # Verificar y asignar valores predeterminados si los campos están vacíos
+def parse_multitask(assistant_response):
+    # Lanza ValueError (JSON inválido o que no cumple el esquema) para recurrir a las llamadas individuales
+    return MultitaskAnalysis.model_validate_json(assistant_response).model_dump(by_alias=True)
+
+def format_commitment(compromiso):
+    # Verificar y asignar valores predeterminados si los campos están vacíos
     compromiso[KEY_QUIEN] = "[Quien]" if not compromiso[KEY_QUIEN] else compromiso[KEY_QUIEN]
     compromiso[KEY_QUE] = "[Que]" if not compromiso[KEY_QUE] else compromiso[KEY_QUE]
     compromiso[KEY_CUANDO] = "[Cuando]" if not compromiso[KEY_CUANDO] else compromiso[KEY_CUANDO]
@@ -290,45 +781,714 @@ async def create_commitment(request: ClassificationRequest):
 
     return {"compromiso": compromiso_texto}
 
+def llm_cache_key(component, system_prompt, text):
+    # El componente forma parte de la clave porque determina cómo se procesa la respuesta que se guarda
+    return hash_key(component, system_prompt, GPT_MODEL, normalize_text(text))
+
+async def cached_gpt(component, system_prompt, text, parse, limit=None, **kwargs):
+    # La respuesta depende solo del prompt, el modelo y el texto: se cachea el resultado ya procesado
+    # y las peticiones idénticas que llegan mientras la primera está en curso esperan a esa misma llamada.
+    # `limit` (por ejemplo, un semáforo o un limitador de tasa) envuelve solo la llamada real a OpenAI, así que
+    # las respuestas de la caché o compartidas con otra llamada no lo consumen. Recibe una función sin argumentos
+    # que crea la corrutina, para no crearla si se cancela mientras espera su turno
+    def call():
+        return ask_gpt(system_prompt, normalize_text(text), component, **kwargs)
+
+    async def compute():
+        response = await (call() if limit is None else limit(call))
+        with stage_timer(stage_duration, "parse", component):
+            return parse(response)
+
+    return await llm_cache.get_or_compute(llm_cache_key(component, system_prompt, text), compute)
+
+async def cached_llm_result(component, system_prompt, text, task):
+    # Resultado ya guardado para este mismo texto, de la llamada multitarea o de la individual, o None.
+    # Las dos claves se buscan primero en memoria y después, juntas, en el almacén persistente.
+    # Los fallos no se cuentan aquí: los cuenta la consulta de `cached_gpt` que viene después
+    multitask_key = llm_cache_key("multitask", MULTITASK_PROMPT, text)
+    keys = [multitask_key] if LLM_MULTITASK else []
+    keys.append(llm_cache_key(component, system_prompt, text))
+    key, result = await llm_cache.cache.first_async(keys, count_miss=False)
+    if result is not None and key == multitask_key:
+        return dict(result[task])
+    return result
+
+async def semantically_cached(component, text, compute, exact, lane=INTERACTIVE):
+    # Con el modelo de embeddings habilitado, reutiliza el resultado de un texto casi idéntico antes de llamar
+    # al modelo de lenguaje. El índice vive en memoria y los prompts no cambian: basta el componente como namespace.
+    # Las repeticiones exactas (`exact`) se resuelven antes con la caché de respuestas, sin calcular el embedding
+    if not models.is_enabled("embeddings"):
+        return await compute()
+    result = await exact()
+    if result is not None:
+        return result
+    similar, vector = await semantic_lookup(component, text, lane)
+    if similar is not None:
+        return similar
+    result = await compute()
+    if vector is not None:
+        semantic_cache.add(component, normalize_text(text), result, vector)
+    return result
+
+async def semantic_lookup(namespace, text, lane=INTERACTIVE):
+    # La caché semántica es opcional: si el modelo de embeddings no está listo o la cola está llena, se omite
+    try:
+        with stage_timer(stage_duration, "semantic_cache", namespace):
+            return await inference_executor.run(semantic_cache.lookup, namespace, normalize_text(text), lane=lane)
+    except Exception:
+        return None, None
+
+async def multitask(text, task, limit=None):
+    # Resultado de `task` a partir de la llamada multitarea (cacheada y compartida por las tres tareas),
+    # o None si la respuesta no cumple el esquema
+    if not LLM_MULTITASK:
+        return None
+    try:
+        analysis = await cached_gpt("multitask", MULTITASK_PROMPT, text, parse_multitask, limit, response_format={"type": "json_object"})
+    except ValueError:
+        multitask_fallbacks.inc(task=task)
+        return None
+    return dict(analysis[task])
+
+async def classify_with_llm(text, lane=INTERACTIVE, limit=None):
+    async def compute():
+        result = await multitask(text, "clasificacion", limit)
+        if result is not None:
+            return result
+        return await cached_gpt("classify", CLASSIFY_PROMPT, text, parse_classification, limit)
+
+    return await semantically_cached("classify", text, compute, lambda: cached_llm_result("classify", CLASSIFY_PROMPT, text, "clasificacion"), lane)
+
+async def classify_locally(text, lane=INTERACTIVE):
+    batcher = classify_batcher if lane == INTERACTIVE else bulk_classify_batcher
+    with stage_timer(stage_duration, "model", "classify"):
+        prediction = await batcher.run(text)
+    return format_classification(prediction)
+
+async def classify(text, lane=INTERACTIVE, limit=None):
+    # Con el clasificador local habilitado, el modelo de lenguaje solo se consulta para los textos ambiguos.
+    # `limit` envuelve únicamente las llamadas a OpenAI (ver `cached_gpt`)
+    def with_llm():
+        return classify_with_llm(text, lane, limit)
+
+    if not models.is_enabled("classify"):
+        return await with_llm()
+    return await classify_router.route(lambda: classify_locally(text, lane), with_llm, UPSTREAM_ERRORS)
+
+async def disagreement(text, lane=INTERACTIVE, limit=None):
+    async def compute():
+        result = await multitask(text, "desacuerdo", limit)
+        if result is not None:
+            return result
+        return await cached_gpt("desacuerdos", DISAGREEMENT_PROMPT, text, parse_disagreement, limit)
+
+    return await semantically_cached("desacuerdos", text, compute, lambda: cached_llm_result("desacuerdos", DISAGREEMENT_PROMPT, text, "desacuerdo"), lane)
+
+async def commitment_with_llm(text, limit=None):
+    result = await multitask(text, "compromiso", limit)
+    if result is not None:
+        return result
+    return dict(await cached_gpt("compromiso", COMMITMENT_PROMPT, text, parse_commitment, limit))
+
+def extract_commitment(text):
+    ner = models.get("ner") if models.is_enabled("ner") else None
+    with stage_timer(stage_duration, "model", "compromiso"):
+        return commitment_extractor.extract(text, ner)
+
+async def commitment(text, limit=None):
+    # Las reglas resuelven las frases habituales; el modelo de lenguaje solo rellena las partes que quedan sin resolver.
+    # `limit` envuelve únicamente las llamadas a OpenAI, como en `classify`
+    def with_llm():
+        return commitment_with_llm(text, limit)
+
+    if not COMMITMENT_LOCAL:
+        return format_commitment(await with_llm())
+
+    extraction = None
+
+    async def locally():
+        nonlocal extraction
+        # El NER de spaCy es lento comparado con las reglas: se ejecuta fuera del event loop
+        extraction = await asyncio.to_thread(extract_commitment, text) if models.is_enabled("ner") else extract_commitment(text)
+        return dict(extraction.slots), float(not extraction.unresolved)
+
+    async def completed_with_llm():
+        for slot in extraction.unresolved:
+            commitment_unresolved.inc(slot=slot)
+        slots = await with_llm()
+        return {**extraction.slots, **{slot: slots[slot] for slot in extraction.unresolved}}
+
+    return format_commitment(await commitment_router.route(locally, completed_with_llm, UPSTREAM_ERRORS))
+
+async def redact_commitment(text, limit=None):
+    return await cached_gpt("redactar-compromiso", REDACT_COMMITMENT_PROMPT, text, lambda response: {"compromiso_redactado": response.strip()}, limit)
+
+def sse_event(data, event=None):
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+async def stream_gpt(component, system_prompt, text, field):
+    # Eventos SSE con los fragmentos de una respuesta de texto libre según los genera el modelo de lenguaje
+    # y, al final, el resultado completo con el mismo formato que el endpoint sin streaming (y la misma caché)
+    key = llm_cache_key(component, system_prompt, text)
+    cached = await llm_cache.cache.get_async(key)
+    if cached is not None:
+        yield sse_event({"fragmento": cached[field]})
+        yield sse_event(cached, "fin")
+        return
+
+    message = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": normalize_text(text)},
+    ]
+    pieces = []
+    started = time.perf_counter()
+    try:
+        # Sin plazo total ni hedging (la respuesta ya se está enviando), pero sí con el circuit breaker de OpenAI
+        with llm_upstream.breaker.guard(llm_upstream.is_failure):
+            async for piece in llm_client.stream(message):
+                if not pieces:
+                    # Tiempo hasta el primer fragmento: lo que espera el usuario antes de ver texto
+                    stage_duration.observe(time.perf_counter() - started, stage="llm_first_token", component=component)
+                pieces.append(piece)
+                yield sse_event({"fragmento": piece})
+    except Exception as exc:
+        count_upstream_error("openai", exc)
+        yield sse_event({"detail": error_detail(exc) or LLM_UPSTREAM_ERROR}, "error")
+        return
+    finally:
+        # Si el cliente se desconecta, el generador se cancela y llm_client cierra la petición a OpenAI
+        stage_duration.observe(time.perf_counter() - started, stage="llm", component=component)
+
+    result = {field: "".join(pieces).strip()}
+    await llm_cache.cache.set_async(key, result)
+    yield sse_event(result, "fin")
+
+async def sentiment(text, lane=INTERACTIVE):
+    # Uso del modelo para predecir el sentimiento de manera asíncrona, agrupado con otras peticiones
+    batcher = sentiment_batcher if lane == INTERACTIVE else bulk_sentiment_batcher
+    with stage_timer(stage_duration, "model", "sentiment"):
+        prediction = await predict_text("sentiment", batcher, predict_sentiment_batch, text, lane)
+    return format_sentiment(prediction)
+
+async def translate(text, lane=INTERACTIVE):
+    # Traduce el texto de español a inglés fuera del event loop
+    if lane == BULK:
+        return await translated(translation_batcher.run(text))
+    return await translated(asyncio.to_thread(translation_cache.translate, text))
+
+async def translated(translation):
+    with stage_timer(stage_duration, "translate", "translator"):
+        try:
+            return await translation
+        except Exception as exc:
+            count_upstream_error("translator", exc)
+            raise
+
+async def emotion_input(text, lane=INTERACTIVE):
+    # Texto que recibe el modelo de emociones: traducido al inglés o, en modo nativo, el original
+    return text if EMOTION_MODE == NATIVE else await translate(text, lane)
+
+async def emotion_inputs(texts):
+    if EMOTION_MODE == NATIVE:
+        return texts
+    return await translated(asyncio.to_thread(translation_cache.translate_batch, texts))
+
+async def emotions(text, translated_text=None, lane=INTERACTIVE):
+    if translated_text is None:
+        translated_text = await emotion_input(text, lane)
+
+    # Realiza la predicción de emociones en el texto traducido, agrupada con otras peticiones
+    batcher = emotion_batcher if lane == INTERACTIVE else bulk_emotion_batcher
+    with stage_timer(stage_duration, "model", "emotions"):
+        prediction = await predict_text("emotions", batcher, predict_emotions_batch, translated_text, lane)
+    return format_emotions(prediction)
+
+async def analyze_sentences(name, sentences):
+    # Predicciones de cada oración: las que ya están en la caché se reutilizan y el resto se analiza en un solo lote.
+    # La clave es el contenido de la oración, así que no depende de su posición en el documento
+    model_id = SENTIMENT_MODEL if name == "sentiment" else EMOTION_MODEL_ID
+    keys = [hash_key(name, model_id, normalize_text(sentence)) for sentence in sentences]
+    predictions = [sentence_cache.get(key) for key in keys]
+    missing = {}
+    for key, sentence, prediction in zip(keys, sentences, predictions):
+        if prediction is None:
+            missing.setdefault(key, sentence)
+
+    if missing:
+        texts = list(missing.values())
+        if name == "emotions":
+            texts = await emotion_inputs(texts)
+        predict = predict_sentiment_batch if name == "sentiment" else predict_emotions_batch
+        with stage_timer(stage_duration, "model", name):
+            computed = dict(zip(missing, await predict_documents(name, predict, texts, INTERACTIVE)))
+        for key, prediction in computed.items():
+            sentence_cache.set(key, prediction)
+        predictions = [computed[key] if prediction is None else prediction for key, prediction in zip(keys, predictions)]
+    return predictions, len(missing)
+
+def require_analyses(requested):
+    for name in requested:
+        if name in ("sentiment", "emotions"):
+            require_model(name)
+
+async def analyze_text(text, requested, lane=INTERACTIVE, llm_semaphore=None):
+    # Ejecuta los análisis solicitados de forma concurrente y mide el tiempo de cada uno
+    timings = {}
+    started = time.perf_counter()
+
+    async def timed(name, coroutine):
+        step_started = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            timings[name] = round((time.perf_counter() - step_started) * 1000, 2)
+
+    async def limited(call):
+        # Limita las llamadas a OpenAI cuando se indica un semáforo o un limitador de tasa. La corrutina se crea
+        # después de conseguirlo: si la tarea se cancela mientras espera, no queda ninguna corrutina sin ejecutar
+        if llm_semaphore is None:
+            return await call()
+        async with llm_semaphore:
+            return await call()
+
+    # La traducción se hace una sola vez y la comparten los análisis que la necesitan
+    translation = None
+    if "emotions" in requested and EMOTION_MODE == TRANSLATE:
+        translation = asyncio.ensure_future(timed("translate", translate(text, lane)))
+
+    async def run_emotions():
+        return await emotions(text, text if translation is None else await translation, lane)
+
+    runners = {
+        "sentiment": lambda: sentiment(text, lane),
+        "emotions": run_emotions,
+        "classify": lambda: classify(text, lane, limited),
+        "desacuerdos": lambda: disagreement(text, lane, limited),
+        "compromiso": lambda: commitment(text, limited),
+        "redactar-compromiso": lambda: redact_commitment(text, limited),
+    }
+    outcomes = await asyncio.gather(
+        *(timed(name, runners[name]()) for name in requested),
+        return_exceptions=True,
+    )
+
+    results = {}
+    errors = {}
+    for name, outcome in zip(requested, outcomes):
+        if isinstance(outcome, Exception):
+            # Un error de tipo desconocido (por ejemplo, una respuesta del modelo de lenguaje con otro formato)
+            # solo afecta a su análisis: el resto de resultados se devuelven igualmente
+            errors[name] = error_detail(outcome) or INTERNAL_ERROR
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results[name] = outcome
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+    return {"resultados": results, "errores": errors, "tiempos_ms": timings}
+
+async def iter_ndjson_lines(request):
+    # Lee el cuerpo por fragmentos y entrega cada línea completa sin cargar todo el cuerpo en memoria.
+    # Una línea de más de STREAM_MAX_LINE_BYTES se entrega como None y el resto se descarta hasta el siguiente salto
+    max_bytes = STREAM_MAX_LINE_BYTES
+    buffer = b""
+    discarding = False
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if discarding:
+                # Final de la línea demasiado larga, que ya se entregó como None
+                discarding = False
+                continue
+            yield line if len(line) <= max_bytes else None
+        if len(buffer) > max_bytes:
+            if not discarding:
+                yield None
+            discarding = True
+            buffer = b""
+    if buffer and not discarding:
+        yield buffer if len(buffer) <= max_bytes else None
+
+async def wait_for_disconnect(request):
+    # Una vez leído todo el cuerpo, el siguiente mensaje de la conexión solo puede ser la desconexión del cliente
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+async def analyze_ndjson_line(index, line, requested, llm_semaphore):
+    try:
+        item = json.loads(line)
+        text = item["texto"] if isinstance(item, dict) else item
+        if not isinstance(text, str):
+            raise TypeError
+    except (ValueError, KeyError, TypeError):
+        return {"index": index, "error": NDJSON_LINE_ERROR}
+
+    output = {"index": index}
+    if isinstance(item, dict) and "id" in item:
+        output["id"] = item["id"]
+    text = normalize_text(text)
+    if not text:
+        output["error"] = EMPTY_TEXT_ERROR
+        return output
+    output.update(await analyze_text(text, requested, BULK, llm_semaphore))
+    return output
+
+async def stream_analyses(request, requested):
+    # Como mucho STREAM_MAX_IN_FLIGHT líneas en proceso: si el cliente no lee las respuestas,
+    # se deja de leer el cuerpo y la presión se propaga hasta el emisor
+    llm_semaphore = asyncio.Semaphore(STREAM_LLM_CONCURRENCY)
+    lines = iter_ndjson_lines(request)
+    # Tareas en curso y el índice de la línea que analiza cada una
+    pending = {}
+    reader = None
+    # Mientras se lee el cuerpo, la propia lectura detecta la desconexión; después se espera el aviso de la conexión
+    disconnected = None
+    exhausted = False
+    index = 0
+    try:
+        while True:
+            if reader is None and not exhausted and len(pending) < STREAM_MAX_IN_FLIGHT:
+                reader = asyncio.ensure_future(lines.__anext__())
+            if not pending and reader is None:
+                break
+            waiting = set(pending) | {task for task in (reader, disconnected) if task is not None}
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                # El cliente se ha ido: el bloque finally cancela los análisis pendientes
+                return
+            if reader in done:
+                try:
+                    line = reader.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                    disconnected = asyncio.ensure_future(wait_for_disconnect(request))
+                else:
+                    if line is None:
+                        yield json.dumps({"index": index, "error": NDJSON_LINE_TOO_LONG_ERROR}, ensure_ascii=False) + "\n"
+                        index += 1
+                    elif line.strip():
+                        pending[asyncio.ensure_future(analyze_ndjson_line(index, line, requested, llm_semaphore))] = index
+                        index += 1
+                reader = None
+            for task in done & set(pending):
+                line_index = pending.pop(task)
+                try:
+                    output = task.result()
+                except Exception:
+                    # Un error inesperado en una línea no interrumpe la respuesta del resto
+                    output = {"index": line_index, "error": INTERNAL_ERROR}
+                yield json.dumps(output, ensure_ascii=False) + "\n"
+    finally:
+        # Si el cliente se desconecta se cancela el trabajo pendiente
+        for task in set(pending) | {task for task in (reader, disconnected) if task is not None}:
+            task.cancel()
+
+class DuplexStreamingResponse(StreamingResponse):
+    # El cuerpo de la petición se sigue leyendo mientras se envía la respuesta, por lo que no se escucha
+    # la desconexión en paralelo (consumiría los fragmentos del cuerpo): la detecta la propia lectura y,
+    # cuando el cuerpo ya se ha leído entero, `stream_analyses` (ver `wait_for_disconnect`)
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+def error_detail(exc):
+    # Mensaje de error de un sub-análisis, o None si el error no es de un tipo conocido
+    if isinstance(exc, HTTPException):
+        return exc.detail
+    if isinstance(exc, ServiceOverloadedError):
+        return OVERLOADED_ERROR
+    if isinstance(exc, ModelDisabledError):
+        return MODEL_DISABLED_ERROR
+    if isinstance(exc, APITimeoutError):
+        return LLM_TIMEOUT_ERROR
+    if isinstance(exc, UpstreamTimeoutError):
+        return LLM_TIMEOUT_ERROR if exc.upstream == llm_upstream.name else TRANSLATION_TIMEOUT_ERROR
+    if isinstance(exc, CircuitOpenError):
+        return UPSTREAM_UNAVAILABLE_ERROR
+    if isinstance(exc, APIError):
+        return LLM_UPSTREAM_ERROR
+    return None
+
+# Trabajos asíncronos: los textos se guardan en SQLite y un pool de workers los analiza por fragmentos en el carril
+# de lotes, con las llamadas al modelo de lenguaje limitadas a JOB_LLM_RATE por segundo. El archivo SQLite se abre
+# la primera vez que se usa (al arrancar los workers o al crear un trabajo), no al importar este módulo
+job_store = JobStore(JOBS_PATH, JOB_LEASE_SECONDS)
+job_llm_limiter = RateLimiter(JOB_LLM_RATE, burst=int(JOB_LLM_RATE))
+# Errores transitorios tras los que el texto vuelve a la cola en lugar de guardarse
+# (los inesperados también, porque la respuesta del modelo de lenguaje puede cambiar al repetir la llamada)
+JOB_RETRYABLE_ERRORS = {OVERLOADED_ERROR, UPSTREAM_UNAVAILABLE_ERROR, INTERNAL_ERROR}
+
+async def process_job_texts(texts, requested):
+    # Los textos del fragmento se analizan a la vez, así que comparten los lotes de inferencia y la traducción
+    async def process(text):
+        if not text:
+            return {"error": EMPTY_TEXT_ERROR}, False
+        try:
+            output = await analyze_text(text, requested, BULK, job_llm_limiter)
+        except Exception:
+            # Un error inesperado (por ejemplo, una respuesta del modelo de lenguaje con otro formato) solo afecta
+            # a este texto: se reintenta, porque la respuesta puede cambiar, y después se guarda con el error
+            return {"error": INTERNAL_ERROR}, True
+        return output, any(detail in JOB_RETRYABLE_ERRORS for detail in output["errores"].values())
+
+    return await asyncio.gather(*(process(text) for text in texts))
+
+job_runner = JobRunner(job_store, process_job_texts, JOB_WORKERS, JOB_CHUNK_SIZE)
+
+def format_job(job):
+    return {
+        "id": job["id"],
+        "estado": job["status"],
+        "analisis": job["analyses"],
+        "total": job["total"],
+        "completados": job["completed"],
+        "creado": job["created"],
+        "actualizado": job["updated"],
+        "error": job["error"],
+    }
+
+async def get_job(job_id):
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=JOB_NOT_FOUND_ERROR)
+    return job
+
+
+@app.get("/", summary="Saludo y Enlace a la Documentación", description="Proporciona un enlace directo a la documentación de la API para obtener más información sobre los endpoints disponibles y su uso.")
+def read_root(request: Request):
+    base_url = str(request.base_url)
+    documentation_url = f"{base_url}docs"
+    return JSONResponse(
+        content={"message": "Para ver la documentación de la API, visita el siguiente enlace:", "documentation_url": documentation_url},
+        status_code=200,
+    )
+
+@app.get("/health/live", summary="Comprobación de Vida", description="Indica que el proceso está en marcha y atiende peticiones.")
+def health_live():
+    return {"status": "ok"}
+
+@app.get("/health/ready", summary="Comprobación de Disponibilidad", description="Indica si todos los modelos habilitados están cargados y calentados. Devuelve 503 mientras no lo estén.")
+def health_ready():
+    ready = models.is_ready()
+    return JSONResponse(
+        content={"status": "ready" if ready else "loading", "models": models.status()},
+        status_code=200 if ready else 503,
+    )
+
+@app.get("/stats", summary="Estadísticas Internas", description="Devuelve estadísticas de funcionamiento interno, como el tamaño de los lotes despachados a los modelos.")
+def read_stats():
+    return {
+        "batching": {
+            "sentiment": sentiment_batcher.stats(),
+            "emotions": emotion_batcher.stats(),
+            "sentiment-bulk": bulk_sentiment_batcher.stats(),
+            "emotions-bulk": bulk_emotion_batcher.stats(),
+            "classify": classify_batcher.stats(),
+            "classify-bulk": bulk_classify_batcher.stats(),
+            "translation": translation_batcher.stats(),
+        },
+        "models": models.status(),
+        "inference_backend": {"backend": INFERENCE_BACKEND, "quantized": ONNX_QUANTIZE},
+        "emotion_mode": {"mode": EMOTION_MODE, "model": EMOTION_MODEL_ID},
+        "executor": inference_executor.stats(),
+        "translation_cache": translation_cache.stats(),
+        "llm": llm_client.stats(),
+        "llm_cache": llm_cache.stats(),
+        "sentence_cache": sentence_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "classify_router": classify_router.stats(),
+        "commitment_router": commitment_router.stats(),
+        "upstreams": {upstream.name: upstream.stats() for upstream in upstreams},
+        "jobs": {**job_runner.stats(), "llm_rate_limit": job_llm_limiter.stats()},
+    }
+
+@app.get("/metrics", summary="Métricas de Prometheus", description="Expone en formato de texto de Prometheus la latencia por endpoint y por etapa, los errores de los servicios externos, los aciertos de caché y la profundidad de las colas.")
+def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.post("/sentiment", summary="Analizar Sentimiento", description="Analiza el sentimiento del texto proporcionado.")
+async def analyze_sentiment(request: SentimentRequest):
+    require_model("sentiment")
+    text = request.text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    return await sentiment(text)
+
+@app.post("/sentiment/batch", summary="Analizar Sentimiento en Lote", description="Analiza el sentimiento de una lista de textos en una sola pasada del modelo y devuelve los resultados en el mismo orden.")
+async def analyze_sentiment_batch(request: SentimentBatchRequest):
+    require_model("sentiment")
+    texts, valid = split_bulk_texts(request.texts)
+    results = [{"error": EMPTY_TEXT_ERROR} for _ in texts]
+
+    if valid:
+        with stage_timer(stage_duration, "model", "sentiment"):
+            predictions = await predict_documents("sentiment", predict_sentiment_batch, [text for _, text in valid])
+        for (index, _), prediction in zip(valid, predictions):
+            results[index] = format_sentiment(prediction)
+
+    return {"results": results}
+
+@app.post("/document", summary="Análisis Incremental de Documentos", description="Analiza el sentimiento y las emociones de cada oración de un documento y del documento completo. Los resultados de cada oración se cachean por su contenido, de modo que al reenviar un documento editado solo se analizan las oraciones nuevas o modificadas.")
+async def analyze_document(request: DocumentRequest):
+    sentences = split_sentences(request.texto)
+    if not sentences:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    requested = list(dict.fromkeys(request.analisis))
+    require_analyses(requested)
+    texts = [sentence.text for sentence in sentences]
+    analyses = await asyncio.gather(*(analyze_sentences(name, texts) for name in requested))
+
+    formatters = {"sentiment": format_sentiment, "emotions": format_emotions}
+    oraciones = [{"texto": sentence.text, "inicio": sentence.start, "fin": sentence.end} for sentence in sentences]
+    documento = {}
+    for name, (predictions, _) in zip(requested, analyses):
+        for oracion, prediction in zip(oraciones, predictions):
+            oracion[name] = formatters[name](prediction)
+        # Resultado del documento: media de las puntuaciones de las oraciones ponderada por su longitud
+        documento[name] = formatters[name](aggregate_scores(predictions, [len(text) for text in texts]))
+
+    return {
+        "documento": documento,
+        "oraciones": oraciones,
+        "analizadas": {name: computed for name, (_, computed) in zip(requested, analyses)},
+    }
+
+# Define el endpoint para analizar emociones
+@app.post("/emotions", summary="Analizar Emociones", description="Analiza las emociones en un texto en español.")
+async def analyze_emotions(request: EmotionRequest):
+    require_model("emotions")
+    text = request.texto.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    return await emotions(text)
+
+@app.post("/emotions/batch", summary="Analizar Emociones en Lote", description="Analiza las emociones de una lista de textos en español con una sola traducción y una sola pasada del modelo.")
+async def analyze_emotions_batch(request: EmotionBatchRequest):
+    require_model("emotions")
+    texts, valid = split_bulk_texts(request.textos)
+    results = [{"error": EMPTY_TEXT_ERROR} for _ in texts]
+
+    if valid:
+        # Traduce todos los textos en una sola llamada (salvo en modo nativo) y los analiza en un solo lote
+        translated_texts = await emotion_inputs([text for _, text in valid])
+        with stage_timer(stage_duration, "model", "emotions"):
+            predictions = await predict_documents("emotions", predict_emotions_batch, translated_texts)
+        for (index, _), prediction in zip(valid, predictions):
+            results[index] = format_emotions(prediction)
+
+    return {"resultados": results}
+
+@app.post("/analyze", summary="Análisis Combinado", description="Ejecuta de forma concurrente los análisis solicitados (sentiment, emotions, classify, desacuerdos, compromiso, redactar-compromiso) sobre un mismo texto y devuelve una respuesta combinada con los tiempos de cada uno.")
+async def analyze(request: AnalysisRequest):
+    # Normaliza la entrada una sola vez para todos los análisis
+    text = normalize_text(request.texto)
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    requested = list(dict.fromkeys(request.analisis))
+    require_analyses(requested)
+
+    return await analyze_text(text, requested)
+
+@app.post("/analyze/stream", summary="Análisis Masivo en Streaming", description="Recibe un cuerpo NDJSON con un texto por línea ({\"texto\": ...}) y devuelve en NDJSON el resultado de cada línea en cuanto está listo, con su índice de entrada.")
+async def analyze_stream(request: Request, analisis: List[Literal[ANALYSES]] = Query(["sentiment", "emotions"])):
+    requested = list(dict.fromkeys(analisis))
+    require_analyses(requested)
+    return DuplexStreamingResponse(stream_analyses(request, requested), media_type="application/x-ndjson")
+
+@app.post("/classify", summary="Clasificar Texto", description="Clasifica el texto proporcionado en compromiso, duda, acuerdo o desacuerdo con porcentajes.")
+async def classify_text(request: ClassificationRequest):
+    text = request.texto.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    return await classify(text)
+
+# Define el endpoint para analilar dos posturas en desacuerdos
+@app.post("/desacuerdos", summary="Analizar Desacuerdo", description="Analiza dos posturas en un desacuerdo y determina si son opuestas o no.")
+async def analyze_disagreement(request: ClassificationRequest):
+    text = request.texto.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    # Retornar las posturas
+    return await disagreement(text)
+
+# Define el endpoint para analilar y crear un compromiso
+@app.post("/compromiso", summary="Crear Compromiso", description="Crea un compromiso a partir de las condiciones de sasticfacción")
+async def create_commitment(request: ClassificationRequest):
+    text = request.texto.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
+
+    return await commitment(text)
+
 @app.post("/redactar-compromiso", summary="Redactar Compromiso", description="Redacta un compromiso a partir del texto proporcionado en el formato '[persona] va a [hacer algo] antes de la fecha [fecha] en [lugar]'.")
 async def redactar_compromiso(request: ClassificationRequest):
     text = request.texto.strip()
     if not text:
         raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
 
-    # Crear una instancia del cliente de OpenAI
-    openai_client = OpenAI(api_key=api_key)
-
-    # Crear el mensaje para enviar al ChatBot
-    message = [
-        {
-            "role": "system",
-            "content": (
-                "Redacta el siguiente texto en el formato '[persona] va a [hacer algo] antes de la fecha [fecha] en [lugar]'. "
-                "Por ejemplo, si el texto es 'Vale Puente, voy a pasear a mi perrita antes del antes del 2024-08-21 en en la calle', "
-                "Vale Puente, va a pasear a su perrita antes del 21 de agosto del 2024 en la calle'."
-            )
-        }
-    ]
+    return await redact_commitment(text)
 
-    # Agregar la entrada del usuario al mensaje
-    message.append({"role": "user", "content": text})
+@app.post("/redactar-compromiso/stream", summary="Redactar Compromiso en Streaming", description="Igual que /redactar-compromiso, pero envía el texto como Server-Sent Events a medida que lo genera el modelo de lenguaje.")
+async def redactar_compromiso_stream(request: ClassificationRequest):
+    text = request.texto.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail=EMPTY_TEXT_ERROR)
 
-    # Obtener la respuesta del ChatBot
-    completion = openai_client.chat.completions.create(
-        model=GPT_MODEL,
-        messages=message
+    return StreamingResponse(
+        stream_gpt("redactar-compromiso", REDACT_COMMITMENT_PROMPT, text, "compromiso_redactado"),
+        media_type="text/event-stream",
+        # Evita que los proxies acumulen la respuesta antes de reenviarla
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    # Obtener la respuesta del ChatBot
-    assistant_response = completion.choices[0].message.content.strip()
+@app.post("/jobs", status_code=202, summary="Crear Trabajo de Análisis", description="Encola el análisis de una lista de textos (hasta JOB_MAX_ITEMS) y devuelve el identificador del trabajo. Los resultados se consultan después con /jobs/{id} y /jobs/{id}/results.")
+async def create_job(request: JobRequest):
+    requested = list(dict.fromkeys(request.analisis))
+    require_analyses(requested)
+    if not request.textos:
+        raise HTTPException(status_code=400, detail=JOB_EMPTY_ERROR)
+    if len(request.textos) > JOB_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=JOB_TOO_LARGE_ERROR)
+
+    texts = [normalize_text(text) for text in request.textos]
+    job_id = await asyncio.to_thread(job_store.create, texts, requested)
+    job_runner.start()
+    job_runner.notify()
+    return JSONResponse(content=format_job(await get_job(job_id)), status_code=202, headers={"Location": f"/jobs/{job_id}"})
+
+@app.get("/jobs/{job_id}", summary="Estado de un Trabajo", description="Devuelve el estado de un trabajo (queued, running, completed o failed) y cuántos de sus textos se han analizado.")
+async def read_job(job_id: str):
+    return format_job(await get_job(job_id))
 
-    return {"compromiso_redactado": assistant_response}
+@app.get("/jobs/{job_id}/results", summary="Resultados de un Trabajo", description="Devuelve una página de resultados de un trabajo, en el orden de los textos. Los textos aún sin analizar aparecen con estado 'pending'.")
+async def read_job_results(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=JOB_PAGE_MAX)):
+    job = await get_job(job_id)
+    rows = await asyncio.to_thread(job_store.results, job_id, offset, limit)
+    return {
+        "id": job_id,
+        "estado": job["status"],
+        "resultados": [{"index": position, **result} if result is not None else {"index": position, "estado": "pending"} for position, result in rows],
+        "siguiente": offset + limit if offset + limit < job["total"] else None,
+    }
 
 
 if __name__ == "__main__":
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", 8000))
-    
+
+    if WORKERS > 1:
+        # Modo producción: varios workers que comparten los pesos de los modelos (ver gunicorn.conf.py)
+        os.execv(sys.executable, [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"])
+
     uvicorn.run("main:app", host=host, port=port, reload=True)
     # se ejecuta ahora con python main.py
\ No newline at end of file
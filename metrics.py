@@ -0,0 +1,295 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from starlette.routing import Match
+
+# Límites (en segundos) de los histogramas de latencia: desde 1 ms hasta las llamadas largas a GPT
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labelnames, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in list(zip(labelnames, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Métrica con etiquetas en el formato de texto de Prometheus."""
+
+    type = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}, recibió {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        # Lista de (sufijo, valores de etiquetas, etiquetas adicionales, valor)
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{format_labels(self.labelnames, values, extra)} {format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Un contador no puede decrecer")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [("", key, (), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), (None, 0.0, 0))[2]
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (("le", format_value(float(bound))),), cumulative))
+                samples.append(("_bucket", key, (("le", "+Inf"),), count))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """Métrica cuyo valor se lee en cada exportación a partir de las estadísticas internas de un componente.
+
+    `callback` devuelve un diccionario {tupla de valores de etiquetas: valor}.
+    """
+
+    def __init__(self, name, help, labelnames, callback, type="gauge"):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+        self.type = type
+
+    def samples(self):
+        return [("", tuple(str(value) for value in key), (), value) for key, value in sorted(self.callback().items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name, help, labelnames, callback, type="gauge"):
+        return self.register(CallbackMetric(name, help, labelnames, callback, type))
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Tiempos por etapa de la petición en curso, para la cabecera Server-Timing
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def start_request_timings():
+    timings = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def record_request_timing(stage, seconds):
+    timings = _request_timings.get()
+    if timings is not None:
+        # Las etapas que se repiten (por ejemplo, varias llamadas a GPT en /analyze) se suman
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def server_timing_header(timings):
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items())
+
+
+@contextmanager
+def stage_timer(histogram, stage, component):
+    """Mide una etapa en el histograma y la anota en los tiempos de la petición en curso."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, stage=stage, component=component)
+        record_request_timing(stage, elapsed)
+
+
+def instrument_pipeline(model, component, histogram):
+    """Mide por separado la tokenización, el forward pass y el post-procesado de un pipeline de transformers.
+
+    El pipeline llama a estos métodos sobre la propia instancia, así que basta con
+    sustituirlos por versiones que registran su duración en `histogram`.
+    """
+    for stage, method in (("preprocess", "preprocess"), ("inference", "_forward"), ("postprocess", "postprocess")):
+        original = getattr(model, method, None)
+        if original is None:
+            continue
+
+        def timed(*args, _original=original, _stage=stage, **kwargs):
+            with histogram.time(stage=_stage, component=component):
+                return _original(*args, **kwargs)
+
+        setattr(model, method, timed)
+    return model
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide la duración y las peticiones en curso de cada endpoint.
+
+    La etiqueta `endpoint` es la ruta declarada (no la URL recibida), de modo que
+    las rutas desconocidas no multiplican las series. Con `server_timing` se añade
+    a cada respuesta la cabecera `Server-Timing` con las etapas medidas durante la petición.
+    """
+
+    def __init__(self, app, duration, in_progress, server_timing=False):
+        self.app = app
+        self.duration = duration
+        self.in_progress = in_progress
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = route_path(scope)
+        method = scope["method"]
+        timings = start_request_timings()
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self.server_timing:
+                    timings["total"] = time.perf_counter() - started
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing_header(timings).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        self.in_progress.inc(endpoint=endpoint)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            self.in_progress.dec(endpoint=endpoint)
+            self.duration.observe(
+                time.perf_counter() - started, endpoint=endpoint, method=method, status=status["code"]
+            )
+
+
+def route_path(scope):
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "other"
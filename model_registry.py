@@ -0,0 +1,106 @@
+import threading
+import time
+
+
+class ModelDisabledError(Exception):
+    """Se lanza al pedir un modelo que no está habilitado en este despliegue."""
+
+    def __init__(self, name):
+        super().__init__(f"El modelo '{name}' no está habilitado")
+        self.name = name
+
+
+class ModelRegistry:
+    """Registro de modelos locales que se cargan bajo demanda o en segundo plano.
+
+    Cada modelo se registra con una función de carga y, opcionalmente, un texto
+    de calentamiento con el que se hace una pasada de inferencia tras cargarlo.
+    `enabled` limita qué modelos se pueden cargar; `None` habilita todos.
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = None if enabled is None else set(enabled)
+        self._specs = {}
+        self._models = {}
+        self._locks = {}
+        self._status = {}
+        self._thread = None
+
+    def register(self, name, loader, warmup_input=None):
+        self._specs[name] = (loader, warmup_input)
+        self._locks[name] = threading.Lock()
+        self._status[name] = {"state": "pending" if self.is_enabled(name) else "disabled"}
+
+    def is_enabled(self, name):
+        return name in self._specs and (self.enabled is None or name in self.enabled)
+
+    def enabled_names(self):
+        return [name for name in self._specs if self.is_enabled(name)]
+
+    def get(self, name):
+        """Devuelve el modelo, cargándolo (y calentándolo) si es la primera vez que se usa."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        return self.load(name)
+
+    def load(self, name, warmup=True):
+        if not self.is_enabled(name):
+            raise ModelDisabledError(name)
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._load_locked(name)
+            if warmup and self._status[name]["state"] != "ready":
+                self._warmup_locked(name, model)
+            return model
+
+    def _load_locked(self, name):
+        loader, _ = self._specs[name]
+        self._status[name] = {"state": "loading"}
+        started = time.perf_counter()
+        try:
+            model = loader()
+        except Exception as exc:
+            self._status[name] = {"state": "error", "error": str(exc)}
+            raise
+        self._models[name] = model
+        # Cargado pero aún sin calentar (por ejemplo, en el proceso maestro antes de un fork)
+        self._status[name] = {"state": "loaded", "load_seconds": round(time.perf_counter() - started, 3)}
+        return model
+
+    def _warmup_locked(self, name, model):
+        _, warmup_input = self._specs[name]
+        started = time.perf_counter()
+        if warmup_input is not None:
+            # Pasada de inferencia de prueba para que la primera petición real no pague la inicialización
+            try:
+                model([warmup_input])
+            except Exception as exc:
+                self._status[name] = {"state": "error", "error": str(exc)}
+                raise
+        self._status[name] = {
+            **self._status[name],
+            "state": "ready",
+            "warmup_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def load_all(self, warmup=True):
+        for name in self.enabled_names():
+            try:
+                self.load(name, warmup)
+            except Exception:
+                # El error queda registrado en el estado del modelo y se reintenta en la siguiente petición
+                pass
+
+    def start_background_loading(self, warmup=True):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self.load_all, args=(warmup,), name="model-loader", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def is_ready(self):
+        return all(self._status[name]["state"] == "ready" for name in self.enabled_names())
+
+    def status(self):
+        return {name: dict(status) for name, status in self._status.items()}
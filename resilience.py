@@ -0,0 +1,326 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Se lanza sin llamar al servicio externo mientras su circuit breaker está abierto."""
+
+    def __init__(self, upstream, retry_after):
+        super().__init__(f"El servicio '{upstream}' no está disponible temporalmente")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class UpstreamTimeoutError(TimeoutError):
+    """El servicio externo no respondió dentro del plazo de la llamada (incluidas las peticiones duplicadas)."""
+
+    def __init__(self, upstream, deadline):
+        super().__init__(f"El servicio '{upstream}' no respondió en {deadline} s")
+        self.upstream = upstream
+        self.deadline = deadline
+
+
+class CircuitBreaker:
+    """Deja de llamar a un servicio externo tras `failure_threshold` fallos consecutivos.
+
+    Mientras está abierto, las llamadas fallan de inmediato con `CircuitOpenError`.
+    Pasados `recovery_seconds` deja pasar una única llamada de prueba (semiabierto):
+    si funciona se cierra y, si falla, vuelve a abrirse. `clock` se puede sustituir
+    en las pruebas.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_seconds=30.0, clock=time.monotonic):
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold debe ser al menos 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self.clock() - self._opened_at >= self.recovery_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def check(self):
+        """Lanza `CircuitOpenError` si la llamada no debe hacerse; en semiabierto, reserva la llamada de prueba."""
+        with self._lock:
+            if self._state == OPEN:
+                remaining = self._opened_at + self.recovery_seconds - self.clock()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._state = HALF_OPEN
+                self._probing = False
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.recovery_seconds)
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self.clock()
+
+    def release(self):
+        # La llamada se canceló sin resultado: no cuenta como éxito ni como fallo
+        with self._lock:
+            self._probing = False
+
+    @contextmanager
+    def guard(self, is_failure=lambda exc: True):
+        """Comprueba el circuito antes de la llamada y registra su resultado al terminar."""
+        self.check()
+        try:
+            yield
+        except Exception as exc:
+            if is_failure(exc):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release()
+            raise
+        else:
+            self.record_success()
+
+    def stats(self):
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
+
+
+class Upstream:
+    """Llamadas a un servicio externo con plazo, peticiones duplicadas (hedging) y circuit breaker.
+
+    Cada llamada tiene un plazo total de `deadline` segundos. Si la primera petición
+    tarda más que el percentil `hedge_quantile` de las latencias recientes, se lanza
+    una segunda idéntica y se usa la que responda antes. Como mucho `max_hedge_ratio`
+    de las llamadas se duplican, para que un servicio lento no reciba el doble de
+    carga. `is_failure` decide qué errores cuentan para el circuit breaker (por
+    ejemplo, no un 400 del servicio).
+
+    `call` ejecuta intentos asíncronos; `call_blocking` ejecuta funciones bloqueantes
+    en un pool de hilos propio. Un intento bloqueante que supera el plazo no puede
+    interrumpirse: sigue ocupando su hilo hasta que termina.
+    """
+
+    def __init__(self, name, deadline=30.0, hedge=True, hedge_quantile=0.95, max_hedge_ratio=0.1, min_samples=20,
+                 window=200, breaker=None, is_failure=lambda exc: True, max_workers=8):
+        self.name = name
+        self.deadline = deadline
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.breaker = breaker or CircuitBreaker(name)
+        self.is_failure = is_failure
+        self.max_workers = max_workers
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._pool = None
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def hedge_delay(self):
+        """Segundos tras los que se duplica la petición, o None si no hay que duplicarla."""
+        with self._lock:
+            if not self.hedge or len(self._latencies) < self.min_samples or self.hedges >= self.max_hedge_ratio * self.calls:
+                return None
+            ordered = sorted(self._latencies)
+            return ordered[min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))]
+
+    async def call(self, attempt):
+        """Ejecuta `attempt()` (una función que devuelve una corrutina nueva en cada intento) con plazo y hedging."""
+        with self.breaker.guard(self.is_failure):
+            delay = self._start()
+            started = time.perf_counter()
+            tasks = {asyncio.ensure_future(attempt()): (started, False)}
+            error = None
+            hedged = False
+            try:
+                while tasks:
+                    remaining, timeout, can_hedge = self._next_wait(started, delay, hedged)
+                    if remaining <= 0:
+                        break
+                    done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        attempt_started, is_hedge = tasks.pop(task)
+                        if task.exception() is None:
+                            self._succeeded(attempt_started, is_hedge)
+                            return task.result()
+                        error = task.exception()
+                    if tasks and can_hedge and time.perf_counter() - started >= delay:
+                        hedged = True
+                        self._count(hedges=1)
+                        tasks[asyncio.ensure_future(attempt())] = (time.perf_counter(), True)
+                if tasks or error is None:
+                    raise self._timed_out()
+                raise error
+            finally:
+                # Se cancelan los intentos que siguen en curso (la petición duplicada que no ganó)
+                for task in tasks:
+                    if not task.cancel() and not task.cancelled():
+                        task.exception()
+
+    def call_blocking(self, fn):
+        """Versión de `call` para funciones bloqueantes (por ejemplo, un cliente HTTP síncrono)."""
+        with self.breaker.guard(self.is_failure):
+            delay = self._start()
+            started = time.perf_counter()
+            pool = self._executor()
+            futures = {pool.submit(fn): (started, False)}
+            error = None
+            hedged = False
+            try:
+                while futures:
+                    remaining, timeout, can_hedge = self._next_wait(started, delay, hedged)
+                    if remaining <= 0:
+                        break
+                    done, _ = concurrent.futures.wait(futures, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        attempt_started, is_hedge = futures.pop(future)
+                        if future.exception() is None:
+                            self._succeeded(attempt_started, is_hedge)
+                            return future.result()
+                        error = future.exception()
+                    if futures and can_hedge and time.perf_counter() - started >= delay:
+                        hedged = True
+                        self._count(hedges=1)
+                        futures[pool.submit(fn)] = (time.perf_counter(), True)
+                if futures or error is None:
+                    raise self._timed_out()
+                raise error
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def stats(self):
+        delay = self.hedge_delay()
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "deadline_s": self.deadline,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_delay_ms": delay * 1000 if delay is not None else None,
+                "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+                "circuit": self.breaker.stats(),
+            }
+
+    def _start(self):
+        delay = self.hedge_delay()
+        self._count(calls=1)
+        return delay
+
+    def _next_wait(self, started, delay, hedged):
+        # Hasta el plazo total o, si aún no se ha duplicado la petición, hasta el momento de hacerlo
+        elapsed = time.perf_counter() - started
+        remaining = self.deadline - elapsed
+        if delay is not None and not hedged:
+            return remaining, min(remaining, max(0.0, delay - elapsed)), True
+        return remaining, remaining, False
+
+    def _succeeded(self, attempt_started, hedged):
+        with self._lock:
+            self._latencies.append(time.perf_counter() - attempt_started)
+            if hedged:
+                self.hedge_wins += 1
+
+    def _timed_out(self):
+        self._count(timeouts=1)
+        return UpstreamTimeoutError(self.name, self.deadline)
+
+    def _executor(self):
+        # Se crea al primer uso, no al crear el objeto, por los forks (ver `cache.ProcessLocal`)
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix=f"{self.name}-upstream")
+            return self._pool
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+
+class RateLimiter:
+    """Limita a `rate` por segundo las operaciones que se ejecutan dentro de `async with`.
+
+    Es un token bucket: admite ráfagas de hasta `burst` operaciones y después las
+    espacia uniformemente. `waited` acumula los segundos de espera impuestos.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate debe ser positivo")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.acquired += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def stats(self):
+        return {"rate_per_second": self.rate, "acquired": self.acquired, "waited_s": round(self.waited, 3)}
@@ -0,0 +1,67 @@
+import threading
+import time
+
+
+class ConfidenceRouter:
+    """Resuelve una tarea con un modelo local cuando su confianza supera un umbral y, si no, con el modelo de lenguaje.
+
+    `local` devuelve `(resultado, confianza)`; `remote` devuelve el resultado. Se
+    registra qué fracción del tráfico se resolvió localmente y una estimación del
+    tiempo ahorrado: lo que habrían tardado en el modelo de lenguaje las peticiones
+    resueltas localmente, menos el tiempo gastado en el modelo local (también en
+    las que después hubo que enviar al modelo de lenguaje). Si el modelo de lenguaje
+    falla con uno de los errores de `fallback_errors` (por ejemplo, porque no está
+    disponible), se devuelve el resultado local aunque su confianza sea baja.
+    """
+
+    def __init__(self, threshold=0.7, name="router"):
+        if not 0 <= threshold <= 1:
+            raise ValueError("threshold debe estar entre 0 y 1")
+        self.threshold = threshold
+        self.name = name
+        self._lock = threading.Lock()
+        self._local = 0
+        self._remote = 0
+        self._fallbacks = 0
+        self._local_seconds = 0.0
+        self._remote_seconds = 0.0
+
+    async def route(self, local, remote, fallback_errors=()):
+        started = time.perf_counter()
+        local_result, confidence = await local()
+        local_seconds = time.perf_counter() - started
+        if confidence >= self.threshold:
+            self._record(local=1, local_seconds=local_seconds)
+            return local_result
+
+        started = time.perf_counter()
+        try:
+            result = await remote()
+        except fallback_errors:
+            self._record(fallbacks=1, local_seconds=local_seconds)
+            return local_result
+        self._record(remote=1, local_seconds=local_seconds, remote_seconds=time.perf_counter() - started)
+        return result
+
+    def stats(self):
+        with self._lock:
+            total = self._local + self._remote + self._fallbacks
+            avg_remote = self._remote_seconds / self._remote if self._remote else 0.0
+            return {
+                "threshold": self.threshold,
+                "local": self._local,
+                "remote": self._remote,
+                "fallbacks": self._fallbacks,
+                "local_fraction": self._local / total if total else 0.0,
+                "avg_local_ms": self._local_seconds / total * 1000 if total else 0.0,
+                "avg_remote_ms": avg_remote * 1000,
+                "estimated_saved_ms": max(0.0, (self._local * avg_remote - self._local_seconds) * 1000),
+            }
+
+    def _record(self, local=0, remote=0, fallbacks=0, local_seconds=0.0, remote_seconds=0.0):
+        with self._lock:
+            self._local += local
+            self._remote += remote
+            self._fallbacks += fallbacks
+            self._local_seconds += local_seconds
+            self._remote_seconds += remote_seconds
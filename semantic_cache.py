@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+class SemanticCache:
+    """Caché de resultados por similitud semántica del texto de entrada.
+
+    Cada entrada guarda el embedding normalizado del texto, así que la similitud
+    coseno con una consulta es un producto escalar. La búsqueda es exacta: un
+    producto matriz-vector con NumPy sobre todas las entradas del mismo
+    `namespace` (por ejemplo, el endpoint). Una consulta acierta si la
+    entrada más parecida supera `threshold`. El índice tiene como máximo
+    `max_entries` filas y, lleno, reemplaza la menos usada recientemente. Con `ttl`
+    (segundos), las entradas caducadas dejan de responder y son las primeras en
+    reemplazarse. Añadir un texto que ya está en el mismo `namespace` actualiza su
+    fila en vez de ocupar otra.
+
+    Una fracción `audit_rate` de los aciertos se guarda (hasta `audit_size`) con
+    el texto consultado y el de la entrada que respondió, para revisar a mano si
+    el umbral produce aciertos falsos.
+    """
+
+    def __init__(self, embed, threshold=0.92, max_entries=10000, audit_rate=0.05, audit_size=100, ttl=None, latency_window=1000,
+                 seed=None, clock=time.monotonic):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold debe estar entre 0 y 1")
+        if max_entries < 1:
+            raise ValueError("max_entries debe ser al menos 1")
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.audit_rate = audit_rate
+        self.ttl = ttl
+        self.clock = clock
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        # La matriz se reserva al añadir la primera entrada, cuando se conoce la dimensión de los embeddings
+        self._vectors = None
+        self._namespaces = np.zeros(max_entries, dtype=np.int64)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._expires = np.full(max_entries, np.inf)
+        self._texts = [None] * max_entries
+        self._values = [None] * max_entries
+        self._namespace_ids = {}
+        # Fila de cada (namespace, texto) guardado, para no duplicar entradas
+        self._rows = {}
+        self._size = 0
+        self._tick = 0
+        self._latencies = deque(maxlen=latency_window)
+        self.audit = deque(maxlen=audit_size)
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def embed_text(self, text):
+        return np.asarray(self.embed([text]), dtype=np.float32)[0]
+
+    def lookup(self, namespace, text, vector=None):
+        """Devuelve `(valor, embedding)`: el valor guardado más parecido (o None si no supera el umbral) y el embedding del texto."""
+        started = time.perf_counter()
+        if vector is None:
+            vector = self.embed_text(text)
+        with self._lock:
+            self.lookups += 1
+            value = None
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is not None and self._size:
+                similarities = self._vectors[:self._size] @ vector
+                similarities[self._namespaces[:self._size] != namespace_id] = -np.inf
+                similarities[self._expires[:self._size] <= self.clock()] = -np.inf
+                row = int(np.argmax(similarities))
+                similarity = float(similarities[row])
+                if similarity >= self.threshold:
+                    self.hits += 1
+                    self._tick += 1
+                    self._last_used[row] = self._tick
+                    value = self._values[row]
+                    if self._random.random() < self.audit_rate:
+                        self.audit.append({
+                            "namespace": namespace,
+                            "texto": text,
+                            "texto_cacheado": self._texts[row],
+                            "similitud": round(similarity, 4),
+                        })
+            self._latencies.append(time.perf_counter() - started)
+        return value, vector
+
+    def add(self, namespace, text, value, vector=None):
+        if vector is None:
+            vector = self.embed_text(text)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            now = self.clock()
+            namespace_id = self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+            row = self._rows.get((namespace_id, text))
+            if row is None:
+                if self._size < self.max_entries:
+                    row = self._size
+                    self._size += 1
+                else:
+                    # Primero una entrada caducada; si no hay ninguna, la usada hace más tiempo
+                    expired = np.flatnonzero(self._expires <= now)
+                    row = int(expired[0]) if expired.size else int(np.argmin(self._last_used))
+                    del self._rows[(int(self._namespaces[row]), self._texts[row])]
+                    self.evictions += 1
+                self._rows[(namespace_id, text)] = row
+            self._tick += 1
+            self._vectors[row] = vector
+            self._namespaces[row] = namespace_id
+            self._last_used[row] = self._tick
+            self._expires[row] = now + self.ttl if self.ttl else np.inf
+            self._texts[row] = text
+            self._values[row] = value
+
+    def __len__(self):
+        return self._size
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "lookup_ms_p50": latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+                "lookup_ms_p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+                "audit": list(self.audit),
+            }
+
+
+def load_embedder(model_id, max_length=128):
+    """Carga un modelo de embeddings de frases y devuelve una función que los calcula para una lista de textos.
+
+    Los embeddings son la media de los estados de la última capa (sin los tokens de
+    relleno), normalizada a norma 1, como en los modelos de sentence-transformers.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModel.from_pretrained(model_id).eval()
+
+    def embed(texts):
+        inputs = tokenizer(list(texts), padding=True, truncation=True, max_length=max_length, return_tensors="pt")
+        with torch.inference_mode():
+            states = model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(states.dtype)
+        embeddings = (states * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        embeddings = torch.nn.functional.normalize(embeddings, dim=-1)
+        return embeddings.cpu().numpy().astype(np.float32)
+
+    return embed
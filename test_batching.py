@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import pytest
+
+from batching import MicroBatcher
+
+
+# Prueba unitaria: Verifica que las peticiones simultáneas se agrupan en un mismo lote
+def test_groups_concurrent_items():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or [item * 2 for item in items], max_batch_size=8, max_wait_ms=200)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: batcher.submit(i).result(timeout=5), range(8)))
+
+    assert results == [i * 2 for i in range(8)]
+    assert sum(len(batch) for batch in batches) == 8
+    assert len(batches) < 8
+    stats = batcher.stats()
+    assert stats["items"] == 8
+    assert stats["flushes"] == len(batches)
+
+# Prueba unitaria: Verifica que el lote nunca supera el tamaño máximo configurado
+def test_respects_max_batch_size():
+    release = threading.Event()
+    sizes = []
+
+    def process(items):
+        release.wait(timeout=5)
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(10)]
+    release.set()
+
+    assert [future.result(timeout=5) for future in futures] == list(range(10))
+    assert max(sizes) <= 3
+    assert batcher.stats()["flush_reasons"]["size"] >= 1
+
+# Prueba unitaria: Verifica que los elementos acumulados durante un lote lento se despachan juntos
+def test_drains_backlog_after_slow_batch():
+    started = threading.Event()
+    release = threading.Event()
+    sizes = []
+
+    def process(items):
+        started.set()
+        release.wait(timeout=5)
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=8, max_wait_ms=1)
+    first = batcher.submit(0)
+    started.wait(timeout=5)
+    # Mientras se procesa el primer lote, la espera máxima de los siguientes elementos vence
+    futures = [batcher.submit(i) for i in range(1, 9)]
+    threading.Event().wait(0.05)
+    release.set()
+
+    assert first.result(timeout=5) == 0
+    assert [future.result(timeout=5) for future in futures] == list(range(1, 9))
+    assert sizes == [1, 8]
+
+# Prueba unitaria: Verifica que un elemento solo se despacha al cumplirse la espera máxima
+def test_flushes_single_item_after_wait():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=16, max_wait_ms=1)
+    assert batcher.submit("hola").result(timeout=5) == "hola"
+    assert batcher.stats()["flush_reasons"]["wait"] == 1
+
+# Prueba unitaria: Verifica que un error del pipeline llega a todos los solicitantes del lote
+def test_propagates_errors():
+    def process(items):
+        raise ValueError("fallo del modelo")
+
+    batcher = MicroBatcher(process, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError):
+        batcher.submit("texto").result(timeout=5)
+    assert batcher.stats()["errors"] == 1
+
+# Prueba unitaria: Verifica que se rechazan configuraciones inválidas
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda items: items, max_batch_size=0)
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+from benchmarks.fake_openai import start_fake_openai
+from benchmarks.fake_translator import FakeTranslator
+from benchmarks.results import compare, summarize
+from llm_client import LLMClient
+from translation import translate_batch
+
+
+# Prueba unitaria: Verifica que el servidor falso responde como OpenAI según el prompt de sistema
+def test_fake_openai_server():
+    server = start_fake_openai(latency_ms=1)
+    try:
+        client = LLMClient(api_key="sk-test", model="gpt-4o", base_url=server.base_url)
+
+        async def ask():
+            try:
+                return await client.chat([
+                    {"role": "system", "content": "Dado el siguiente texto, clasifícalo"},
+                    {"role": "user", "content": "Voy a enviar el informe mañana."},
+                ])
+            finally:
+                await client.aclose()
+
+        assert asyncio.run(ask()).startswith("compromiso: ")
+        assert server.requests == 1
+    finally:
+        server.shutdown()
+
+# Prueba unitaria: Verifica que al cerrar una respuesta en streaming se corta también la del servidor
+def test_fake_openai_stream_cancellation():
+    server = start_fake_openai(token_latency_ms=20)
+    try:
+        client = LLMClient(api_key="sk-test", model="gpt-4o", base_url=server.base_url)
+        messages = [
+            {"role": "system", "content": "Redacta el siguiente texto"},
+            {"role": "user", "content": "Voy a enviar el informe mañana."},
+        ]
+
+        async def first_piece():
+            stream = client.stream(messages)
+            try:
+                return await stream.__anext__()
+            finally:
+                await stream.aclose()
+                await client.aclose()
+
+        assert asyncio.run(first_piece()) == "Juan"
+        assert client.stats()["streams_cancelled"] == 1
+        assert client.stats()["in_flight"] == 0
+        deadline = time.monotonic() + 2
+        while server.streams_cancelled == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert server.streams_cancelled == 1
+    finally:
+        server.shutdown()
+
+# Prueba unitaria: Verifica que el traductor falso es determinista y admite lotes
+def test_fake_translator():
+    translator = FakeTranslator(latency_ms=0)
+    assert translate_batch(translator, ["uno", "dos"]) == ["uno", "dos"]
+    assert translator.calls == 1
+
+# Prueba unitaria: Verifica el resumen de percentiles de las latencias
+def test_summarize():
+    stats = summarize([float(value) for value in range(1, 101)])
+    assert stats["n"] == 100
+    assert stats["p50_ms"] == 51.0
+    assert stats["p99_ms"] == 99.0
+    assert summarize([]) == {"n": 0}
+
+# Prueba unitaria: Verifica que solo se señalan como regresión los empeoramientos por encima de la tolerancia
+def test_compare_flags_regressions():
+    baseline = {
+        "stages": {"llm_call": {"p50_ms": 10.0}},
+        "endpoints": {"POST /sentiment": {"latency": {"p95_ms": 100.0}, "rps": 50.0}},
+    }
+    results = {
+        "stages": {"llm_call": {"p50_ms": 11.0}},
+        "endpoints": {"POST /sentiment": {"latency": {"p95_ms": 150.0}, "rps": 30.0}},
+    }
+    regressions = {regression["metric"] for regression in compare(results, baseline, tolerance=0.2)}
+    assert regressions == {"endpoints.POST /sentiment.p95_ms", "endpoints.POST /sentiment.rps"}
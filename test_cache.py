@@ -0,0 +1,165 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from cache import LRUCache, ProcessLocal, ResponseCache, SQLiteStore, TieredCache, hash_key, normalize_text
+
+
+# Prueba unitaria: Verifica que la caché LRU expulsa la entrada usada hace más tiempo
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+# Prueba unitaria: Verifica que las entradas caducan al superar su TTL
+def test_lru_ttl():
+    cache = LRUCache(max_entries=2, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+# Prueba unitaria: Verifica que el almacén SQLite guarda valores JSON y respeta el TTL
+def test_sqlite_store(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.db"), "items")
+    store.set("clave", {"acuerdo": 50})
+    assert store.get("clave") == {"acuerdo": 50}
+    assert len(store) == 1
+
+    expired = SQLiteStore(str(tmp_path / "cache.db"), "expired", ttl=-1)
+    expired.set("clave", "valor")
+    assert expired.get("clave") is None
+
+# Prueba unitaria: Verifica que un recurso por proceso se crea al primer uso y de nuevo si cambia el pid
+def test_process_local(monkeypatch):
+    created = []
+    resource = ProcessLocal(lambda: created.append(object()) or created[-1])
+    assert created == []
+    first = resource.get()
+    assert resource.get() is first
+    pid = os.getpid()
+    monkeypatch.setattr(os, "getpid", lambda: pid + 1)
+    assert resource.pop() is None
+    assert resource.get() is not first
+    assert len(created) == 2
+
+# Prueba unitaria: Verifica que los aciertos del nivel persistente se promocionan a memoria
+def test_tiered_cache_promotes_store_hits(tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.db"))
+    store.set("clave", "valor")
+    cache = TieredCache(LRUCache(4), store)
+    assert cache.get("clave") == "valor"
+    assert cache.get("clave") == "valor"
+    assert cache.get("otra") is None
+    stats = cache.stats()
+    assert (stats["store_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+
+# Prueba unitaria: Verifica que la versión asíncrona consulta la memoria primero y el almacén persistente fuera del bucle de eventos
+def test_tiered_cache_async_store_off_loop(tmp_path):
+    threads = []
+
+    class RecordingStore(SQLiteStore):
+        def get(self, key, default=None):
+            threads.append(threading.get_ident())
+            return super().get(key, default)
+
+        def set(self, key, value):
+            threads.append(threading.get_ident())
+            super().set(key, value)
+
+    store = RecordingStore(str(tmp_path / "cache.db"))
+    store.set("persistente", "disco")
+    threads.clear()
+    cache = TieredCache(LRUCache(4), store)
+
+    async def run():
+        cache.memory.set("memoria", "ram")
+        assert await cache.first_async(["otra", "memoria"]) == ("memoria", "ram")
+        assert threads == []
+        assert await cache.first_async(["otra", "persistente"]) == ("persistente", "disco")
+        assert await cache.get_async("falta") is None
+        await cache.set_async("nueva", "valor")
+
+    asyncio.run(run())
+    assert len(threads) == 4
+    assert threading.get_ident() not in threads
+    assert store.get("nueva") == "valor"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["store_hits"], stats["misses"]) == (1, 1, 1)
+
+# Prueba unitaria: Verifica la normalización de textos y el cálculo de claves
+def test_normalize_and_hash():
+    assert normalize_text("  Estoy\n muy   feliz ") == "Estoy muy feliz"
+    assert normalize_text("cafe\u0301") == "caf\u00e9"
+    assert hash_key("a", "bc") != hash_key("ab", "c")
+
+
+# Prueba unitaria: Verifica que las peticiones idénticas en curso comparten una sola llamada
+def test_response_cache_single_flight():
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"acuerdo": 100}
+
+    cache = ResponseCache(max_entries=4)
+
+    async def run():
+        results = await asyncio.gather(*(cache.get_or_compute("clave", upstream) for _ in range(5)))
+        # Una vez resuelta, la respuesta se sirve desde la caché
+        results.append(await cache.get_or_compute("clave", upstream))
+        return results
+
+    assert asyncio.run(run()) == [{"acuerdo": 100}] * 6
+    assert calls == 1
+    stats = cache.stats()
+    assert stats["coalesced"] == 4
+    assert stats["memory_hits"] == 1
+    assert stats["in_flight"] == 0
+
+# Prueba unitaria: Verifica que los errores no se cachean y llegan a todos los solicitantes
+def test_response_cache_does_not_store_errors():
+    attempts = 0
+
+    async def failing():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("fallo del modelo")
+
+    cache = ResponseCache(max_entries=4)
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_compute("clave", failing) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("clave", failing))
+    assert attempts == 2
+
+# Prueba unitaria: Verifica que cancelar al primer solicitante no cancela la llamada compartida
+def test_response_cache_leader_cancellation():
+    async def upstream():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    cache = ResponseCache(max_entries=4)
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_compute("clave", upstream))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(cache.get_or_compute("clave", upstream))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "ok"
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+
+from chunking import TextChunker, aggregate_scores, length_buckets, split_sentences
+
+
+class WhitespaceTokenizer:
+    # Tokenizer mínimo: un token por palabra y dos tokens especiales, como [CLS] y [SEP]
+    model_max_length = 12
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 2
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        return {"offset_mapping": [match.span() for match in re.finditer(r"\S+", text)]}
+
+
+# Prueba unitaria: Verifica que los textos que caben en el modelo no se dividen
+def test_short_text_is_a_single_window():
+    chunker = TextChunker(WhitespaceTokenizer(), stride=2)
+    assert chunker.split("uno dos") == ["uno dos"]
+    assert chunker.split("uno dos tres cuatro cinco seis siete ocho nueve diez") == [
+        "uno dos tres cuatro cinco seis siete ocho nueve diez"
+    ]
+
+# Prueba unitaria: Verifica que los textos largos se dividen en ventanas solapadas que caben en el modelo
+def test_long_text_overlapping_windows():
+    chunker = TextChunker(WhitespaceTokenizer(), stride=2)
+    words = [f"w{index}" for index in range(25)]
+    windows = chunker.split(" ".join(words))
+    assert [window.split() for window in windows] == [words[0:10], words[8:18], words[16:25]]
+    assert all(len(window.split()) <= chunker.max_tokens for window in windows)
+
+# Prueba unitaria: Verifica que se rechaza un solapamiento igual o mayor que la ventana
+def test_invalid_stride():
+    with pytest.raises(ValueError):
+        TextChunker(WhitespaceTokenizer(), stride=10)
+
+# Prueba unitaria: Verifica que las puntuaciones de las ventanas se combinan con una media ponderada
+def test_aggregate_scores():
+    first = [{"label": "positive", "score": 0.9}, {"label": "negative", "score": 0.1}]
+    second = [{"label": "negative", "score": 0.6}, {"label": "positive", "score": 0.4}]
+    assert aggregate_scores([first], [10]) == first
+    combined = aggregate_scores([first, second], [1, 3])
+    scores = {item["label"]: item["score"] for item in combined}
+    assert scores["positive"] == pytest.approx(0.9 * 0.25 + 0.4 * 0.75)
+    assert scores["negative"] == pytest.approx(0.1 * 0.25 + 0.6 * 0.75)
+    assert [item["label"] for item in combined] == ["positive", "negative"]
+
+# Prueba unitaria: Verifica que los textos se agrupan en lotes de longitud parecida
+def test_length_buckets():
+    lengths = [500, 10, 20, 480, 30]
+    buckets = length_buckets(lengths, max_batch_size=16, max_padding=0.3, min_length=64)
+    assert buckets == [[1, 2, 4], [3, 0]]
+    assert sorted(index for bucket in buckets for index in bucket) == list(range(len(lengths)))
+    # Textos cortos: un único lote aunque sus longitudes sean distintas
+    assert length_buckets([5, 40, 60], max_batch_size=16) == [[0, 1, 2]]
+    assert length_buckets([100] * 5, max_batch_size=2) == [[0, 1], [2, 3], [4]]
+
+# Prueba unitaria: Verifica que el texto se divide en oraciones con su posición en el texto original
+def test_split_sentences():
+    text = "Hola. ¿Qué tal?  ¡Muy bien!\nSin punto final\n\nEl 3.5% sube..."
+    sentences = split_sentences(text)
+    assert [sentence.text for sentence in sentences] == [
+        "Hola.", "¿Qué tal?", "¡Muy bien!", "Sin punto final", "El 3.5% sube...",
+    ]
+    assert all(text[sentence.start:sentence.end] == sentence.text for sentence in sentences)
+    assert split_sentences("   ") == []
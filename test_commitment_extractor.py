@@ -0,0 +1,70 @@
+from commitment_extractor import CUANDO, DONDE, QUE, QUIEN, SLOTS, CommitmentExtractor
+
+extractor = CommitmentExtractor()
+
+
+# Prueba unitaria: Verifica que se extraen las cuatro partes de una frase de compromiso habitual
+def test_extracts_all_slots():
+    extraction = extractor.extract("Juan va a hacer cambio en la base de datos mañana en la oficina")
+    assert extraction.slots == {
+        QUIEN: "Juan",
+        QUE: "va a hacer cambio en la base de datos",
+        CUANDO: "mañana",
+        DONDE: "la oficina",
+    }
+    assert not extraction.unresolved
+
+# Prueba unitaria: Verifica que se reconocen fechas con preposiciones repetidas y el sujeto separado por coma
+def test_extracts_dates_and_leading_subject():
+    extraction = extractor.extract("Vale Puente, voy a pasear a mi perrita antes del antes del 2024-08-21 en en la calle.")
+    assert extraction.slots[QUIEN] == "Vale Puente"
+    assert extraction.slots[QUE] == "voy a pasear a mi perrita"
+    assert extraction.slots[CUANDO] == "2024-08-21"
+    assert extraction.slots[DONDE] == "la calle"
+
+# Prueba unitaria: Verifica que la primera persona sin sujeto explícito se resuelve con el sujeto implícito
+def test_implicit_subject():
+    assert extractor.extract("Vamos a preparar la presentación el 15 de marzo").slots[QUIEN] == "Nosotros"
+    assert extractor.extract("Me comprometo a llamar al cliente esta tarde").slots[QUIEN] == "Yo"
+
+# Prueba unitaria: Verifica que las partes que las reglas no resuelven con seguridad se marcan como pendientes
+def test_marks_unresolved_slots():
+    extraction = extractor.extract("Va a mandar las facturas en dos días")
+    assert extraction.unresolved == {QUIEN}
+    assert extraction.slots[QUIEN] == ""
+    assert extraction.slots[CUANDO] == "en dos días"
+
+    # "en la notaría" no es un lugar conocido: se deja al modelo de lenguaje
+    extraction = extractor.extract("La directora irá a firmar el acuerdo el 3 de abril en la notaría")
+    assert extraction.unresolved == {DONDE}
+
+# Prueba unitaria: Verifica que lo que precede al verbo no se toma como sujeto si es otra oración
+def test_clause_is_not_subject():
+    extraction = extractor.extract("Creo que va a llover mañana")
+    assert extraction.unresolved == {QUIEN}
+    assert extraction.slots[QUIEN] == ""
+    assert extraction.slots[CUANDO] == "mañana"
+
+    # Tampoco con el NER, aunque la oración contenga una persona
+    def ner(texts):
+        return [[("Ana", "PER")] for _ in texts]
+
+    assert extractor.extract("Dice que Ana va a enviar el informe mañana", ner).unresolved == {QUIEN}
+
+# Prueba unitaria: Verifica que sin verbo de compromiso no se resuelve ninguna parte
+def test_without_commitment_verb():
+    extraction = extractor.extract("Estudiar al menos dos horas todos los días")
+    assert extraction.unresolved == set(SLOTS)
+    assert all(value == "" for value in extraction.slots.values())
+
+# Prueba unitaria: Verifica que el NER completa los lugares y personas que las reglas no reconocen
+def test_completes_with_ner():
+    def ner(texts):
+        return [[("Ana", "PER"), ("Gran Vía", "LOC")] for _ in texts]
+
+    text = "Va a enviar el informe mañana en la Gran Vía"
+    assert extractor.extract(text).unresolved == {QUIEN, DONDE}
+    extraction = extractor.extract(text, ner)
+    assert extraction.unresolved == {QUIEN}
+    assert extraction.slots[DONDE] == "la Gran Vía"
+    assert extraction.slots[QUE] == "Va a enviar el informe"
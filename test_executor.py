@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from batching import MicroBatcher
+from executor import InferenceExecutor, ServiceOverloadedError, INTERACTIVE, BULK
+
+
+def blocked_executor(max_queue=4):
+    # Executor con su único worker ocupado hasta que se libere el evento
+    executor = InferenceExecutor(workers=1, max_queue=max_queue)
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(timeout=5)
+
+    executor.submit(block)
+    started.wait(timeout=5)
+    return executor, release
+
+
+# Prueba unitaria: Verifica que el carril interactivo se atiende antes que el de lotes
+def test_interactive_lane_has_priority():
+    executor, release = blocked_executor()
+    order = []
+    futures = [
+        executor.submit(order.append, "bulk", lane=BULK),
+        executor.submit(order.append, "interactive", lane=INTERACTIVE),
+    ]
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert order == ["interactive", "bulk"]
+
+# Prueba unitaria: Verifica que una cola llena rechaza la tarea con un tiempo de reintento
+def test_rejects_when_queue_is_full():
+    executor, release = blocked_executor(max_queue=2)
+    executor.submit(lambda: None, lane=BULK)
+    executor.submit(lambda: None, lane=BULK)
+    with pytest.raises(ServiceOverloadedError) as error:
+        executor.submit(lambda: None, lane=BULK)
+    assert error.value.retry_after >= 1
+
+    # El carril interactivo tiene su propia capacidad
+    future = executor.submit(lambda: "ok", lane=INTERACTIVE)
+    release.set()
+    assert future.result(timeout=5) == "ok"
+    assert executor.stats()["lanes"]["bulk"]["rejected"] == 1
+
+# Prueba unitaria: Verifica que los errores de la tarea llegan al solicitante
+def test_propagates_task_errors():
+    executor = InferenceExecutor(workers=1, max_queue=2)
+    with pytest.raises(ZeroDivisionError):
+        executor.submit(lambda: 1 / 0).result(timeout=5)
+
+# Prueba unitaria: Verifica que el micro-batching rechaza elementos cuando su cola está llena
+def test_batcher_rejects_when_full():
+    release = threading.Event()
+
+    def process(items):
+        release.wait(timeout=5)
+        return items
+
+    batcher = MicroBatcher(process, max_batch_size=1, max_wait_ms=0, max_pending=1)
+    first = batcher.submit(1)
+    # Espera a que el primer elemento salga de la cola para llenarla con el segundo
+    while batcher.stats()["pending"]:
+        time.sleep(0.001)
+    second = batcher.submit(2)
+    with pytest.raises(ServiceOverloadedError):
+        batcher.submit(3)
+    release.set()
+    assert first.result(timeout=5) == 1
+    assert second.result(timeout=5) == 2
@@ -0,0 +1,123 @@
+import asyncio
+import os
+
+from jobs import COMPLETED, FAILED, QUEUED, RUNNING, JobRunner, JobStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def upper(texts, analyses):
+    return [({"texto": text.upper(), "analisis": analyses}, False) for text in texts]
+
+
+def run_all(runner):
+    async def drain():
+        while await runner.run_once():
+            pass
+
+    asyncio.run(drain())
+
+
+# Prueba unitaria: Verifica que un trabajo se procesa por fragmentos y sus resultados se paginan en orden
+def test_job_runs_to_completion(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create(["uno", "dos", "tres"], ["sentiment"])
+    assert store.get(job_id)["status"] == QUEUED
+
+    runner = JobRunner(store, upper, chunk_size=2)
+    run_all(runner)
+    job = store.get(job_id)
+    assert job["status"] == COMPLETED
+    assert job["completed"] == 3
+    assert store.results(job_id, offset=1, limit=5) == [
+        (1, {"texto": "DOS", "analisis": ["sentiment"]}),
+        (2, {"texto": "TRES", "analisis": ["sentiment"]}),
+    ]
+    assert store.stats()["pending_texts"] == 0
+
+# Prueba unitaria: Verifica que el archivo de la base de datos no se crea hasta que se usa
+def test_store_opens_lazily(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    assert not os.path.exists(path)
+    store.close()
+    assert store.get("no-existe") is None
+    assert os.path.exists(path)
+
+# Prueba unitaria: Verifica que tras un reinicio se reanudan los textos reservados que no llegaron a guardarse
+def test_job_resumes_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    clock = FakeClock()
+    store = JobStore(path, lease_seconds=60, clock=clock)
+    job_id = store.create(["uno", "dos", "tres"], ["sentiment"])
+    claim = store.claim(2)
+    store.complete(job_id, {claim.positions[0]: {"texto": "UNO"}})
+    # El proceso muere con "dos" reservado: mientras dure la reserva solo queda "tres"
+    store.close()
+
+    restarted = JobStore(path, lease_seconds=60, clock=clock)
+    assert restarted.get(job_id)["status"] == RUNNING
+    assert restarted.claim(10).texts == ["tres"]
+    restarted.complete(job_id, {2: {"texto": "TRES"}})
+    clock.now += 61
+    claim = restarted.claim(10)
+    assert claim.texts == ["dos"]
+    assert claim.attempts == [2]
+    restarted.complete(job_id, {1: {"texto": "DOS"}})
+    assert restarted.get(job_id)["status"] == COMPLETED
+    assert [result for _, result in restarted.results(job_id)] == [{"texto": "UNO"}, {"texto": "DOS"}, {"texto": "TRES"}]
+
+# Prueba unitaria: Verifica que los errores transitorios se reintentan hasta agotar los intentos
+def test_job_retries_transient_errors(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    calls = []
+
+    async def flaky(texts, analyses):
+        calls.append(list(texts))
+        return [({"error": "saturado"}, True) for _ in texts]
+
+    runner = JobRunner(store, flaky, max_attempts=2, retry_delay=0)
+    job_id = store.create(["uno"], ["sentiment"])
+    run_all(runner)
+    assert calls == [["uno"], ["uno"]]
+    assert store.get(job_id)["status"] == COMPLETED
+    assert store.results(job_id) == [(0, {"error": "saturado"})]
+    assert runner.stats()["retried"] == 1
+
+# Prueba unitaria: Verifica que un error inesperado marca el trabajo como fallido
+def test_job_fails_on_unexpected_error(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+
+    async def broken(texts, analyses):
+        raise RuntimeError("fallo")
+
+    job_id = store.create(["uno"], ["sentiment"])
+    run_all(JobRunner(store, broken))
+    job = store.get(job_id)
+    assert job["status"] == FAILED
+    assert "fallo" in job["error"]
+    assert store.get("no-existe") is None
+
+# Prueba unitaria: Verifica que los workers en segundo plano procesan los trabajos nuevos al recibir el aviso
+def test_runner_workers(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    runner = JobRunner(store, upper, workers=2, chunk_size=1, poll_interval=5)
+
+    async def run():
+        runner.start()
+        job_id = store.create(["uno", "dos", "tres"], ["sentiment"])
+        runner.notify()
+        for _ in range(100):
+            if store.get(job_id)["status"] == COMPLETED:
+                break
+            await asyncio.sleep(0.01)
+        await runner.stop()
+        return job_id
+
+    assert store.get(asyncio.run(run()))["status"] == COMPLETED
@@ -0,0 +1,17 @@
+from language import detect_language
+
+
+# Prueba unitaria: Verifica que se reconocen textos en inglés y en español
+def test_detects_english_and_spanish():
+    assert detect_language("I love this!") == "en"
+    assert detect_language("This is the worst meeting we have ever had.") == "en"
+    assert detect_language("No creo que eso funcione.") == "es"
+    assert detect_language("Me siento un poco triste por la noticia.") == "es"
+
+# Prueba unitaria: Verifica que los textos sin pruebas suficientes no se asignan a ningún idioma
+def test_undetermined_language():
+    assert detect_language("12345") is None
+    assert detect_language("Hello") is None
+    assert detect_language("") is None
+    # Un carácter propio del español descarta el inglés
+    assert detect_language("I love the jamón of this city") != "en"
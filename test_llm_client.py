@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import APITimeoutError
+
+from llm_client import LLMClient
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-prueba",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    }
+
+
+def make_client(handler, **kwargs):
+    return LLMClient(api_key="sk-prueba", model="gpt-3.5-turbo", base_url="http://stand-in.local/v1",
+                     max_retries=0, transport=httpx.MockTransport(handler), **kwargs)
+
+
+# Prueba unitaria: Verifica que el cliente devuelve el texto de la respuesta y envía el modelo configurado
+def test_chat_returns_content():
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json=completion("acuerdo: 100%"))
+
+    client = make_client(handler)
+
+    async def run():
+        first = await client.chat([{"role": "user", "content": "hola"}])
+        openai_client = client.client()
+        await client.chat([{"role": "user", "content": "hola"}])
+        # El cliente (y su pool de conexiones) se reutiliza entre peticiones
+        assert client.client() is openai_client
+        await client.aclose()
+        return first
+
+    assert asyncio.run(run()) == "acuerdo: 100%"
+    assert requests[0]["model"] == "gpt-3.5-turbo"
+    assert client.stats()["requests"] == 2
+
+# Prueba unitaria: Verifica que el número de peticiones simultáneas al modelo está acotado
+def test_concurrency_limit():
+    active = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, json=completion("ok"))
+
+    client = make_client(handler, max_concurrency=2)
+
+    async def run():
+        await asyncio.gather(*(client.chat([{"role": "user", "content": str(i)}]) for i in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+
+# Prueba unitaria: Verifica que un timeout del modelo se propaga y se contabiliza como error
+def test_timeout_is_raised():
+    def handler(request):
+        raise httpx.ReadTimeout("timeout", request=request)
+
+    client = make_client(handler, timeout=0.1)
+    with pytest.raises(APITimeoutError):
+        asyncio.run(client.chat([{"role": "user", "content": "hola"}]))
+    assert client.stats()["errors"] == 1
+
+# Prueba unitaria: Verifica que el modo streaming devuelve los fragmentos de la respuesta según llegan
+def test_stream_yields_chunks():
+    def chunk(content):
+        delta = {"content": content} if content is not None else {}
+        return {
+            "id": "chatcmpl-prueba",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-3.5-turbo",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None if content is not None else "stop"}],
+        }
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        events = "".join(f"data: {json.dumps(chunk(content))}\n\n" for content in ("Juan", " va", " a", None))
+        return httpx.Response(200, content=events + "data: [DONE]\n\n", headers={"Content-Type": "text/event-stream"})
+
+    client = make_client(handler)
+
+    async def run():
+        pieces = [piece async for piece in client.stream([{"role": "user", "content": "hola"}])]
+        await client.aclose()
+        return pieces
+
+    assert asyncio.run(run()) == ["Juan", " va", " a"]
+    assert client.stats()["in_flight"] == 0
+    assert client.stats()["streams_cancelled"] == 0
@@ -1,5 +1,21 @@
+import asyncio
+import gc
+import json
+import os
+import tempfile
+
+import numpy as np
+import pytest
+
+# Los trabajos de /jobs de las pruebas se guardan en un directorio temporal y no en el directorio actual
+os.environ.setdefault("JOBS_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+
 from fastapi.testclient import TestClient
-from main import app
+import main
+from jobs import COMPLETED, JobRunner, JobStore
+from resilience import RateLimiter
+from semantic_cache import SemanticCache
+from main import app, parse_multitask, format_classification, CLASSIFY_HYPOTHESES, llm_upstream, map_emotion_labels, NATIVE_EMOTION_LABELS
 
 client = TestClient(app)
 
@@ -9,6 +25,41 @@ def test_read_root():
     assert response.status_code == 200
     assert "documentation_url" in response.json()
 
+# Prueba unitaria: Verifica que la comprobación de vida responde sin esperar a los modelos
+def test_health_live():
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+# Prueba unitaria: Verifica que la comprobación de disponibilidad refleja el estado de los modelos
+def test_health_ready():
+    client.post("/sentiment", json={"text": "I love this!"})
+    client.post("/emotions", json={"texto": "Estoy muy feliz"})
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    json_response = response.json()
+    assert json_response["status"] == "ready"
+    assert json_response["models"]["sentiment"]["state"] == "ready"
+
+# Prueba unitaria: Verifica que las estadísticas de micro-batching se exponen tras analizar un texto
+def test_batching_stats():
+    client.post("/sentiment", json={"text": "I love this!"})
+    response = client.get("/stats")
+    assert response.status_code == 200
+    batching = response.json()["batching"]
+    assert batching["sentiment"]["items"] >= 1
+    assert "emotions" in batching
+
+# Prueba unitaria: Verifica que las métricas de Prometheus incluyen la latencia por endpoint y por etapa
+def test_metrics():
+    client.post("/emotions", json={"texto": "Estoy muy feliz"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'textedit_request_duration_seconds_count{endpoint="/emotions",method="POST",status="200"}' in response.text
+    assert 'textedit_stage_duration_seconds_count{stage="translate",component="translator"}' in response.text
+    assert 'textedit_queue_depth{queue="executor-interactive"}' in response.text
+
 # Prueba unitaria: Verifica que el análisis de sentimiento funciona correctamente con texto válido
 def test_analyze_sentiment():
     response = client.post("/sentiment", json={"text": "I love this!"})
@@ -24,6 +75,227 @@ def test_analyze_emotions():
     json_response = response.json()
     assert "emoción_principal" in json_response
 
+# Prueba unitaria: Verifica que el análisis de sentimiento en lote respeta el orden y marca los textos vacíos
+def test_analyze_sentiment_batch():
+    response = client.post("/sentiment/batch", json={"texts": ["I love this!", " ", "Odio esto"]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 3
+    assert "sentiment" in results[0]
+    assert results[1] == {"error": "El texto no puede estar vacío"}
+    assert "score" in results[2]
+
+# Prueba unitaria: Verifica que el análisis de emociones en lote respeta el orden y marca los textos vacíos
+def test_analyze_emotions_batch():
+    response = client.post("/emotions/batch", json={"textos": ["Estoy muy feliz", "", "Tengo mucho miedo"]})
+    assert response.status_code == 200
+    results = response.json()["resultados"]
+    assert len(results) == 3
+    assert "emoción_principal" in results[0]
+    assert "error" in results[1]
+    assert "emoción_principal" in results[2]
+
+# Prueba unitaria: Verifica que los endpoints de lotes rechazan peticiones sin la lista de textos
+def test_nonexistent_texts_batch():
+    assert client.post("/sentiment/batch", json={}).status_code == 422
+    assert client.post("/emotions/batch", json={}).status_code == 422
+
+# Prueba unitaria: Verifica que el análisis combinado devuelve cada análisis solicitado con sus tiempos
+def test_analyze_combined():
+    response = client.post("/analyze", json={"texto": "Estoy de acuerdo con esto", "analisis": ["sentiment", "emotions", "classify"]})
+    assert response.status_code == 200
+    json_response = response.json()
+    assert "sentiment" in json_response["resultados"]["sentiment"]
+    assert "emoción_principal" in json_response["resultados"]["emotions"]
+    assert "acuerdo" in json_response["resultados"]["classify"]
+    assert json_response["errores"] == {}
+    for name in ("sentiment", "emotions", "classify", "translate", "total"):
+        assert name in json_response["tiempos_ms"]
+
+# Prueba unitaria: Verifica que el análisis combinado valida el texto y los análisis solicitados
+def test_analyze_invalid_requests():
+    assert client.post("/analyze", json={"texto": " "}).status_code == 400
+    assert client.post("/analyze", json={}).status_code == 422
+    assert client.post("/analyze", json={"texto": "Hola", "analisis": ["desconocido"]}).status_code == 422
+
+# Prueba unitaria: Verifica que un error inesperado en un texto se guarda en su resultado sin hacer fallar el trabajo
+def test_job_text_error(monkeypatch, tmp_path):
+    async def analyze_text(text, *args):
+        if text == "roto":
+            raise ValueError("respuesta con otro formato")
+        return {"resultados": {"sentiment": text}, "errores": {}, "tiempos_ms": {}}
+
+    monkeypatch.setattr(main, "analyze_text", analyze_text)
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create(["uno", "roto", "tres"], ["sentiment"])
+    runner = JobRunner(store, main.process_job_texts, max_attempts=2, retry_delay=0)
+
+    async def drain():
+        while await runner.run_once():
+            pass
+
+    asyncio.run(drain())
+    job = store.get(job_id)
+    assert job["status"] == COMPLETED
+    assert job["completed"] == 3
+    results = [result for _, result in store.results(job_id)]
+    assert results[1] == {"error": main.INTERNAL_ERROR}
+    assert results[2]["resultados"] == {"sentiment": "tres"}
+    assert runner.stats()["retried"] == 1
+
+# Prueba unitaria: Verifica que el streaming NDJSON devuelve una línea por cada texto de entrada
+def test_analyze_stream():
+    body = "\n".join([
+        json.dumps({"id": "a", "texto": "Estoy muy feliz"}),
+        json.dumps({"texto": ""}),
+        "esto no es json",
+        json.dumps("Tengo miedo"),
+    ]) + "\n"
+    response = client.post("/analyze/stream", content=body.encode("utf-8"), headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+    assert sorted(lines) == [0, 1, 2, 3]
+    assert lines[0]["id"] == "a"
+    assert "sentiment" in lines[0]["resultados"]
+    assert "emotions" in lines[0]["resultados"]
+    assert lines[1]["error"] == "El texto no puede estar vacío"
+    assert "error" in lines[2]
+    assert "resultados" in lines[3]
+
+# Prueba unitaria: Verifica que un error inesperado en un análisis se devuelve en "errores" sin perder el resto de resultados
+def test_analyze_unexpected_error(monkeypatch):
+    async def classify(*args, **kwargs):
+        raise ValueError("respuesta con otro formato")
+
+    monkeypatch.setattr(main, "classify", classify)
+    body = "".join(json.dumps({"texto": text}) + "\n" for text in ["Estoy muy feliz", "Tengo miedo"])
+    response = client.post("/analyze/stream", params={"analisis": ["sentiment", "classify"]}, content=body.encode("utf-8"))
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    for line in lines:
+        assert "sentiment" in line["resultados"]
+        assert line["errores"] == {"classify": main.INTERNAL_ERROR}
+
+    response = client.post("/analyze", json={"texto": "Estoy muy feliz", "analisis": ["sentiment", "classify"]})
+    assert response.status_code == 200
+    assert response.json()["errores"] == {"classify": main.INTERNAL_ERROR}
+
+# Prueba unitaria: Verifica que cancelar un análisis que espera turno para el modelo de lenguaje no deja corrutinas sin ejecutar
+def test_analyze_cancelled_while_waiting(recwarn):
+    async def run():
+        # Semáforo sin plazas: los análisis quedan esperando hasta que se cancelan
+        task = asyncio.ensure_future(main.analyze_text("Hola", ["desacuerdos", "redactar-compromiso"], llm_semaphore=asyncio.Semaphore(0)))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    gc.collect()
+    assert not [warning for warning in recwarn if "never awaited" in str(warning.message)]
+
+# Prueba unitaria: Verifica que la caché semántica solo calcula el embedding si el texto exacto no está en la caché de respuestas
+def test_semantic_cache_after_exact_cache(monkeypatch):
+    lanes = []
+
+    async def semantic_lookup(namespace, text, lane):
+        lanes.append(lane)
+        return None, None
+
+    async def multitask(text, task, *args, **kwargs):
+        return {"postura1": "sí", "postura2": "no"}
+
+    is_enabled = main.models.is_enabled
+    monkeypatch.setattr(main.models, "is_enabled", lambda name: name == "embeddings" or is_enabled(name))
+    monkeypatch.setattr(main, "semantic_lookup", semantic_lookup)
+    monkeypatch.setattr(main, "multitask", multitask)
+
+    text = "Texto repetido para la caché semántica"
+    analysis = {"desacuerdo": {"postura1": "a", "postura2": "b"}}
+    main.llm_cache.cache.set(main.llm_cache_key("multitask", main.MULTITASK_PROMPT, text), analysis)
+    assert asyncio.run(main.disagreement(text, main.BULK)) == {"postura1": "a", "postura2": "b"}
+    assert lanes == []
+
+    assert asyncio.run(main.disagreement("Otro texto sin respuesta guardada", main.BULK)) == {"postura1": "sí", "postura2": "no"}
+    assert lanes == [main.BULK]
+
+# Prueba unitaria: Verifica que dos peticiones idénticas simultáneas comparten la llamada y una sola entrada de la caché semántica
+def test_semantic_cache_concurrent_identical_requests(monkeypatch):
+    calls = 0
+
+    async def ask_gpt(system_prompt, text, component="gpt", **kwargs):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return json.dumps({"postura1": "a", "postura2": "b"})
+
+    is_enabled = main.models.is_enabled
+    monkeypatch.setattr(main.models, "is_enabled", lambda name: name == "embeddings" or is_enabled(name))
+    monkeypatch.setattr(main, "semantic_cache", SemanticCache(lambda texts: np.ones((len(texts), 4), dtype=np.float32) / 2))
+    monkeypatch.setattr(main, "LLM_MULTITASK", False)
+    monkeypatch.setattr(main, "ask_gpt", ask_gpt)
+
+    async def run():
+        text = "Dos peticiones idénticas que llegan a la vez"
+        return await asyncio.gather(main.disagreement(text), main.disagreement(text))
+
+    assert asyncio.run(run()) == [{"postura1": "a", "postura2": "b"}] * 2
+    assert calls == 1
+    assert len(main.semantic_cache) == 1
+
+# Prueba unitaria: Verifica que las respuestas ya cacheadas del modelo de lenguaje no consumen el límite de llamadas
+def test_llm_limit_only_on_upstream_calls():
+    text = "Texto con las respuestas ya cacheadas"
+    analysis = {"desacuerdo": {"postura1": "a", "postura2": "b"}}
+    main.llm_cache.cache.set(main.llm_cache_key("multitask", main.MULTITASK_PROMPT, text), analysis)
+    main.llm_cache.cache.set(main.llm_cache_key("redactar-compromiso", main.REDACT_COMMITMENT_PROMPT, text), {"compromiso_redactado": "x"})
+    limiter = RateLimiter(1000)
+    output = asyncio.run(main.analyze_text(text, ["desacuerdos", "redactar-compromiso"], main.BULK, limiter))
+    assert output["resultados"]["desacuerdos"] == {"postura1": "a", "postura2": "b"}
+    assert output["resultados"]["redactar-compromiso"] == {"compromiso_redactado": "x"}
+    assert limiter.stats()["acquired"] == 0
+
+# Prueba unitaria: Verifica que una línea NDJSON demasiado larga se responde con un error sin afectar al resto
+def test_analyze_stream_line_too_long(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_MAX_LINE_BYTES", 100)
+    body = "".join(json.dumps({"texto": text}) + "\n" for text in ["Estoy muy feliz", "x" * 500, "Tengo miedo"])
+    response = client.post("/analyze/stream", params={"analisis": ["sentiment"]}, content=body.encode("utf-8"))
+    assert response.status_code == 200
+    lines = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+    assert sorted(lines) == [0, 1, 2]
+    assert lines[1]["error"] == main.NDJSON_LINE_TOO_LONG_ERROR
+    assert "sentiment" in lines[0]["resultados"]
+    assert "sentiment" in lines[2]["resultados"]
+
+# Prueba unitaria: Verifica que si el cliente se desconecta tras enviar el cuerpo se cancelan los análisis pendientes
+def test_analyze_stream_disconnect(monkeypatch):
+    cancelled = []
+
+    async def analyze_ndjson_line(index, line, requested, llm_semaphore):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(index)
+            raise
+
+    class DisconnectedRequest:
+        async def stream(self):
+            yield b'{"texto": "Hola"}\n'
+
+        async def receive(self):
+            return {"type": "http.disconnect"}
+
+    async def run():
+        output = [line async for line in main.stream_analyses(DisconnectedRequest(), ["sentiment"])]
+        await asyncio.sleep(0)
+        return output
+
+    monkeypatch.setattr(main, "analyze_ndjson_line", analyze_ndjson_line)
+    assert asyncio.run(asyncio.wait_for(run(), 5)) == []
+    assert cancelled == [0]
+
 # Prueba unitaria: Verifica que la clasificación de texto funciona correctamente con texto válido
 def test_classify_text():
     response = client.post("/classify", json={"texto": "Estoy de acuerdo con esto"})
@@ -49,6 +321,66 @@ def test_create_commitment():
     json_response = response.json()
     assert "compromiso" in json_response
 
+# Prueba unitaria: Verifica que tras editar un documento solo se analizan las oraciones modificadas
+def test_document_incremental_analysis():
+    document = "El proyecto va muy bien. Estoy contento con el equipo. El cliente se queja del retraso."
+    response = client.post("/document", json={"texto": document, "analisis": ["sentiment"]})
+    assert response.status_code == 200
+    json_response = response.json()
+    assert len(json_response["oraciones"]) == 3
+    assert "sentiment" in json_response["documento"]
+    assert "sentiment" in json_response["oraciones"][0]
+
+    edited = document.replace("muy bien", "fatal")
+    response = client.post("/document", json={"texto": edited, "analisis": ["sentiment"]})
+    assert response.json()["analizadas"] == {"sentiment": 1}
+
+# Prueba unitaria: Verifica que el análisis de documentos rechaza textos vacíos
+def test_document_empty_text():
+    response = client.post("/document", json={"texto": " \n "})
+    assert response.status_code == 400
+
+# Prueba unitaria: Verifica que la redacción en streaming envía fragmentos SSE y termina con el compromiso completo
+def test_redactar_compromiso_stream():
+    response = client.post("/redactar-compromiso/stream", json={"texto": "Vale Puente, voy a pasear a mi perrita mañana en la calle"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [event for event in response.text.split("\n\n") if event]
+    assert events[0].startswith("data: ")
+    assert "compromiso_redactado" in json.loads(events[-1].split("data: ", 1)[1])
+
+# Prueba unitaria: Verifica que la redacción en streaming rechaza textos vacíos
+def test_redactar_compromiso_stream_empty_text():
+    response = client.post("/redactar-compromiso/stream", json={"texto": "   "})
+    assert response.status_code == 400
+
+# Prueba unitaria: Verifica que las probabilidades del clasificador local se convierten en porcentajes que suman 100
+def test_format_classification():
+    hypotheses = list(CLASSIFY_HYPOTHESES.values())
+    prediction = {"labels": hypotheses, "scores": [0.333, 0.333, 0.334, 0.0, 0.0]}
+    percentages, confidence = format_classification(prediction)
+    assert list(percentages) == ["compromiso", "duda", "acuerdo", "desacuerdo", "texto libre"]
+    assert sum(percentages.values()) == 100
+    assert percentages["acuerdo"] == 34
+    assert confidence == 0.334
+
+# Prueba unitaria: Verifica que la respuesta multitarea se valida y completa con valores por defecto
+def test_parse_multitask():
+    result = parse_multitask(json.dumps({
+        "clasificacion": {"compromiso": "40%", "duda": 60},
+        "desacuerdo": {"postura1": None},
+        "compromiso": {"quién": "Ana", "qué": "va a llamar"},
+    }))
+    assert result["clasificacion"] == {"compromiso": 40, "duda": 60, "acuerdo": 0, "desacuerdo": 0, "texto libre": 0}
+    assert result["desacuerdo"] == {"postura1": "", "postura2": ""}
+    assert result["compromiso"] == {"quién": "Ana", "qué": "va a llamar", "cuándo": "", "dónde": ""}
+
+# Prueba unitaria: Verifica que una respuesta multitarea que no cumple el esquema se rechaza para recurrir a la llamada individual
+def test_parse_multitask_invalid():
+    for response in ("compromiso: 100%", "{}", json.dumps({"clasificacion": {"duda": 300}})):
+        with pytest.raises(ValueError):
+            parse_multitask(response)
+
 # Pruebas unitarias: Verifica que los endpoints manejan correctamente el texto vacío
 def test_empty_text_sentiment():
     response = client.post("/sentiment", json={"text": ""})
@@ -217,3 +549,60 @@ def test_complete_text_analysis():
     assert response_commitment.status_code == 200
     commitment_data = response_commitment.json()
     assert "compromiso" in commitment_data
+
+# Prueba unitaria: Verifica que con el circuito de OpenAI abierto se responde sin llamarlo (503 o resultado local)
+def test_llm_circuit_open():
+    breaker = llm_upstream.breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    try:
+        response = client.post("/redactar-compromiso", json={"texto": "Prueba con el circuito abierto"})
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # Las reglas no resuelven quién: sin modelo de lenguaje se devuelve lo que resolvieron
+        response = client.post("/compromiso", json={"texto": "Va a mandar las facturas con el circuito abierto en dos días"})
+        assert response.status_code == 200
+        assert client.get("/stats").json()["commitment_router"]["fallbacks"] >= 1
+    finally:
+        breaker.record_success()
+
+# Prueba unitaria: Verifica que las etiquetas del modelo nativo se llevan al vocabulario de emociones de la API
+def test_map_emotion_labels():
+    prediction = [
+        {"label": "others", "score": 0.4},
+        {"label": "anger", "score": 0.25},
+        {"label": "disgust", "score": 0.15},
+        {"label": "joy", "score": 0.2},
+    ]
+    mapped = map_emotion_labels(prediction, NATIVE_EMOTION_LABELS)
+    assert [item["label"] for item in mapped] == ["anger", "joy"]
+    assert mapped[0]["score"] == pytest.approx(0.4)
+
+# Prueba unitaria: Verifica que un trabajo asíncrono se procesa en segundo plano y sus resultados se paginan
+def test_jobs():
+    import time
+    # Con el bloque `with` el servidor mantiene su event loop y los workers de /jobs siguen activos entre peticiones
+    with TestClient(app) as jobs_client:
+        response = jobs_client.post("/jobs", json={"textos": ["Estoy feliz", " ", "I love this!"], "analisis": ["sentiment"]})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["total"] == 3
+        assert response.headers["Location"] == f"/jobs/{job['id']}"
+
+        deadline = time.time() + 30
+        while job["estado"] != "completed" and time.time() < deadline:
+            time.sleep(0.05)
+            job = jobs_client.get(f"/jobs/{job['id']}").json()
+        assert job["estado"] == "completed"
+        assert job["completados"] == 3
+
+        page = jobs_client.get(f"/jobs/{job['id']}/results", params={"offset": 0, "limit": 2}).json()
+        assert [result["index"] for result in page["resultados"]] == [0, 1]
+        assert "sentiment" in page["resultados"][0]["resultados"]
+        assert page["resultados"][1]["error"] == "El texto no puede estar vacío"
+        assert page["siguiente"] == 2
+        assert jobs_client.get(f"/jobs/{job['id']}/results", params={"offset": 2}).json()["siguiente"] is None
+
+    assert client.get("/jobs/no-existe").status_code == 404
+    assert client.post("/jobs", json={"textos": []}).status_code == 400
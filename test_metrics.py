@@ -0,0 +1,88 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import MetricsMiddleware, MetricsRegistry, instrument_pipeline, stage_timer
+
+
+# Prueba unitaria: Verifica que contadores e histogramas se exportan en el formato de Prometheus
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    counter = registry.counter("errors_total", "Errores.", ("kind",))
+    histogram = registry.histogram("latency_seconds", "Latencia.", ("stage",), buckets=(0.1, 1.0))
+    counter.inc(kind="timeout")
+    counter.inc(2, kind="timeout")
+    histogram.observe(0.05, stage="llm")
+    histogram.observe(0.5, stage="llm")
+    histogram.observe(3, stage="llm")
+
+    output = registry.render()
+    assert "# TYPE errors_total counter" in output
+    assert 'errors_total{kind="timeout"} 3' in output
+    assert "# TYPE latency_seconds histogram" in output
+    assert 'latency_seconds_bucket{stage="llm",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{stage="llm",le="1.0"} 2' in output
+    assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 3' in output
+    assert 'latency_seconds_count{stage="llm"} 3' in output
+
+# Prueba unitaria: Verifica que se rechazan etiquetas que no corresponden a la métrica
+def test_rejects_unknown_labels():
+    counter = MetricsRegistry().counter("requests_total", "Peticiones.", ("endpoint",))
+    with pytest.raises(ValueError):
+        counter.inc(path="/sentiment")
+
+# Prueba unitaria: Verifica que las métricas calculadas se leen en cada exportación
+def test_callback_metric():
+    registry = MetricsRegistry()
+    depth = {"value": 1}
+    registry.callback("queue_depth", "Cola.", ("queue",), lambda: {("interactive",): depth["value"]})
+    depth["value"] = 7
+    assert 'queue_depth{queue="interactive"} 7' in registry.render()
+
+# Prueba unitaria: Verifica que se miden por separado las etapas de un pipeline
+def test_instrument_pipeline():
+    class FakePipeline:
+        def preprocess(self, text):
+            return text.lower()
+
+        def _forward(self, inputs):
+            return inputs + "!"
+
+        def postprocess(self, outputs):
+            return outputs
+
+        def __call__(self, text):
+            return self.postprocess(self._forward(self.preprocess(text)))
+
+    histogram = MetricsRegistry().histogram("stage_seconds", "Etapas.", ("stage", "component"))
+    model = instrument_pipeline(FakePipeline(), "sentiment", histogram)
+    assert model("Hola") == "hola!"
+    for stage in ("preprocess", "inference", "postprocess"):
+        assert histogram.count(stage=stage, component="sentiment") == 1
+
+# Prueba unitaria: Verifica que el middleware mide los endpoints y añade la cabecera Server-Timing
+def test_middleware_server_timing():
+    registry = MetricsRegistry()
+    duration = registry.histogram("request_seconds", "Peticiones.", ("endpoint", "method", "status"))
+    in_progress = registry.gauge("requests_in_progress", "En curso.", ("endpoint",))
+    stages = registry.histogram("stage_seconds", "Etapas.", ("stage", "component"))
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, duration=duration, in_progress=in_progress, server_timing=True)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        with stage_timer(stages, "llm", "test"):
+            pass
+        return {"item_id": item_id}
+
+    client = TestClient(app)
+    response = client.get("/items/1")
+    assert response.status_code == 200
+    assert "llm;dur=" in response.headers["server-timing"]
+    assert "total;dur=" in response.headers["server-timing"]
+    client.get("/items/2")
+    client.get("/missing")
+    assert duration.count(endpoint="/items/{item_id}", method="GET", status="200") == 2
+    assert duration.count(endpoint="other", method="GET", status="404") == 1
+    assert in_progress.value(endpoint="/items/{item_id}") == 0
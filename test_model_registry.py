@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from model_registry import ModelDisabledError, ModelRegistry
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(texts)
+        return texts
+
+
+# Prueba unitaria: Verifica que el modelo se carga una sola vez, bajo demanda, y se calienta
+def test_loads_on_demand_once():
+    loads = []
+    registry = ModelRegistry()
+    registry.register("sentiment", lambda: loads.append(1) or FakeModel(), "calentamiento")
+
+    assert registry.status()["sentiment"]["state"] == "pending"
+    assert not registry.is_ready()
+    model = registry.get("sentiment")
+    assert registry.get("sentiment") is model
+    assert loads == [1]
+    assert model.calls == [["calentamiento"]]
+    assert registry.status()["sentiment"]["state"] == "ready"
+    assert registry.is_ready()
+
+# Prueba unitaria: Verifica que los modelos no habilitados no se cargan
+def test_disabled_model():
+    registry = ModelRegistry(enabled=["sentiment"])
+    registry.register("sentiment", FakeModel)
+    registry.register("emotions", FakeModel)
+
+    with pytest.raises(ModelDisabledError):
+        registry.get("emotions")
+    assert registry.status()["emotions"]["state"] == "disabled"
+    assert registry.enabled_names() == ["sentiment"]
+
+# Prueba unitaria: Verifica la carga en segundo plano y la disponibilidad
+def test_background_loading():
+    release = threading.Event()
+
+    def slow_loader():
+        release.wait(timeout=5)
+        return FakeModel()
+
+    registry = ModelRegistry()
+    registry.register("emotions", slow_loader)
+    thread = registry.start_background_loading()
+    assert not registry.is_ready()
+    release.set()
+    thread.join(timeout=5)
+    assert registry.is_ready()
+
+# Prueba unitaria: Verifica que un fallo de carga queda registrado y se puede reintentar
+def test_load_error_is_reported():
+    attempts = []
+
+    def flaky_loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("sin conexión")
+        return FakeModel()
+
+    registry = ModelRegistry()
+    registry.register("sentiment", flaky_loader)
+    registry.load_all()
+    assert registry.status()["sentiment"] == {"state": "error", "error": "sin conexión"}
+    assert registry.get("sentiment") is not None
+
+# Prueba unitaria: Verifica que un modelo cargado sin calentar no se considera disponible hasta calentarlo
+def test_load_without_warmup():
+    registry = ModelRegistry()
+    registry.register("sentiment", FakeModel, "calentamiento")
+    model = registry.load("sentiment", warmup=False)
+    assert model.calls == []
+    assert registry.status()["sentiment"]["state"] == "loaded"
+    assert not registry.is_ready()
+
+    registry.load_all()
+    assert registry.get("sentiment") is model
+    assert model.calls == [["calentamiento"]]
+    assert registry.is_ready()
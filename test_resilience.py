@@ -0,0 +1,151 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, RateLimiter, Upstream, UpstreamTimeoutError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeUpstream:
+    """Servicio externo simulado: cada llamada tarda lo que indique `latencies` (en orden) o falla si es una excepción."""
+
+    def __init__(self, latencies):
+        self.latencies = list(latencies)
+        self.calls = 0
+
+    def next(self):
+        latency = self.latencies[min(self.calls, len(self.latencies) - 1)]
+        self.calls += 1
+        return latency
+
+    async def __call__(self):
+        latency = self.next()
+        if isinstance(latency, Exception):
+            raise latency
+        await asyncio.sleep(latency)
+        return latency
+
+    def blocking(self):
+        latency = self.next()
+        if isinstance(latency, Exception):
+            raise latency
+        time.sleep(latency)
+        return latency
+
+
+def warmed_up(upstream, latency=0.01, samples=20):
+    # Latencias previas para que el percentil del hedging tenga muestras
+    for _ in range(samples):
+        upstream._latencies.append(latency)
+    upstream.calls = samples
+    return upstream
+
+
+# Prueba unitaria: Verifica que una llamada que supera el plazo falla con UpstreamTimeoutError
+def test_deadline():
+    upstream = Upstream("fake", deadline=0.05, hedge=False)
+    with pytest.raises(UpstreamTimeoutError):
+        asyncio.run(upstream.call(FakeUpstream([1.0])))
+    assert upstream.stats()["timeouts"] == 1
+
+# Prueba unitaria: Verifica que una petición lenta se duplica tras el percentil 95 y gana la más rápida
+def test_hedges_slow_requests():
+    upstream = warmed_up(Upstream("fake", deadline=1.0))
+    fake = FakeUpstream([0.5, 0.01])
+    started = time.perf_counter()
+    assert asyncio.run(upstream.call(fake)) == 0.01
+    assert time.perf_counter() - started < 0.2
+    assert fake.calls == 2
+    stats = upstream.stats()
+    assert stats["hedges"] == 1
+    assert stats["hedge_wins"] == 1
+
+# Prueba unitaria: Verifica que las peticiones rápidas no se duplican y que se respeta el presupuesto de duplicados
+def test_hedge_budget():
+    upstream = warmed_up(Upstream("fake", deadline=1.0, max_hedge_ratio=0.1))
+    fake = FakeUpstream([0.001])
+    asyncio.run(upstream.call(fake))
+    assert fake.calls == 1
+
+    upstream.hedges = upstream.calls
+    fake = FakeUpstream([0.1, 0.001])
+    asyncio.run(upstream.call(fake))
+    assert fake.calls == 1
+
+# Prueba unitaria: Verifica el plazo y el hedging de las llamadas bloqueantes
+def test_call_blocking():
+    upstream = warmed_up(Upstream("fake", deadline=1.0))
+    fake = FakeUpstream([0.5, 0.01])
+    assert upstream.call_blocking(fake.blocking) == 0.01
+    assert upstream.stats()["hedge_wins"] == 1
+
+    upstream = Upstream("fake", deadline=0.05, hedge=False)
+    with pytest.raises(UpstreamTimeoutError):
+        upstream.call_blocking(FakeUpstream([0.5]).blocking)
+
+# Prueba unitaria: Verifica que el circuito se abre tras los fallos consecutivos y falla sin llamar al servicio
+def test_circuit_breaker_opens():
+    clock = FakeClock()
+    upstream = Upstream("fake", hedge=False, breaker=CircuitBreaker("fake", failure_threshold=2, recovery_seconds=10, clock=clock))
+    fake = FakeUpstream([ConnectionError("caído")])
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(upstream.call(fake))
+    assert upstream.breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as error:
+        asyncio.run(upstream.call(fake))
+    assert fake.calls == 2
+    assert error.value.retry_after == 10
+
+# Prueba unitaria: Verifica que tras el tiempo de recuperación una llamada de prueba correcta cierra el circuito
+def test_circuit_breaker_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker("fake", failure_threshold=1, recovery_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    breaker.check()
+    # Solo una llamada de prueba a la vez
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+    # Si la llamada de prueba falla, vuelve a abrirse
+    breaker.record_failure()
+    clock.now = 20
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+# Prueba unitaria: Verifica que los errores que no indican un servicio degradado no abren el circuito
+def test_non_failures_do_not_open_circuit():
+    upstream = Upstream("fake", hedge=False, breaker=CircuitBreaker("fake", failure_threshold=1),
+                        is_failure=lambda exc: not isinstance(exc, ValueError))
+    with pytest.raises(ValueError):
+        asyncio.run(upstream.call(FakeUpstream([ValueError("petición inválida")])))
+    assert upstream.breaker.state == CLOSED
+
+# Prueba unitaria: Verifica que el limitador admite una ráfaga y después espacia las operaciones según la tasa
+def test_rate_limiter():
+    limiter = RateLimiter(rate=50, burst=2)
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(4):
+            async with limiter:
+                pass
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(run())
+    assert 0.03 <= elapsed < 0.5
+    assert limiter.stats()["acquired"] == 4
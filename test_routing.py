@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from routing import ConfidenceRouter
+
+
+def route(router, confidence):
+    async def local():
+        return "local", confidence
+
+    async def remote():
+        await asyncio.sleep(0.01)
+        return "remote"
+
+    return asyncio.run(router.route(local, remote))
+
+
+# Prueba unitaria: Verifica que se responde localmente cuando la confianza alcanza el umbral
+def test_routes_confident_predictions_locally():
+    router = ConfidenceRouter(threshold=0.7)
+    assert route(router, 0.9) == "local"
+    assert route(router, 0.7) == "local"
+    assert router.stats()["local"] == 2
+    assert router.stats()["remote"] == 0
+
+# Prueba unitaria: Verifica que los textos ambiguos se envían al modelo de lenguaje
+def test_routes_ambiguous_predictions_remotely():
+    router = ConfidenceRouter(threshold=0.7)
+    assert route(router, 0.4) == "remote"
+    assert route(router, 0.95) == "local"
+    stats = router.stats()
+    assert stats["local_fraction"] == 0.5
+    assert stats["avg_remote_ms"] >= 10
+    assert stats["estimated_saved_ms"] > 0
+
+# Prueba unitaria: Verifica que se rechazan umbrales fuera de rango
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        ConfidenceRouter(threshold=1.5)
+
+# Prueba unitaria: Verifica que si el modelo de lenguaje no está disponible se devuelve el resultado local
+def test_falls_back_to_local_result():
+    router = ConfidenceRouter(threshold=0.7)
+
+    async def local():
+        return "local", 0.2
+
+    async def remote():
+        raise ConnectionError("sin conexión")
+
+    assert asyncio.run(router.route(local, remote, fallback_errors=(ConnectionError,))) == "local"
+    assert router.stats()["fallbacks"] == 1
+    with pytest.raises(ConnectionError):
+        asyncio.run(router.route(local, remote))
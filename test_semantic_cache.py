@@ -0,0 +1,96 @@
+import re
+
+import numpy as np
+import pytest
+
+from semantic_cache import SemanticCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+VOCABULARY = ["estoy", "de", "acuerdo", "con", "eso", "esto", "no", "creo", "que", "funcione"]
+
+
+def bag_of_words(texts):
+    # Embedding mínimo: frecuencia de cada palabra del vocabulario, normalizada a norma 1
+    vectors = np.zeros((len(texts), len(VOCABULARY)), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            if word in VOCABULARY:
+                vectors[row, VOCABULARY.index(word)] += 1
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+# Prueba unitaria: Verifica que una paráfrasis cercana acierta y un texto distinto no
+def test_near_duplicate_hit():
+    cache = SemanticCache(bag_of_words, threshold=0.75, audit_rate=1.0)
+    cache.add("classify", "Estoy de acuerdo con eso", {"acuerdo": 100})
+    value, vector = cache.lookup("classify", "estoy de acuerdo con esto")
+    assert value == {"acuerdo": 100}
+    assert vector.shape == (len(VOCABULARY),)
+    assert cache.lookup("classify", "No creo que funcione")[0] is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["audit"][0]["texto_cacheado"] == "Estoy de acuerdo con eso"
+    assert stats["audit"][0]["texto"] == "estoy de acuerdo con esto"
+
+# Prueba unitaria: Verifica que los resultados de un namespace no responden consultas de otro
+def test_namespaces_are_separate():
+    cache = SemanticCache(bag_of_words, threshold=0.75)
+    cache.add("classify", "Estoy de acuerdo con eso", "clasificación")
+    assert cache.lookup("desacuerdos", "Estoy de acuerdo con eso")[0] is None
+    cache.add("desacuerdos", "Estoy de acuerdo con eso", "posturas")
+    assert cache.lookup("desacuerdos", "Estoy de acuerdo con eso")[0] == "posturas"
+    assert cache.lookup("classify", "Estoy de acuerdo con eso")[0] == "clasificación"
+
+# Prueba unitaria: Verifica que añadir un texto ya guardado actualiza su fila en vez de duplicarla
+def test_add_same_text_replaces_entry():
+    cache = SemanticCache(bag_of_words, threshold=0.99, max_entries=2)
+    cache.add("classify", "estoy de acuerdo", 1)
+    cache.add("classify", "estoy de acuerdo", 2)
+    assert len(cache) == 1
+    assert cache.lookup("classify", "estoy de acuerdo")[0] == 2
+    cache.add("desacuerdos", "estoy de acuerdo", 3)
+    cache.add("classify", "no creo que funcione", 4)
+    cache.add("classify", "no creo que funcione", 5)
+    assert len(cache) == 2
+    assert cache.lookup("classify", "no creo que funcione")[0] == 5
+    assert cache.lookup("classify", "estoy de acuerdo")[0] is None
+
+# Prueba unitaria: Verifica que el índice lleno reemplaza la entrada usada hace más tiempo
+def test_eviction_least_recently_used():
+    cache = SemanticCache(bag_of_words, threshold=0.99, max_entries=2)
+    cache.add("classify", "estoy de acuerdo", 1)
+    cache.add("classify", "no creo que funcione", 2)
+    assert cache.lookup("classify", "estoy de acuerdo")[0] == 1
+    cache.add("classify", "con eso", 3)
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup("classify", "no creo que funcione")[0] is None
+    assert cache.lookup("classify", "estoy de acuerdo")[0] == 1
+
+# Prueba unitaria: Verifica que se rechaza un umbral fuera de rango
+def test_invalid_threshold():
+    with pytest.raises(ValueError):
+        SemanticCache(bag_of_words, threshold=0)
+
+# Prueba unitaria: Verifica que las entradas caducadas dejan de responder y se reemplazan primero
+def test_ttl():
+    clock = FakeClock()
+    cache = SemanticCache(bag_of_words, threshold=0.99, max_entries=2, ttl=10, clock=clock)
+    cache.add("classify", "estoy de acuerdo", 1)
+    clock.now = 5
+    cache.add("classify", "no creo que funcione", 2)
+    clock.now = 11
+    assert cache.lookup("classify", "estoy de acuerdo")[0] is None
+    assert cache.lookup("classify", "no creo que funcione")[0] == 2
+    cache.add("classify", "con eso", 3)
+    assert cache.lookup("classify", "no creo que funcione")[0] == 2
@@ -0,0 +1,85 @@
+from cache import SQLiteStore
+from translation import TranslationCache, translate_batch
+
+
+class StubTranslator:
+    def __init__(self, drop_lines=False):
+        self.calls = []
+        self.drop_lines = drop_lines
+
+    def translate(self, text):
+        self.calls.append(text)
+        if self.drop_lines:
+            text = text.replace("\n", " ")
+        return text.upper()
+
+
+# Prueba unitaria: Verifica que un lote de textos se traduce en una sola llamada y en orden
+def test_translate_batch_single_call():
+    translator = StubTranslator()
+    assert translate_batch(translator, ["hola", "adiós", "gracias"]) == ["HOLA", "ADIÓS", "GRACIAS"]
+    assert len(translator.calls) == 1
+
+# Prueba unitaria: Verifica que se traduce texto a texto si el traductor no conserva los saltos de línea
+def test_translate_batch_fallback():
+    translator = StubTranslator(drop_lines=True)
+    assert translate_batch(translator, ["hola", "adiós"]) == ["HOLA", "ADIÓS"]
+    assert len(translator.calls) == 3
+
+# Prueba unitaria: Verifica que los lotes grandes se dividen según el límite de caracteres
+def test_translate_batch_respects_max_chars():
+    translator = StubTranslator()
+    texts = ["a" * 10 for _ in range(6)]
+    assert translate_batch(translator, texts, max_chars=25) == ["A" * 10] * 6
+    assert len(translator.calls) == 3
+
+# Prueba unitaria: Verifica que los saltos de línea internos no desordenan el lote
+def test_translate_batch_inner_newlines():
+    translator = StubTranslator()
+    assert translate_batch(translator, ["uno\ndos", "tres"]) == ["UNO DOS", "TRES"]
+
+# Prueba unitaria: Verifica que la caché evita llamadas repetidas al traductor
+def test_translation_cache_hits():
+    translator = StubTranslator()
+    cache = TranslationCache(lambda: translator, max_entries=10)
+    assert cache.translate("Estoy  muy feliz") == "ESTOY MUY FELIZ"
+    assert cache.translate(" Estoy muy feliz ") == "ESTOY MUY FELIZ"
+    assert len(translator.calls) == 1
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["translator_calls"] == 1
+
+# Prueba unitaria: Verifica que el lote solo traduce los textos que no están en caché
+def test_translation_cache_batch_only_misses():
+    translator = StubTranslator()
+    cache = TranslationCache(lambda: translator, max_entries=10)
+    cache.translate("hola")
+    assert cache.translate_batch(["hola", "adiós", "adiós", "gracias"]) == ["HOLA", "ADIÓS", "ADIÓS", "GRACIAS"]
+    assert translator.calls == ["hola", "adiós\ngracias"]
+
+# Prueba unitaria: Verifica que la clave distingue los idiomas de origen y destino
+def test_translation_cache_key_includes_languages():
+    english = TranslationCache(StubTranslator, target='en')
+    french = TranslationCache(StubTranslator, target='fr')
+    assert english.key("hola") != french.key("hola")
+
+# Prueba unitaria: Verifica que el nivel persistente sobrevive a un reinicio
+def test_translation_cache_persistent_tier(tmp_path):
+    path = str(tmp_path / "translations.db")
+    translator = StubTranslator()
+    TranslationCache(lambda: translator, store=SQLiteStore(path, "translations")).translate("hola")
+
+    restarted = TranslationCache(lambda: translator, store=SQLiteStore(path, "translations"))
+    assert restarted.translate("hola") == "HOLA"
+    assert len(translator.calls) == 1
+    assert restarted.stats()["store_hits"] == 1
+
+# Prueba unitaria: Verifica que los textos que ya están en el idioma de destino no pasan por el traductor
+def test_translation_cache_skips_target_language():
+    translator = StubTranslator()
+    cache = TranslationCache(lambda: translator, detect_language=lambda text: "en" if text.startswith("the") else None)
+    assert cache.translate("the  cat") == "the cat"
+    assert cache.translate_batch(["the dog", "el perro"]) == ["the dog", "EL PERRO"]
+    assert translator.calls == ["el perro"]
+    assert cache.stats()["skipped"] == 2
@@ -0,0 +1,129 @@
+import threading
+
+from deep_translator import GoogleTranslator
+
+from cache import LRUCache, TieredCache, hash_key, normalize_text
+
+# Google Translate rechaza peticiones de más de 5000 caracteres
+TRANSLATION_MAX_CHARS = 4500
+# Separador entre textos al traducir un lote en una sola llamada
+TRANSLATION_SEPARATOR = "\n"
+
+
+def make_translator(source='auto', target='en'):
+    return GoogleTranslator(source=source, target=target)
+
+
+def _chunk_texts(texts, max_chars):
+    chunk = []
+    size = 0
+    for text in texts:
+        if chunk and size + len(text) + len(TRANSLATION_SEPARATOR) > max_chars:
+            yield chunk
+            chunk = []
+            size = 0
+        chunk.append(text)
+        size += len(text) + len(TRANSLATION_SEPARATOR)
+    if chunk:
+        yield chunk
+
+
+def translate_batch(translator, texts, max_chars=TRANSLATION_MAX_CHARS):
+    """Traduce una lista de textos con el menor número posible de llamadas.
+
+    Los textos se unen con saltos de línea, que el traductor conserva, y se
+    separan de nuevo al recibir la respuesta. Si el número de líneas devueltas
+    no coincide, ese fragmento se traduce texto a texto.
+    """
+    translations = []
+    for chunk in _chunk_texts([text.replace(TRANSLATION_SEPARATOR, " ") for text in texts], max_chars):
+        if len(chunk) == 1:
+            translations.append(translator.translate(chunk[0]))
+            continue
+        parts = translator.translate(TRANSLATION_SEPARATOR.join(chunk)).split(TRANSLATION_SEPARATOR)
+        if len(parts) != len(chunk):
+            parts = [translator.translate(text) for text in chunk]
+        translations.extend(part.strip() for part in parts)
+    return translations
+
+
+class TranslationCache:
+    """Caché de traducciones delante del traductor.
+
+    `translator_factory` crea un traductor con método `translate`; se instancia
+    uno por llamada porque `GoogleTranslator` no es seguro entre hilos. Las claves
+    combinan el texto normalizado con los idiomas de origen y destino. Con `upstream`
+    (un `resilience.Upstream`) las llamadas al traductor tienen plazo, hedging y
+    circuit breaker; los aciertos de caché no pasan por él. Con `detect_language`
+    (una función que devuelve el código de idioma de un texto o None), los textos
+    que ya están en el idioma de destino se devuelven sin llamar al traductor.
+    """
+
+    def __init__(self, translator_factory, max_entries=10000, store=None, source='auto', target='en', upstream=None,
+                 detect_language=None):
+        self.translator_factory = translator_factory
+        self.source = source
+        self.target = target
+        self.upstream = upstream
+        self.detect_language = detect_language
+        self.cache = TieredCache(LRUCache(max_entries), store)
+        self._lock = threading.Lock()
+        self.translator_calls = 0
+        self.skipped = 0
+
+    def key(self, text):
+        return hash_key(self.source, self.target, normalize_text(text))
+
+    def translate(self, text):
+        if self._in_target_language(text):
+            self._count_skipped(1)
+            return normalize_text(text)
+        key = self.key(text)
+        translated = self.cache.get(key)
+        if translated is None:
+            self._count_call()
+            translated = self._call(lambda: self.translator_factory().translate(normalize_text(text)))
+            self.cache.set(key, translated)
+        return translated
+
+    def translate_batch(self, texts):
+        """Traduce una lista de textos consultando la caché y agrupando los fallos en una sola llamada."""
+        keys = [self.key(text) for text in texts]
+        results = [normalize_text(text) if self._in_target_language(text) else None for text in texts]
+        self._count_skipped(sum(translated is not None for translated in results))
+        results = [self.cache.get(key) if translated is None else translated for key, translated in zip(keys, results)]
+        missing = {}
+        for key, text, translated in zip(keys, texts, results):
+            if translated is None and key not in missing:
+                missing[key] = normalize_text(text)
+
+        if missing:
+            self._count_call()
+            translations = self._call(lambda: translate_batch(self.translator_factory(), list(missing.values())))
+            translations = dict(zip(missing, translations))
+            for key, translated in translations.items():
+                self.cache.set(key, translated)
+            results = [translations[key] if translated is None else translated for key, translated in zip(keys, results)]
+        return results
+
+    def stats(self):
+        stats = self.cache.stats()
+        with self._lock:
+            stats["translator_calls"] = self.translator_calls
+            stats["skipped"] = self.skipped
+        return stats
+
+    def _call(self, fn):
+        # Cada intento (también las peticiones duplicadas) crea su propio traductor
+        return fn() if self.upstream is None else self.upstream.call_blocking(fn)
+
+    def _in_target_language(self, text):
+        return self.detect_language is not None and self.detect_language(text) == self.target
+
+    def _count_skipped(self, count):
+        with self._lock:
+            self.skipped += count
+
+    def _count_call(self):
+        with self._lock:
+            self.translator_calls += 1
@@ -0,0 +1,48 @@
+"""Muestra el uso de memoria del proceso maestro de gunicorn y de cada worker (solo Linux).
+
+PSS reparte las páginas compartidas entre los procesos que las usan y la memoria privada
+es la que cada worker no comparte con nadie: con los modelos precargados en el maestro,
+la memoria privada de cada worker debe ser una fracción pequeña del tamaño de un modelo.
+
+Uso:
+    python worker_memory.py <pid del proceso maestro>
+"""
+import sys
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as children_file:
+        return [int(child) for child in children_file.read().split()]
+
+
+def memory(pid):
+    # Valores en MB de /proc/<pid>/smaps_rollup
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "shared": values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0),
+        "private": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+    }
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    master = int(sys.argv[1])
+    print(f"{'proceso':<16}{'RSS MB':>10}{'PSS MB':>10}{'compartida MB':>15}{'privada MB':>12}")
+    total_pss = 0.0
+    for role, pid in [("maestro", master)] + [("worker", child) for child in children(master)]:
+        usage = memory(pid)
+        total_pss += usage["pss"]
+        print(f"{role + ' ' + str(pid):<16}{usage['rss']:>10.1f}{usage['pss']:>10.1f}{usage['shared']:>15.1f}{usage['private']:>12.1f}")
+    print(f"{'total (PSS)':<16}{'':>10}{total_pss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()